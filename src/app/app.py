@@ -7,6 +7,8 @@ with AI-powered answers and source citations.
 Features:
 - Chat-based Q&A interface
 - Source citations with expandable sections
+- Optional restriction of the search to selected acts
+- Index hot swap after re-ingestion (automatic, or from the sidebar)
 - Support for Contracts Act, Specific Relief Act, Housing Development Act
 """
 
@@ -25,8 +27,19 @@ sys.path.insert(0, str(PROJECT_ROOT / "src"))
 load_dotenv(PROJECT_ROOT / ".env")
 
 from generation.rag_chain import LegalRAGChain
+from retrieval.document_store import RetrievalFilter
 from retrieval.hybrid_retriever import HybridRetriever
 
+# Acts available in the knowledge base (act number -> display name)
+AVAILABLE_ACTS = {
+    136: "Contracts Act 1950 (Act 136)",
+    137: "Specific Relief Act 1951 (Act 137)",
+    118: "Housing Development Act 1966 (Act 118)",
+}
+
+# How often the retriever checks for a re-ingested collection (seconds)
+INDEX_WATCH_INTERVAL_S = 30.0
+
 
 # Page configuration
 st.set_page_config(
@@ -80,12 +93,15 @@ st.markdown("""
 @st.cache_resource
 def load_rag_chain():
     """Load and cache the RAG chain."""
-    return LegalRAGChain(
+    chain = LegalRAGChain(
         model_name="gemini-2.0-flash-lite",
         temperature=0.1,
         n_results=5,
         retrieval_method="hybrid"
     )
+    # Pick up re-ingested data without restarting the app
+    chain._retriever.start_index_watch(INDEX_WATCH_INTERVAL_S)
+    return chain
 
 
 def render_sidebar():
@@ -117,6 +133,15 @@ def render_sidebar():
         # Settings
         st.markdown("### ⚙️ Settings")
         show_sources = st.checkbox("Show source sections", value=True)
+        selected_acts = st.multiselect(
+            "Limit search to acts",
+            options=list(AVAILABLE_ACTS),
+            format_func=lambda act_number: AVAILABLE_ACTS[act_number],
+            help="Leave empty to search all acts."
+        )
+        retrieval_filter = (
+            RetrievalFilter(act_numbers=selected_acts) if selected_acts else None
+        )
         
         st.markdown("---")
         
@@ -127,7 +152,24 @@ def render_sidebar():
         Always consult a qualified lawyer for specific legal matters.
         """)
         
-        return show_sources
+        return show_sources, retrieval_filter
+
+
+def render_index_admin(retriever: HybridRetriever):
+    """Render the index status and manual reload trigger in the sidebar."""
+    with st.sidebar:
+        with st.expander("🛠️ Index admin"):
+            generation = retriever.generation
+            st.caption(
+                f"Serving index version `{generation.version}` "
+                f"({len(generation.store)} chunks)"
+            )
+            if st.button("Reload indexes"):
+                retriever.reload()
+                st.info(
+                    "Reloading in the background. Questions are answered "
+                    "from the current indexes until the new ones are ready."
+                )
 
 
 def render_sources(sources: list):
@@ -166,7 +208,7 @@ def render_sources(sources: list):
 def main():
     """Main application."""
     # Render sidebar
-    show_sources = render_sidebar()
+    show_sources, retrieval_filter = render_sidebar()
     
     # Main content
     st.markdown('<p class="main-header">⚖️ Malaysian Legal Assistant</p>', unsafe_allow_html=True)
@@ -186,6 +228,8 @@ def main():
         st.error(f"Error loading RAG system: {e}")
         st.stop()
     
+    render_index_admin(rag_chain._retriever)
+    
     # Create layout with chat and sources
     if show_sources and st.session_state.sources:
         col1, col2 = st.columns([2, 1])
@@ -211,7 +255,9 @@ def main():
             with st.chat_message("assistant"):
                 with st.spinner("Researching Malaysian law..."):
                     try:
-                        result = rag_chain.ask(prompt, return_sources=True)
+                        result = rag_chain.ask(
+                            prompt, return_sources=True, filters=retrieval_filter
+                        )
                         answer = result["answer"]
                         sources = result.get("sources", [])
                         
@@ -225,7 +271,7 @@ def main():
                         # Handle any API errors gracefully - fall back to retrieval only
                         st.warning(f"⚠️ LLM unavailable ({error_str[:100]}...). Showing retrieved sections:")
                         # Fall back to retrieval only
-                        sources = rag_chain.retrieve(prompt)
+                        sources = rag_chain.retrieve(prompt, filters=retrieval_filter)
                         context = rag_chain._retriever.format_context(sources)
                         answer = f"**Retrieved Legal Sections:**\n\n{context}"
                         st.markdown(answer)
@@ -9,7 +9,7 @@ import logging
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from dotenv import load_dotenv
 
@@ -30,6 +30,68 @@ class RAGConfig:
     keyword_weight: float = 0.5
     rrf_k: int = 60
     
+    # Hybrid Search Concurrency (deadlines in ms, None = wait indefinitely)
+    parallel_search: bool = True
+    search_workers: int = 4
+    semantic_deadline_ms: Optional[float] = 2000.0
+    keyword_deadline_ms: Optional[float] = 1000.0
+    # Threads running aretrieve() calls (requests beyond this queue)
+    async_retrieval_workers: int = 4
+    
+    # Semantic search backend: "chroma" (HNSW) or "exact" (in-process
+    # matrix product over the exported, memory-mapped embedding matrix)
+    semantic_backend: str = "chroma"
+    # Exact backend only: scan an "int8" or "binary" quantized copy first and
+    # rescore rescore_factor * k candidates at full precision ("none" = off;
+    # None = the mode's default factor)
+    vector_quantization: str = "none"
+    vector_rescore_factor: Optional[int] = None
+    
+    # Keyword Index (BM25)
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+    # Upserts add delta segments; merge them in the background once there
+    # are more than this many, or this fraction of documents is tombstoned
+    keyword_max_segments: int = 4
+    keyword_max_deleted_ratio: float = 0.25
+    # Drop query terms found in more than this fraction of chunks before
+    # keyword search, e.g. 0.5 (None = keep every term). evaluate_rag.py
+    # reports the effect on the golden dataset.
+    bm25_max_df_ratio: Optional[float] = None
+    
+    # Sharded retrieval (create_retriever): each shard is a group of acts
+    # searched in its own worker process (None = one shard per act). Vector
+    # slices need semantic_backend = "exact"; otherwise Chroma is queried.
+    sharded_retrieval: bool = False
+    shard_act_groups: Optional[List[List[int]]] = None
+    
+    # Section citations ("Section 10", "s. 24 Specific Relief Act") are
+    # answered from the citation index ahead of search
+    citation_fast_path: bool = True
+    
+    # Poll the collection version every this many seconds and hot-swap the
+    # retriever's indexes after re-ingestion (None = only on reload())
+    index_watch_interval_s: Optional[float] = None
+    
+    # Caching
+    query_embedding_cache_size: int = 1024
+    # Micro-batch concurrent query embeddings: a batch closes this long after
+    # its first query, at max size, or at once if no other query is pending
+    # (None = embed each call on its own)
+    embedding_batch_max_wait_ms: Optional[float] = 2.0
+    embedding_batch_max_size: int = 32
+    # Memoized query -> BM25 term-id analyses per index generation
+    query_analysis_cache_size: int = 1024
+    result_cache_size: int = 256
+    result_cache_disk: bool = False  # share results across processes via SQLite
+    result_cache_disk_size: int = 10000
+    
+    # Tracing: per-stage spans of retrieve(), ask() and ingestion, attached
+    # to ask() responses and exported to data/traces/ as "jsonl" or "chrome"
+    # (None = attach only, no file)
+    tracing: bool = False
+    trace_export_format: Optional[str] = "jsonl"
+    
     # Vector DB
     collection_name: str = "malaysian_legal_acts"
     
@@ -59,6 +121,26 @@ def get_vector_db_dir() -> Path:
     return get_data_dir() / "vector_db"
 
 
+def get_keyword_index_dir() -> Path:
+    """Get the keyword (BM25) index artifact directory."""
+    return get_data_dir() / "keyword_index"
+
+
+def get_vector_index_dir() -> Path:
+    """Get the exported embedding matrix (exact vector search) directory."""
+    return get_data_dir() / "vector_index"
+
+
+def get_chunk_store_dir() -> Path:
+    """Get the memory-mapped chunk text store directory."""
+    return get_data_dir() / "chunk_store"
+
+
+def get_cache_dir() -> Path:
+    """Get the directory for shared on-disk caches."""
+    return get_data_dir() / "cache"
+
+
 def setup_logging(name: str) -> logging.Logger:
     """
     Setup a standard logger with consistent formatting.
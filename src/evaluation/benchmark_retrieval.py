@@ -0,0 +1,207 @@
+"""
+Semantic Search Benchmark for Malaysian Legal RAG
+
+This module compares the semantic search modes of the hybrid retriever on
+the golden dataset questions:
+- chroma: Chroma's approximate HNSW index
+- exact: one matrix product over the memory-mapped float32 matrix
+- int8 / binary: exact backend scanning a quantized copy, with the
+  shortlist rescored at full precision
+
+For each mode it reports index memory, per-query latency (mean, p50, p95)
+and recall@k against the exact mode's results, which are the true nearest
+neighbours.
+
+Query embeddings are computed once before timing, so the numbers measure
+the search itself rather than the embedding model.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Add src to path
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from config import RAGConfig, get_vector_db_dir
+from evaluation.evaluate_rag import load_golden_dataset
+from retrieval.hybrid_retriever import HybridRetriever
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Mode name -> (semantic_backend, vector_quantization)
+MODES = {
+    "chroma": ("chroma", "none"),
+    "exact": ("exact", "none"),
+    "int8": ("exact", "int8"),
+    "binary": ("exact", "binary"),
+}
+
+
+def recall_at_k(
+    retrieved: Sequence[Sequence[str]],
+    relevant: Sequence[Sequence[str]],
+    k: int
+) -> float:
+    """
+    Mean fraction of the true top-k found in the retrieved top-k.
+
+    Args:
+        retrieved: Retrieved doc ids per query.
+        relevant: True nearest-neighbour doc ids per query.
+        k: Cutoff.
+
+    Returns:
+        Recall@k averaged over queries.
+    """
+    recalls = [
+        len(set(got[:k]) & set(truth[:k])) / len(truth[:k])
+        for got, truth in zip(retrieved, relevant)
+        if truth
+    ]
+    return sum(recalls) / len(recalls) if recalls else 0.0
+
+
+def index_memory(retriever: HybridRetriever) -> Dict[str, int]:
+    """
+    Return the memory footprint of a retriever's semantic index in bytes.
+
+    For the exact modes this is the scanned matrix (float32 or quantized)
+    and the full-precision matrix used for rescoring. For Chroma it is the
+    size of the HNSW segment files, which Chroma loads into memory.
+    """
+    vectors = retriever.generation.vectors
+    if vectors is not None:
+        return vectors.memory_bytes()
+    hnsw_bytes = sum(
+        path.stat().st_size
+        for segment in get_vector_db_dir().iterdir() if segment.is_dir()
+        for path in segment.iterdir() if path.is_file()
+    )
+    return {"scanned": hnsw_bytes, "full_precision": 0}
+
+
+def benchmark_backend(
+    retriever: HybridRetriever,
+    queries: List[str],
+    k: int,
+    repeats: int
+) -> Dict[str, Any]:
+    """
+    Time the semantic search leg of a retriever.
+
+    Args:
+        retriever: Retriever configured with the backend to measure.
+        queries: Benchmark queries.
+        k: Results per query.
+        repeats: Timed passes over the queries.
+
+    Returns:
+        Dictionary with latency statistics (ms) and the retrieved doc ids.
+    """
+    # Warm the query-embedding cache so only search is timed
+    retriever._embedder.embed(queries)
+    hits = [[doc_id for doc_id, _ in retriever._semantic_search(q, k)] for q in queries]
+
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            retriever._semantic_search(query, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "latency_ms": {
+            "mean": float(np.mean(latencies)),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+        },
+        "hits": hits,
+    }
+
+
+def run_benchmark(
+    k: int = 10,
+    repeats: int = 5,
+    rescore_factor: Optional[int] = None
+) -> dict:
+    """
+    Benchmark the semantic search modes on the golden dataset.
+
+    Args:
+        k: Results per query (recall@k cutoff).
+        repeats: Timed passes over the question set.
+        rescore_factor: Full-precision candidates per result for the
+            quantized modes (None for each mode's default).
+
+    Returns:
+        Dictionary with per-mode memory, latency and recall.
+    """
+    logger.info("=" * 60)
+    logger.info("Semantic Search Backend Benchmark")
+    logger.info("=" * 60)
+
+    queries = [q["question"] for q in load_golden_dataset()["questions"]]
+    logger.info(f"{len(queries)} queries, k={k}, {repeats} timed passes")
+
+    runs = {}
+    for mode, (backend, quantization) in MODES.items():
+        retriever = HybridRetriever(RAGConfig(
+            semantic_backend=backend,
+            vector_quantization=quantization,
+            vector_rescore_factor=rescore_factor
+        ))
+        runs[mode] = benchmark_backend(retriever, queries, k, repeats)
+        runs[mode]["memory_bytes"] = index_memory(retriever)
+
+    truth = runs["exact"]["hits"]
+    output = {"k": k, "queries": len(queries), "repeats": repeats, "modes": {}}
+    for mode, run in runs.items():
+        recall = recall_at_k(run["hits"], truth, k)
+        output["modes"][mode] = {
+            "memory_bytes": run["memory_bytes"],
+            "latency_ms": run["latency_ms"],
+            f"recall_at_{k}": recall,
+        }
+        logger.info(
+            f"{mode:>8}: index {run['memory_bytes']['scanned'] / 1024:.0f} KiB, "
+            f"mean {run['latency_ms']['mean']:.2f} ms, "
+            f"p50 {run['latency_ms']['p50']:.2f} ms, "
+            f"p95 {run['latency_ms']['p95']:.2f} ms, "
+            f"recall@{k} {recall:.3f}"
+        )
+
+    output_path = PROJECT_ROOT / "tests" / "benchmark_results.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+
+    logger.info(f"\nResults saved to: {output_path}")
+
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark semantic search backends")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes")
+    parser.add_argument(
+        "--rescore-factor",
+        type=int,
+        default=None,
+        help="Full-precision candidates per result for int8/binary"
+    )
+    args = parser.parse_args()
+
+    run_benchmark(k=args.k, repeats=args.repeats, rescore_factor=args.rescore_factor)
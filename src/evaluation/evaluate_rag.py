@@ -6,6 +6,8 @@ This module implements evaluation metrics for the RAG system:
 2. Context relevancy 
 3. Faithfulness (answer grounded in context)
 4. Citation accuracy
+5. Keyword search pruning impact (exhaustive BM25 vs MaxScore vs
+   MaxScore with common query terms dropped)
 
 Uses a lightweight evaluation approach that doesn't require external APIs.
 """
@@ -14,15 +16,16 @@ import json
 import logging
 import re
 import sys
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 # Add src to path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
-from retrieval.hybrid_retriever import HybridRetriever
+from retrieval.hybrid_retriever import HybridRetriever, RetrievalResult
 
 # Configure logging
 logging.basicConfig(
@@ -62,7 +65,8 @@ def evaluate_retrieval(
     question: str,
     expected_act: str,
     expected_section: str,
-    k: int = 5
+    k: int = 5,
+    results: Optional[List[RetrievalResult]] = None
 ) -> EvaluationResult:
     """
     Evaluate retrieval for a single question.
@@ -73,11 +77,14 @@ def evaluate_retrieval(
         expected_act: The act that should be retrieved.
         expected_section: The section that should be retrieved.
         k: Number of results to retrieve.
+        results: Results already retrieved for this question (e.g. from
+            retrieve_many). If None, the retriever is queried.
     
     Returns:
         EvaluationResult with metrics.
     """
-    results = retriever.retrieve(question, n_results=k, method="hybrid")
+    if results is None:
+        results = retriever.retrieve(question, n_results=k, method="hybrid")
     
     # Find rank of expected result
     rank = None
@@ -115,6 +122,93 @@ def evaluate_retrieval(
     )
 
 
+def aggregate_metrics(results: List[EvaluationResult]) -> Dict[str, float]:
+    """Average hit rates and reciprocal rank over evaluated questions."""
+    n = len(results)
+    return {
+        "hit_rate_at_1": sum(r.hit_at_1 for r in results) / n,
+        "hit_rate_at_3": sum(r.hit_at_3 for r in results) / n,
+        "hit_rate_at_5": sum(r.hit_at_5 for r in results) / n,
+        "mrr": sum(r.reciprocal_rank for r in results) / n,
+    }
+
+
+def evaluate_keyword_pruning(
+    retriever: HybridRetriever,
+    questions: List[dict],
+    k: int = 5,
+    max_df_ratio: Optional[float] = None
+) -> dict:
+    """
+    Measure what query term pruning and MaxScore do to the keyword leg.
+    
+    Runs the golden questions through BM25 alone in three modes:
+    - exhaustive: every posting of every query term is scored
+    - maxscore: MaxScore dynamic pruning (same top-k as exhaustive)
+    - pruned: MaxScore after dropping terms found in more than
+      max_df_ratio of the chunks
+    
+    Args:
+        retriever: The hybrid retriever instance.
+        questions: Golden dataset questions.
+        k: Number of results per question.
+        max_df_ratio: Pruning threshold to evaluate (default: the
+            retriever's bm25_max_df_ratio, or 0.5 if pruning is off).
+    
+    Returns:
+        Dictionary with per-mode metrics, postings scored per query and
+        latency, plus the metric deltas of the pruned mode.
+    """
+    bm25 = retriever.generation.bm25
+    configured_ratio = retriever.config.bm25_max_df_ratio
+    if max_df_ratio is None:
+        max_df_ratio = configured_ratio if configured_ratio is not None else 0.5
+    queries = [q["question"] for q in questions]
+    # (max_df_ratio, dynamic_pruning) per mode; a ratio of 1.0 keeps every
+    # term. Passed per search, so other users of the retriever are unaffected
+    modes = {
+        "exhaustive": (1.0, False),
+        "maxscore": (1.0, True),
+        "pruned": (max_df_ratio, True),
+    }
+    
+    report = {"max_df_ratio": max_df_ratio, "modes": {}}
+    for mode, (ratio, dynamic_pruning) in modes.items():
+        postings_before = bm25.postings_scored
+        start = time.perf_counter()
+        batch_hits = [
+            retriever._keyword_search(
+                query, k, max_df_ratio=ratio, dynamic_pruning=dynamic_pruning
+            )
+            for query in queries
+        ]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        postings_scored = bm25.postings_scored - postings_before
+        
+        results = [
+            evaluate_retrieval(
+                retriever=retriever,
+                question=q["question"],
+                expected_act=q["expected_act"],
+                expected_section=q["expected_section"],
+                results=retriever._build_results("keyword", [], hits, k)
+            )
+            for q, hits in zip(questions, batch_hits)
+        ]
+        report["modes"][mode] = {
+            **aggregate_metrics(results),
+            "postings_scored_per_query": postings_scored / len(queries),
+            "latency_ms_per_query": elapsed_ms / len(queries),
+        }
+    
+    baseline, pruned = report["modes"]["exhaustive"], report["modes"]["pruned"]
+    report["pruned_delta"] = {
+        metric: pruned[metric] - baseline[metric]
+        for metric in ("hit_rate_at_1", "hit_rate_at_3", "hit_rate_at_5", "mrr")
+    }
+    return report
+
+
 def run_evaluation() -> dict:
     """
     Run full evaluation on the golden dataset.
@@ -134,15 +228,23 @@ def run_evaluation() -> dict:
     # Initialize retriever
     retriever = HybridRetriever()
     
+    # Retrieve for all questions in one batch
+    batch_results = retriever.retrieve_many(
+        [q["question"] for q in questions],
+        n_results=5,
+        method="hybrid"
+    )
+    
     # Evaluate each question
     results = []
     
-    for q in questions:
+    for q, retrieved in zip(questions, batch_results):
         eval_result = evaluate_retrieval(
             retriever=retriever,
             question=q["question"],
             expected_act=q["expected_act"],
-            expected_section=q["expected_section"]
+            expected_section=q["expected_section"],
+            results=retrieved
         )
         eval_result.question_id = q["id"]
         results.append(eval_result)
@@ -156,11 +258,11 @@ def run_evaluation() -> dict:
     
     # Calculate aggregate metrics
     n = len(results)
-    
-    hit_rate_1 = sum(r.hit_at_1 for r in results) / n
-    hit_rate_3 = sum(r.hit_at_3 for r in results) / n
-    hit_rate_5 = sum(r.hit_at_5 for r in results) / n
-    mrr = sum(r.reciprocal_rank for r in results) / n
+    metrics = aggregate_metrics(results)
+    hit_rate_1 = metrics["hit_rate_at_1"]
+    hit_rate_3 = metrics["hit_rate_at_3"]
+    hit_rate_5 = metrics["hit_rate_at_5"]
+    mrr = metrics["mrr"]
     
     # Summary
     logger.info("\n" + "=" * 60)
@@ -180,6 +282,16 @@ def run_evaluation() -> dict:
             logger.info(f"  - {f.question_id}: Expected {f.expected_act}, {f.expected_section}")
             logger.info(f"    Got: {', '.join(f.top_sources)}")
     
+    # Keyword leg with and without query term pruning / MaxScore
+    keyword_pruning = evaluate_keyword_pruning(retriever, questions)
+    logger.info("\nKeyword search pruning (BM25 only):")
+    for mode, m in keyword_pruning["modes"].items():
+        logger.info(
+            f"  {mode:>10}: Hit@3 {m['hit_rate_at_3']:.1%}, MRR {m['mrr']:.3f}, "
+            f"{m['postings_scored_per_query']:.0f} postings/query, "
+            f"{m['latency_ms_per_query']:.2f} ms/query"
+        )
+    
     # Save results
     output = {
         "metrics": {
@@ -189,6 +301,7 @@ def run_evaluation() -> dict:
             "mrr": mrr,
             "total_questions": n
         },
+        "keyword_pruning": keyword_pruning,
         "individual_results": [
             {
                 "question_id": r.question_id,
@@ -7,17 +7,28 @@ This module assembles the complete RAG chain:
 3. Context formatting
 4. LLM generation with legal prompts
 5. Response with citations
+
+aretrieve(), aask() and aask_stream() are the asyncio counterparts of
+retrieve(), ask() and ask_stream() for async web services: retrieval runs off
+the event loop and generation uses LangChain's native async interfaces, so
+cancelling the calling task also cancels the in-flight LLM request.
+
+With RAGConfig.tracing, ask() and aask() attach a "trace" entry to the
+response (per-stage timings: retrieval stages, context formatting, the LLM
+call), and the streaming methods record time to first and last token; all
+traces are exported as configured (see tracing.py).
 """
 
 import logging
 import os
+import time
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 
 # Load environment variables
 load_dotenv()
@@ -44,7 +55,10 @@ from generation.prompts import (
     RAG_PROMPT_TEMPLATE,
     NO_CONTEXT_PROMPT
 )
-from retrieval.hybrid_retriever import HybridRetriever
+import tracing
+from config import RAGConfig
+from retrieval.document_store import RetrievalFilter
+from retrieval.sharded_retriever import create_retriever
 
 
 class LegalRAGChain:
@@ -60,7 +74,9 @@ class LegalRAGChain:
         model_name: str = "gemini-2.0-flash-lite",
         temperature: float = 0.1,
         n_results: int = 5,
-        retrieval_method: str = "hybrid"
+        retrieval_method: str = "hybrid",
+        retrieval_filter: Optional[RetrievalFilter] = None,
+        config: Optional[RAGConfig] = None
     ):
         """
         Initialize the Legal RAG Chain.
@@ -70,11 +86,16 @@ class LegalRAGChain:
             temperature: LLM temperature (low for legal accuracy).
             n_results: Number of chunks to retrieve.
             retrieval_method: "hybrid", "semantic", or "keyword".
+            retrieval_filter: Default act/part/section filter for retrieval.
+            config: Optional RAGConfig for the retriever and tracing.
         """
+        self.config = config or RAGConfig()
+        self._trace_exporter = tracing.exporter_for(self.config)
         self.model_name = model_name
         self.temperature = temperature
         self.n_results = n_results
         self.retrieval_method = retrieval_method
+        self.retrieval_filter = retrieval_filter
         
         # Initialize components
         self._retriever = None
@@ -86,7 +107,7 @@ class LegalRAGChain:
     def _initialize(self):
         """Initialize the retriever and LLM."""
         # Initialize retriever
-        self._retriever = HybridRetriever()
+        self._retriever = create_retriever(self.config)
         
         # Initialize LLM
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -110,7 +131,7 @@ class LegalRAGChain:
         logger.info(f"LegalRAGChain initialized (model: {self.model_name})")
     
     def _build_chain(self):
-        """Build the LangChain RAG pipeline."""
+        """Build the LangChain generation pipeline (context + question -> answer)."""
         if self._llm is None:
             self._chain = None
             return
@@ -121,31 +142,21 @@ class LegalRAGChain:
             ("human", RAG_PROMPT_TEMPLATE)
         ])
         
-        # Build chain with retrieval
-        def retrieve_and_format(query: str) -> str:
-            results = self._retriever.retrieve(
-                query,
-                n_results=self.n_results,
-                method=self.retrieval_method
-            )
-            return self._retriever.format_context(results)
-        
-        self._chain = (
-            {
-                "context": RunnableLambda(retrieve_and_format),
-                "question": RunnablePassthrough()
-            }
-            | prompt
-            | self._llm
-            | StrOutputParser()
-        )
+        # Retrieval happens before the chain so the sources returned to the
+        # caller are exactly the ones the answer was generated from
+        self._chain = prompt | self._llm | StrOutputParser()
     
-    def retrieve(self, question: str) -> list:
+    def retrieve(
+        self,
+        question: str,
+        filters: Optional[RetrievalFilter] = None
+    ) -> list:
         """
         Retrieve relevant legal chunks without LLM generation.
         
         Args:
             question: The user's legal question.
+            filters: Act/part/section filter (defaults to retrieval_filter).
         
         Returns:
             List of RetrievalResult objects.
@@ -153,37 +164,45 @@ class LegalRAGChain:
         return self._retriever.retrieve(
             question,
             n_results=self.n_results,
-            method=self.retrieval_method
+            method=self.retrieval_method,
+            filters=filters if filters is not None else self.retrieval_filter
         )
     
-    def ask(
+    async def aretrieve(
         self,
         question: str,
-        return_sources: bool = True
-    ) -> dict:
+        filters: Optional[RetrievalFilter] = None
+    ) -> list:
         """
-        Ask a legal question and get an answer with citations.
+        Coroutine version of retrieve(); see HybridRetriever.aretrieve().
         
         Args:
             question: The user's legal question.
-            return_sources: Whether to include source chunks.
+            filters: Act/part/section filter (defaults to retrieval_filter).
         
         Returns:
-            Dictionary with:
-                - answer: The generated response
-                - sources: List of source chunks (if return_sources=True)
+            List of RetrievalResult objects.
         """
-        # Retrieve relevant chunks
-        sources = self.retrieve(question)
-        
-        # Check if we have relevant context
+        return await self._retriever.aretrieve(
+            question,
+            n_results=self.n_results,
+            method=self.retrieval_method,
+            filters=filters if filters is not None else self.retrieval_filter
+        )
+    
+    def _answer_without_llm(
+        self,
+        question: str,
+        sources: list,
+        return_sources: bool
+    ) -> Optional[dict]:
+        """Answer for when the chain cannot run (no context or no LLM), else None."""
         if not sources:
             return {
                 "answer": NO_CONTEXT_PROMPT.format(question=question),
                 "sources": []
             }
         
-        # Generate answer
         if self._chain is None:
             # LLM not available, return retrieval only
             context = self._retriever.format_context(sources)
@@ -195,9 +214,11 @@ class LegalRAGChain:
                 "sources": sources if return_sources else []
             }
         
-        # Run the chain
-        answer = self._chain.invoke(question)
-        
+        return None
+    
+    @staticmethod
+    def _format_answer(answer: str, sources: list, return_sources: bool) -> dict:
+        """Package a generated answer with its source citations."""
         result = {"answer": answer}
         if return_sources:
             result["sources"] = [
@@ -213,7 +234,133 @@ class LegalRAGChain:
         
         return result
     
-    def ask_stream(self, question: str):
+    def _start_stream_trace(self, name: str) -> Optional[tracing.Trace]:
+        """Start the trace of a streaming answer, if tracing (and not nested)."""
+        if not self.config.tracing or tracing.current_trace() is not None:
+            return None
+        return tracing.Trace(name, self._trace_exporter)
+    
+    @staticmethod
+    def _record_stream(
+        trace: Optional[tracing.Trace],
+        start_ns: int,
+        first_token_ns: Optional[int],
+        chunks: int
+    ) -> None:
+        """Record time to first token and to last token of a streamed answer."""
+        if trace is None:
+            return
+        end_ns = time.perf_counter_ns()
+        trace.record("llm_first_token", start_ns, first_token_ns or end_ns)
+        trace.record("llm_stream", start_ns, end_ns, chunks=chunks)
+    
+    def ask(
+        self,
+        question: str,
+        return_sources: bool = True,
+        filters: Optional[RetrievalFilter] = None
+    ) -> dict:
+        """
+        Ask a legal question and get an answer with citations.
+        
+        Args:
+            question: The user's legal question.
+            return_sources: Whether to include source chunks.
+            filters: Act/part/section filter (defaults to retrieval_filter).
+        
+        Returns:
+            Dictionary with:
+                - answer: The generated response
+                - sources: List of source chunks (if return_sources=True)
+                - trace: Per-stage timings (if config.tracing)
+        """
+        with tracing.trace(
+            "ask", enabled=self.config.tracing, exporter=self._trace_exporter
+        ) as trace:
+            result = self._ask(question, return_sources, filters)
+        if trace is not None:
+            result["trace"] = trace.to_dict()
+        return result
+    
+    def _ask(
+        self,
+        question: str,
+        return_sources: bool,
+        filters: Optional[RetrievalFilter]
+    ) -> dict:
+        """Run ask() (see there), inside its trace if tracing."""
+        # Retrieve relevant chunks
+        sources = self.retrieve(question, filters)
+        
+        # No context or no LLM: answer without generation
+        fallback = self._answer_without_llm(question, sources, return_sources)
+        if fallback is not None:
+            return fallback
+        
+        with tracing.span("format_context", sources=len(sources)):
+            context = self._retriever.format_context(sources)
+        
+        # Run the chain
+        with tracing.span("llm", model=self.model_name) as span:
+            answer = self._chain.invoke({"context": context, "question": question})
+            span.set(answer_chars=len(answer))
+        
+        return self._format_answer(answer, sources, return_sources)
+    
+    async def aask(
+        self,
+        question: str,
+        return_sources: bool = True,
+        filters: Optional[RetrievalFilter] = None
+    ) -> dict:
+        """
+        Coroutine version of ask().
+        
+        Cancelling the awaiting task cancels the LLM request in flight.
+        
+        Args:
+            question: The user's legal question.
+            return_sources: Whether to include source chunks.
+            filters: Act/part/section filter (defaults to retrieval_filter).
+        
+        Returns:
+            Dictionary with answer, sources and trace, as for ask().
+        """
+        with tracing.trace(
+            "aask", enabled=self.config.tracing, exporter=self._trace_exporter
+        ) as trace:
+            result = await self._aask(question, return_sources, filters)
+        if trace is not None:
+            result["trace"] = trace.to_dict()
+        return result
+    
+    async def _aask(
+        self,
+        question: str,
+        return_sources: bool,
+        filters: Optional[RetrievalFilter]
+    ) -> dict:
+        """Run aask() (see there), inside its trace if tracing."""
+        sources = await self.aretrieve(question, filters)
+        
+        fallback = self._answer_without_llm(question, sources, return_sources)
+        if fallback is not None:
+            return fallback
+        
+        with tracing.span("format_context", sources=len(sources)):
+            context = self._retriever.format_context(sources)
+        
+        with tracing.span("llm", model=self.model_name) as span:
+            answer = await self._chain.ainvoke({"context": context, "question": question})
+            span.set(answer_chars=len(answer))
+        
+        return self._format_answer(answer, sources, return_sources)
+    
+    def ask_stream(
+        self,
+        question: str,
+        filters: Optional[RetrievalFilter] = None
+    ):
         """
         Ask a question with streaming response.
         
@@ -238,19 +385,62 @@ class LegalRAGChain:
             ("human", RAG_PROMPT_TEMPLATE)
         ])
         
-        # Retrieve context
-        results = self._retriever.retrieve(
-            question,
-            n_results=self.n_results,
-            method=self.retrieval_method
-        )
-        context = self._retriever.format_context(results)
+        trace = self._start_stream_trace("ask_stream")
+        try:
+            # Retrieve context (the trace is only active outside the yields)
+            with trace.activate() if trace is not None else nullcontext():
+                results = self.retrieve(question, filters)
+                with tracing.span("format_context", sources=len(results)):
+                    context = self._retriever.format_context(results)
+            
+            # Stream response
+            chain = prompt | streaming_llm | StrOutputParser()
+            
+            start_ns, first_token_ns, chunks = time.perf_counter_ns(), None, 0
+            for chunk in chain.stream({"context": context, "question": question}):
+                if first_token_ns is None:
+                    first_token_ns = time.perf_counter_ns()
+                chunks += 1
+                yield chunk
+            self._record_stream(trace, start_ns, first_token_ns, chunks)
+        finally:
+            if trace is not None:
+                trace.finish()
+    
+    async def aask_stream(
+        self,
+        question: str,
+        filters: Optional[RetrievalFilter] = None
+    ):
+        """
+        Ask a question with an async streaming response.
         
-        # Stream response
-        chain = prompt | streaming_llm | StrOutputParser()
+        Yields chunks of the response as the LLM produces them, via the
+        chain's astream() (chat models stream natively there, no separate
+        streaming client is needed). Closing the generator or cancelling
+        its consumer stops generation.
+        """
+        if self._chain is None:
+            yield "⚠️ LLM generation is disabled (no API key)."
+            return
         
-        for chunk in chain.stream({"context": context, "question": question}):
-            yield chunk
+        trace = self._start_stream_trace("aask_stream")
+        try:
+            with trace.activate() if trace is not None else nullcontext():
+                results = await self.aretrieve(question, filters)
+                with tracing.span("format_context", sources=len(results)):
+                    context = self._retriever.format_context(results)
+            
+            start_ns, first_token_ns, chunks = time.perf_counter_ns(), None, 0
+            async for chunk in self._chain.astream({"context": context, "question": question}):
+                if first_token_ns is None:
+                    first_token_ns = time.perf_counter_ns()
+                chunks += 1
+                yield chunk
+            self._record_stream(trace, start_ns, first_token_ns, chunks)
+        finally:
+            if trace is not None:
+                trace.finish()
 
 
 def test_rag_chain():
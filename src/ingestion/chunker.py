@@ -10,8 +10,12 @@ Key features:
 - Detect Part headers (PART I, PART II, etc.)
 - Keep subsections with their parent sections
 - Include metadata (Act name, section number) for citation
+
+Documents unchanged since the last run, whose chunk files are intact, are
+not re-chunked (see manifest.py).
 """
 
+import argparse
 import json
 import re
 from dataclasses import dataclass, asdict
@@ -25,12 +29,18 @@ from config import (
     get_processed_dir,
     setup_logging
 )
+from ingestion.manifest import MANIFEST_FILE, IngestionManifest, file_sha256
 
 # Configure logging
 logger = setup_logging(__name__)
 
 # Token counting
 TOKENIZER: Optional[Any] = None
+TOKENIZER_ENCODING = "cl100k_base"  # GPT-4 encoding
+
+# Bump when a change alters the chunks produced, so the next run re-chunks
+# every document instead of skipping unchanged ones
+CHUNKING_VERSION = 1
 
 
 def get_tokenizer() -> Any:
@@ -38,7 +48,7 @@ def get_tokenizer() -> Any:
     global TOKENIZER
     if TOKENIZER is None:
         try:
-            TOKENIZER = tiktoken.get_encoding("cl100k_base")  # GPT-4 encoding
+            TOKENIZER = tiktoken.get_encoding(TOKENIZER_ENCODING)
         except Exception as e:
             logger.error(f"Failed to load tokenizer: {e}")
             raise
@@ -336,15 +346,21 @@ def chunk_document(
     return chunks
 
 
-def process_all_documents(max_tokens: int = 1000) -> Dict[str, Dict[str, int]]:
+def process_all_documents(
+    max_tokens: int = 1000,
+    incremental: bool = True
+) -> Dict[str, Dict[str, int]]:
     """
     Process all documents in the processed directory and create chunks.
     
     Args:
         max_tokens: Maximum tokens per chunk.
+        incremental: Skip documents that are unchanged since the last run
+            and whose chunk file is intact (False = re-chunk everything).
     
     Returns:
-        Dictionary mapping filenames to chunk statistics.
+        Dictionary mapping filenames to chunk statistics (as recorded when
+        skipped documents were last chunked).
     """
     processed_dir = get_processed_dir()
     
@@ -354,8 +370,11 @@ def process_all_documents(max_tokens: int = 1000) -> Dict[str, Dict[str, int]]:
         
     json_files = list(processed_dir.glob("*.json"))
     
-    # Filter out chunked files
-    json_files = [f for f in json_files if not f.name.endswith("_chunks.json")]
+    # Filter out chunked files and the ingestion manifest
+    json_files = [
+        f for f in json_files
+        if not f.name.endswith("_chunks.json") and f.name != MANIFEST_FILE
+    ]
     
     logger.info("=" * 60)
     logger.info("Starting Semantic Chunking")
@@ -367,8 +386,27 @@ def process_all_documents(max_tokens: int = 1000) -> Dict[str, Dict[str, int]]:
     results: Dict[str, Dict[str, int]] = {}
     all_chunks = []
     
+    manifest = IngestionManifest.load(processed_dir / MANIFEST_FILE)
+    stage = manifest.stage(
+        "chunk",
+        CHUNKING_VERSION,
+        {"max_tokens": max_tokens, "tokenizer": TOKENIZER_ENCODING}
+    )
+    if not incremental:
+        stage.clear()
+    stage.retain(f.name for f in json_files)
+    skipped = 0
+    
     for json_path in json_files:
+        chunks_path = json_path.with_name(json_path.stem + "_chunks.json")
+        input_hash = file_sha256(json_path)
+        if stage.is_current(json_path.name, input_hash, chunks_path):
+            results[json_path.name] = stage.get(json_path.name)["stats"]
+            skipped += 1
+            continue
+        
         logger.info(f"\nProcessing: {json_path.name}")
+        stage.forget(json_path.name)
         
         try:
             with open(json_path, "r", encoding="utf-8") as f:
@@ -378,7 +416,6 @@ def process_all_documents(max_tokens: int = 1000) -> Dict[str, Dict[str, int]]:
             all_chunks.extend(chunks)
             
             # Save chunks for this document
-            chunks_path = json_path.with_name(json_path.stem + "_chunks.json")
             with open(chunks_path, "w", encoding="utf-8") as f:
                 json.dump([asdict(c) for c in chunks], f, ensure_ascii=False, indent=2)
             
@@ -388,6 +425,12 @@ def process_all_documents(max_tokens: int = 1000) -> Dict[str, Dict[str, int]]:
                 "total_tokens": sum(c.token_count for c in chunks),
                 "avg_tokens": sum(c.token_count for c in chunks) // len(chunks) if chunks else 0
             }
+            stage.record(
+                json_path.name,
+                input=input_hash,
+                output=file_sha256(chunks_path),
+                stats=results[json_path.name]
+            )
         except Exception as e:
             logger.error(f"Failed to process {json_path.name}: {e}")
             continue
@@ -402,12 +445,21 @@ def process_all_documents(max_tokens: int = 1000) -> Dict[str, Dict[str, int]]:
             f"avg {stats['avg_tokens']} tokens"
         )
         total_chunks += stats['chunk_count']
-    logger.info(f"\nTotal chunks created: {total_chunks}")
+    logger.info(f"\nTotal chunks: {total_chunks} ({skipped} documents unchanged)")
     logger.info("=" * 60)
     
+    manifest.save()
     return results
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunk the processed documents")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-chunk every document, including unchanged ones"
+    )
+    args = parser.parse_args()
+    
     config = RAGConfig()
-    process_all_documents(max_tokens=config.chunk_size)
+    process_all_documents(max_tokens=config.chunk_size, incremental=not args.full)
@@ -0,0 +1,398 @@
+"""
+Noise Removal Rules for Legal Text Cleaning
+
+This module holds the rules clean_legal_text() uses to strip AGC stamps,
+page markers, URLs and similar noise from extracted Act text.
+
+Rules are grouped into profiles, one per gazette format: the EN and BM
+editions carry different stamps and markers, and a revised edition has no
+reprint marker. A CleaningEngine compiles the rules of a profile once into a
+single alternation, so cleaning removes every kind of noise in one scan of
+the text, and counts how often each rule fired. The counts show which rules
+actually match the catalogue and which are dead weight.
+
+Matching is leftmost-first: at each position the first rule of the profile
+that matches wins, and text exposed by a removal is not scanned again, with
+one exception. Line-anchored rules (patterns starting with "^", such as
+loose page numbers) are applied once more to the lines a removal touched.
+So a footer line like "12 AGC Malaysia" goes entirely, as it did when the
+rules were applied one after another.
+
+Python's re only skips ahead quickly to where a match can start when every
+branch of a pattern begins with a plain literal; a plain alternation of
+case-insensitive rules is tried at every character and is slower than
+running the rules one by one. So rules that start with a literal letter
+or digit are compiled with that character spelled out in each case, which
+lets one scan jump between candidate positions. The few other rules (such
+as line-anchored page numbers) are combined into a second pattern, and the
+two match streams are merged.
+
+Besides the built-in profiles, a profile can be loaded from a JSON file:
+
+    {
+        "name": "en_revised",
+        "extends": "en",
+        "disable": ["reprint_marker_en"],
+        "rules": [{"name": "revision_marker", "pattern": "Revised\\s*\\d{4}"}]
+    }
+
+New rules are appended to the inherited ones.
+"""
+
+import heapq
+import json
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RULE_FLAGS = re.IGNORECASE | re.MULTILINE
+
+
+@dataclass(frozen=True)
+class CleaningRule:
+    """A named pattern whose matches are removed from the text."""
+    name: str
+    pattern: str
+
+
+# Every built-in rule, in the order they are tried
+RULES: Dict[str, CleaningRule] = {
+    rule.name: rule
+    for rule in (
+        # AGC headers/stamps
+        CleaningRule("agc_stamp", r"AGC\s*Malaysia"),
+        CleaningRule("agc_chambers_en", r"Attorney\s*General['']?s?\s*Chambers"),
+        CleaningRule("agc_chambers_bm", r"Jabatan\s*Peguam\s*Negara"),
+        
+        # Page markers
+        CleaningRule("page_marker_en", r"Page\s*\d+\s*of\s*\d+"),
+        CleaningRule("page_marker_bm", r"Mukasurat\s*\d+\s*daripada\s*\d+"),
+        
+        # Common footer patterns
+        CleaningRule("agc_url", r"www\.agc\.gov\.my"),
+        CleaningRule("url", r"http[s]?://\S+"),
+        
+        # Reprint markers (but keep the year info)
+        CleaningRule(
+            "reprint_marker_en",
+            r"Incorporating\s*all\s*amendments\s*up\s*to\s*\d+\s*\w+\s*\d{4}"
+        ),
+        CleaningRule(
+            "reprint_marker_bm",
+            r"Mengandungi\s*segala\s*pindaan\s*hingga\s*\d+\s*\w+\s*\d{4}"
+        ),
+        
+        # Loose page numbers at line start/end
+        CleaningRule("loose_page_number", r"^\s*\d{1,3}\s*$"),
+    )
+}
+
+# Built-in profiles: rule names in the order they are tried
+PROFILES: Dict[str, Tuple[str, ...]] = {
+    # Any edition, language unknown
+    "default": (
+        "agc_stamp", "agc_chambers_en", "agc_chambers_bm",
+        "page_marker_en", "page_marker_bm",
+        "agc_url", "url",
+        "reprint_marker_en",
+        "loose_page_number",
+    ),
+    "en": (
+        "agc_stamp", "agc_chambers_en",
+        "page_marker_en",
+        "agc_url", "url",
+        "reprint_marker_en",
+        "loose_page_number",
+    ),
+    "bm": (
+        "agc_stamp", "agc_chambers_bm",
+        "page_marker_bm",
+        "agc_url", "url",
+        "reprint_marker_bm",
+        "loose_page_number",
+    ),
+}
+
+DEFAULT_PROFILE = "default"
+
+# Characters that make the preceding character optional or repeated
+QUANTIFIERS = "*+?{"
+
+
+@dataclass(frozen=True)
+class RuleProfile:
+    """The rules applied to one gazette format."""
+    name: str
+    rules: Tuple[CleaningRule, ...]
+
+
+def get_profile(name: str) -> RuleProfile:
+    """
+    Return a built-in profile.
+    
+    Raises:
+        ValueError: If there is no such profile.
+    """
+    if name not in PROFILES:
+        raise ValueError(
+            f"Unknown cleaning profile: {name!r} (built-in: {', '.join(PROFILES)})"
+        )
+    return RuleProfile(name, tuple(RULES[rule_name] for rule_name in PROFILES[name]))
+
+
+def load_profile(path: Path) -> RuleProfile:
+    """
+    Load a profile from a JSON file (see the module docstring).
+    
+    Args:
+        path: Path to the profile file.
+    
+    Returns:
+        The profile; its name defaults to the file name without suffix.
+    
+    Raises:
+        ValueError: If the file extends an unknown profile, disables a rule
+            the base profile does not have, or defines an invalid pattern.
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    
+    base = resolve_profile(spec["extends"]).rules if spec.get("extends") else ()
+    disabled = set(spec.get("disable", []))
+    unknown = disabled - {rule.name for rule in base}
+    if unknown:
+        raise ValueError(f"{path}: cannot disable unknown rules {sorted(unknown)}")
+    
+    rules = [rule for rule in base if rule.name not in disabled]
+    for rule_spec in spec.get("rules", []):
+        try:
+            re.compile(rule_spec["pattern"], RULE_FLAGS)
+        except re.error as e:
+            raise ValueError(f"{path}: invalid pattern for rule {rule_spec['name']!r}: {e}")
+        rules.append(CleaningRule(rule_spec["name"], rule_spec["pattern"]))
+    
+    return RuleProfile(spec.get("name", path.stem), tuple(rules))
+
+
+def resolve_profile(profile: str) -> RuleProfile:
+    """Return the built-in profile of that name, or load the profile file at that path."""
+    if profile in PROFILES:
+        return get_profile(profile)
+    if profile.endswith(".json") or Path(profile).is_file():
+        return load_profile(Path(profile))
+    return get_profile(profile)
+
+
+def profile_for_language(language: Optional[str]) -> str:
+    """Return the built-in profile for an Act's language ("EN"/"BM"), else the default."""
+    name = (language or "").lower()
+    return name if name in PROFILES else DEFAULT_PROFILE
+
+
+def leading_literal(pattern: str) -> Optional[str]:
+    """
+    Return the character every match of a rule pattern starts with.
+    
+    Only a plain letter or digit that is not quantified counts, and patterns
+    with alternatives are never taken apart; otherwise returns None.
+    """
+    if not pattern[:1].isalnum() or "|" in pattern:
+        return None
+    if len(pattern) > 1 and pattern[1] in QUANTIFIERS:
+        return None
+    return pattern[0]
+
+
+class CleaningEngine:
+    """
+    The rules of one profile compiled for single-scan matching.
+    
+    Safe to share between threads; hit counts accumulate until
+    reset_stats().
+    """
+    
+    def __init__(self, profile: RuleProfile):
+        """
+        Compile a profile.
+        
+        Args:
+            profile: The rules to apply, in the order they are tried.
+        """
+        self.profile = profile
+        self._rule_names = [rule.name for rule in profile.rules]
+        
+        # Each rule is matched by groups named r<i>..., mapped back to rule
+        # i, so rule patterns must not name groups of their own
+        self._group_rules: Dict[str, int] = {}
+        literal_branches: List[str] = []
+        other_branches: List[str] = []
+        for i, rule in enumerate(profile.rules):
+            first = leading_literal(rule.pattern)
+            if first is None:
+                self._group_rules[f"r{i}"] = i
+                other_branches.append(f"(?P<r{i}>{rule.pattern})")
+                continue
+            for k, variant in enumerate(sorted({first.lower(), first.upper()})):
+                self._group_rules[f"r{i}_{k}"] = i
+                literal_branches.append(
+                    f"{re.escape(variant)}(?P<r{i}_{k}>(?i:{rule.pattern[1:]}))"
+                )
+        
+        # Line-anchored rules, re-applied to the lines removals touched
+        anchored = [
+            f"(?P<r{i}>{rule.pattern})"
+            for i, rule in enumerate(profile.rules)
+            if rule.pattern.startswith("^")
+        ]
+        self._anchored: Optional[re.Pattern] = (
+            re.compile("|".join(anchored), RULE_FLAGS) if anchored else None
+        )
+        
+        self.patterns: List[re.Pattern] = []
+        if literal_branches:
+            # Not compiled case-insensitively, so the leading literals stay
+            # usable as a search prefix
+            self.patterns.append(
+                re.compile("|".join(literal_branches), RULE_FLAGS & ~re.IGNORECASE)
+            )
+        if other_branches:
+            self.patterns.append(re.compile("|".join(other_branches), RULE_FLAGS))
+        self._hits: Counter = Counter()
+        self._lock = threading.Lock()
+    
+    def find(self, text: str) -> List[re.Match]:
+        """Return every match remove() would drop, without counting them."""
+        if len(self.patterns) < 2:
+            return [match for pattern in self.patterns for match in pattern.finditer(text)]
+        
+        # Leftmost match first, the earlier rule on ties; skip overlaps
+        matches: List[re.Match] = []
+        end = 0
+        for match in heapq.merge(
+            *(pattern.finditer(text) for pattern in self.patterns),
+            key=lambda match: (match.start(), self._group_rules[match.lastgroup])
+        ):
+            if match.start() >= end:
+                matches.append(match)
+                end = match.end()
+        return matches
+    
+    def remove(
+        self,
+        text: str,
+        matches: Optional[List[re.Match]] = None,
+        end: Optional[int] = None
+    ) -> str:
+        """
+        Remove rule matches from text in one pass, counting hits per rule.
+        
+        Args:
+            text: The text to clean.
+            matches: Matches from find(text) to remove instead of scanning
+                again (e.g. when the caller needed them to pick end).
+            end: Only clean and return text[:end]; matches must not
+                straddle it.
+        
+        Returns:
+            The text with the matches removed.
+        """
+        if matches is None:
+            matches = self.find(text if end is None else text[:end])
+        end = len(text) if end is None else end
+        
+        pieces: List[str] = []
+        position = 0
+        length = 0
+        removed_at: List[int] = []  # offsets in the result
+        fired = Counter()
+        for match in matches:
+            if match.end() > end:
+                break
+            pieces.append(text[position:match.start()])
+            length += match.start() - position
+            removed_at.append(length)
+            position = match.end()
+            fired[self._group_rules[match.lastgroup]] += 1
+        pieces.append(text[position:end])
+        cleaned = "".join(pieces)
+        
+        if removed_at and self._anchored is not None:
+            cleaned = self._reclean_lines(cleaned, removed_at, fired)
+        if fired:
+            with self._lock:
+                self._hits.update(fired)
+        return cleaned
+    
+    def _reclean_lines(self, text: str, removed_at: List[int], fired: Counter) -> str:
+        """Apply the line-anchored rules to the lines containing removal offsets."""
+        pieces: List[str] = []
+        position = 0
+        for offset in removed_at:
+            start = text.rfind("\n", 0, offset) + 1
+            if start < position:
+                continue  # line already cleaned
+            stop = text.find("\n", offset)
+            stop = len(text) if stop < 0 else stop
+            line = text[start:stop]
+            line_position = 0
+            for match in self._anchored.finditer(line):
+                pieces.append(text[position:start + match.start()])
+                position = start + match.end()
+                line_position = match.end()
+                fired[self._group_rules[match.lastgroup]] += 1
+            if line_position:
+                pieces.append(line[line_position:])
+                position = stop
+        pieces.append(text[position:])
+        return "".join(pieces)
+    
+    def stats(self) -> Dict[str, int]:
+        """Hits per rule, in profile order, including rules that never fired."""
+        with self._lock:
+            return {
+                name: self._hits[i] for i, name in enumerate(self._rule_names)
+            }
+    
+    def reset_stats(self) -> None:
+        """Zero the hit counts."""
+        with self._lock:
+            self._hits.clear()
+
+
+# Engines compiled so far, by profile name or path
+_engines: Dict[str, CleaningEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(profile: str = DEFAULT_PROFILE) -> CleaningEngine:
+    """
+    Return the shared engine for a built-in profile name or profile file path.
+    
+    Each profile is compiled once per process.
+    """
+    engine = _engines.get(profile)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(profile)
+            if engine is None:
+                engine = CleaningEngine(resolve_profile(profile))
+                _engines[profile] = engine
+    return engine
+
+
+def rule_stats(profiles: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Hits per rule of the shared engines.
+    
+    Args:
+        profiles: Profiles to report (default: every engine compiled so far).
+    
+    Returns:
+        {profile: {rule name: hits}}.
+    """
+    names = list(_engines) if profiles is None else list(profiles)
+    return {name: get_engine(name).stats() for name in names}
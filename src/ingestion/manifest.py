@@ -0,0 +1,154 @@
+"""
+Ingestion Manifest for Incremental Runs
+
+This module records what each ingestion stage last produced, so a re-run
+only redoes the inputs that changed:
+
+- extract: raw PDF -> processed JSON (text_extractor.process_all_pdfs)
+- chunk: processed JSON -> chunks JSON (chunker.process_all_documents)
+- embed: chunk -> ChromaDB record (vector_ingest.run_ingestion)
+
+Each stage keeps the SHA-256 of every input, and of the output it wrote,
+together with the stage's pipeline version and a hash of the settings that
+shape its output (cleaning rules, chunk size, embedding model). An input is
+skipped only if its hash is unchanged and its output is still there and
+unmodified. Bumping a stage's version or changing its settings discards
+that stage's entries, so everything is redone.
+
+The manifest is one JSON file, MANIFEST_FILE, in the processed data
+directory. It is written atomically at the end of each stage; a run that
+dies part-way simply redoes the unrecorded work next time.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+# Bump when the manifest layout changes (older manifests are then ignored)
+MANIFEST_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "ingestion_manifest.json"
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(value: Any) -> str:
+    """Return the SHA-256 hex digest of a JSON-serializable value."""
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class StageManifest:
+    """
+    The manifest section of one stage: an entry per input, keyed by name.
+    
+    Entries are plain dicts (typically input and output hashes); extra
+    stage-wide state lives in state.
+    """
+    
+    def __init__(self, data: Dict[str, Any]):
+        self.entries: Dict[str, Dict[str, Any]] = data.setdefault("entries", {})
+        self.state: Dict[str, Any] = data.setdefault("state", {})
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the entry recorded for an input, if any."""
+        return self.entries.get(key)
+    
+    def record(self, key: str, **fields: Any) -> None:
+        """Record (replace) the entry of an input."""
+        self.entries[key] = fields
+    
+    def forget(self, key: str) -> None:
+        """Drop the entry of an input, so it is redone next run."""
+        self.entries.pop(key, None)
+    
+    def retain(self, keys: Iterable[str]) -> None:
+        """Drop the entries of inputs that no longer exist."""
+        keep = set(keys)
+        for key in [key for key in self.entries if key not in keep]:
+            del self.entries[key]
+    
+    def clear(self) -> None:
+        """Drop every entry and the stage state."""
+        self.entries.clear()
+        self.state.clear()
+    
+    def is_current(self, key: str, input_hash: str, output_path: Optional[Path] = None) -> bool:
+        """
+        Return True if an input is unchanged since its entry was recorded.
+        
+        With output_path, the output must also still exist with the hash
+        recorded under "output".
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry.get("input") != input_hash:
+            return False
+        if output_path is None:
+            return True
+        return output_path.exists() and file_sha256(output_path) == entry.get("output")
+
+
+class IngestionManifest:
+    """The manifest file with one StageManifest per stage."""
+    
+    def __init__(self, path: Path, data: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: Where the manifest is saved.
+            data: Parsed manifest contents (None for an empty manifest).
+        """
+        self.path = Path(path)
+        self.data = data or {"format_version": MANIFEST_FORMAT_VERSION, "stages": {}}
+    
+    @classmethod
+    def load(cls, path: Path) -> "IngestionManifest":
+        """
+        Load a manifest, starting empty if it is missing, unreadable or was
+        written with a different format version.
+        """
+        path = Path(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("format_version") != MANIFEST_FORMAT_VERSION:
+            return cls(path)
+        return cls(path, data)
+    
+    def stage(self, name: str, version: int, settings: Dict[str, Any]) -> StageManifest:
+        """
+        Return a stage's section, reset if its version or settings changed.
+        
+        Args:
+            name: Stage name ("extract", "chunk", "embed").
+            version: The stage's pipeline version.
+            settings: Settings that shape the stage's output.
+        """
+        settings_hash = content_hash(settings)
+        data = self.data["stages"].get(name)
+        if (
+            data is None
+            or data.get("version") != version
+            or data.get("settings") != settings_hash
+        ):
+            data = {"version": version, "settings": settings_hash}
+            self.data["stages"][name] = data
+        return StageManifest(data)
+    
+    def save(self) -> None:
+        """Write the manifest via a temporary file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -9,16 +9,60 @@ Key cleaning operations:
 - Remove "AGC Malaysia" stamps and watermarks
 - Clean whitespace and normalize unicode
 - Preserve section structure for semantic chunking
+
+The noise removal rules live in cleaning_rules, grouped into profiles per
+gazette format (by default chosen from the language in the filename); all
+rules of a profile are applied in a single pass.
+
+PDFs are independent, and pypdf extraction is pure Python and CPU-bound,
+so `--workers N` spreads them across a process pool. Large PDFs are split
+into page ranges extracted by different workers and reassembled in page
+order, so one long act no longer gates the whole run. Each output file
+depends only on its PDF, so the outputs are the same whatever order the
+workers finish in.
+
+Each output records the character offset at which every page starts in
+raw_text (page_offsets), so later stages can cite page numbers.
+
+Runs are incremental: the ingestion manifest (see manifest.py) records the
+hash of every PDF and of the JSON written for it, and unchanged PDFs whose
+output is intact are skipped.
+
+Extraction, cleaning and writing stream page by page: pages are cleaned in
+windows that carry a few raw lines across each page join (so noise split
+over two pages is still removed), and the escaped raw and cleaned text are
+spooled to temporary files that are copied into the output JSON. Neither
+text is ever held whole in memory, so peak memory stays flat however long
+the gazette or reprint, and the output is the same as cleaning the joined
+text in one go.
 """
 
+import argparse
 import json
 import logging
+import os
 import re
+import shutil
+import tempfile
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from pypdf import PdfReader
 
+from ingestion.cleaning_rules import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    get_engine,
+    profile_for_language,
+    resolve_profile,
+    rule_stats
+)
+from ingestion.manifest import MANIFEST_FILE, IngestionManifest, file_sha256
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -26,6 +70,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bump when a change alters the processed JSON, so the next run redoes
+# every PDF instead of skipping unchanged ones
+EXTRACTION_VERSION = 1
+
+# Pages per extraction task when a PDF is split across workers; PDFs with
+# fewer pages are extracted by a single worker
+PAGES_PER_RANGE = 16
+
+# Page ranges queued or held per pool worker; bounds the extracted text
+# waiting to be cleaned and written
+RANGES_IN_FLIGHT_PER_WORKER = 2
+
 
 def get_project_root() -> Path:
     """Get the project root directory."""
@@ -44,36 +100,119 @@ def get_processed_data_dir() -> Path:
     return processed_dir
 
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
+def page_ranges(n_pages: int, pages_per_range: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Split pages 0..n_pages into consecutive [start, end) ranges (default: PAGES_PER_RANGE)."""
+    pages_per_range = pages_per_range or PAGES_PER_RANGE
+    return [
+        (start, min(start + pages_per_range, n_pages))
+        for start in range(0, n_pages, pages_per_range)
+    ]
+
+
+def extract_page_range(pdf_path: Path, start: int, end: int) -> List[str]:
     """
-    Extract text from a PDF file using pypdf.
+    Extract the text of pages [start, end) of a PDF (runs in pool workers).
+    
+    Returns:
+        One string per page, in page order.
+    """
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _extract_page_range_timed(pdf_path: Path, start: int, end: int) -> Tuple[List[str], float]:
+    """Extract a page range and time it (runs in pool workers)."""
+    started = time.perf_counter()
+    pages = extract_page_range(pdf_path, start, end)
+    return pages, time.perf_counter() - started
+
+
+def join_pages(pages: Sequence[str]) -> Tuple[str, List[int]]:
+    """
+    Join page texts into one text.
+    
+    Returns:
+        (text, page_offsets), where page_offsets[i] is the character offset
+        at which page i + 1 starts.
+    """
+    offsets = []
+    position = 0
+    for page in pages:
+        offsets.append(position)
+        position += len(page) + 1  # the joining newline
+    return "\n".join(pages), offsets
+
+
+def page_number(page_offsets: Sequence[int], char_offset: int) -> int:
+    """Return the 1-based page on which a character offset of raw_text lies."""
+    return max(1, bisect_right(page_offsets, char_offset))
+
+
+def iter_pdf_pages(pdf_path: Path) -> Iterator[str]:
+    """Yield the text of each page of a PDF, extracting one page at a time."""
+    reader = PdfReader(pdf_path)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def extract_pages_from_pdf(pdf_path: Path, workers: int = 1) -> List[str]:
+    """
+    Extract the text of every page of a PDF using pypdf.
     
     Args:
         pdf_path: Path to the PDF file.
+        workers: With more than one, the pages are split into ranges of
+            PAGES_PER_RANGE extracted by a process pool.
     
     Returns:
-        Extracted text as a string.
+        One string per page, in page order (empty on error).
     """
     logger.info(f"Extracting text from: {pdf_path.name}")
     
     try:
-        reader = PdfReader(pdf_path)
-        text_parts = []
-        
-        for page_num, page in enumerate(reader.pages, start=1):
-            page_text = page.extract_text() or ""
-            text_parts.append(page_text)
+        n_pages = len(PdfReader(pdf_path).pages)
+        ranges = page_ranges(n_pages)
+        if workers > 1 and len(ranges) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+                futures = [
+                    pool.submit(extract_page_range, pdf_path, start, end)
+                    for start, end in ranges
+                ]
+                pages = [page for future in futures for page in future.result()]
+        else:
+            pages = extract_page_range(pdf_path, 0, n_pages)
         
-        full_text = "\n".join(text_parts)
-        logger.info(f"Extracted {len(full_text)} characters from {len(reader.pages)} pages")
-        return full_text
+        logger.info(f"Extracted {sum(map(len, pages))} characters from {n_pages} pages")
+        return pages
     
     except Exception as e:
         logger.error(f"Error extracting text from {pdf_path}: {e}")
-        return ""
+        return []
+
+
+def extract_text_from_pdf(pdf_path: Path, workers: int = 1) -> str:
+    """
+    Extract text from a PDF file using pypdf.
+    
+    Args:
+        pdf_path: Path to the PDF file.
+        workers: Worker processes for page-parallel extraction.
+    
+    Returns:
+        Extracted text as a string (pages joined by newlines).
+    """
+    return join_pages(extract_pages_from_pdf(pdf_path, workers))[0]
+
 
+# Raw lines held back from each streaming cleaning window, so that noise
+# spanning a page join is matched together with the next page
+CARRY_LINES = 3
 
-def clean_legal_text(text: str) -> str:
+# Runs of spaces/tabs to collapse into one space (a lone space is left as is)
+SPACE_RUN_PATTERN = re.compile(r"[ \t]{2,}|\t")
+
+
+def clean_legal_text(text: str, profile: str = DEFAULT_PROFILE) -> str:
     """
     Clean extracted legal text by removing noise.
     
@@ -86,6 +225,8 @@ def clean_legal_text(text: str) -> str:
     
     Args:
         text: Raw extracted text.
+        profile: Cleaning rule profile: a built-in profile name or the path
+            of a profile file (see ingestion.cleaning_rules).
     
     Returns:
         Cleaned text.
@@ -93,38 +234,13 @@ def clean_legal_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remove common AGC header patterns
-    patterns_to_remove = [
-        # AGC headers/stamps
-        r"AGC\s*Malaysia",
-        r"Attorney\s*General['']?s?\s*Chambers",
-        r"Jabatan\s*Peguam\s*Negara",
-        
-        # Page markers
-        r"Page\s*\d+\s*of\s*\d+",
-        r"Mukasurat\s*\d+\s*daripada\s*\d+",
-        
-        # Common footer patterns
-        r"www\.agc\.gov\.my",
-        r"http[s]?://\S+",
-        
-        # Reprint markers (but keep the year info)
-        r"Incorporating\s*all\s*amendments\s*up\s*to\s*\d+\s*\w+\s*\d{4}",
-        
-        # Loose page numbers at line start/end
-        r"^\s*\d{1,3}\s*$",
-    ]
-    
-    cleaned = text
-    
-    for pattern in patterns_to_remove:
-        cleaned = re.sub(pattern, "", cleaned, flags=re.IGNORECASE | re.MULTILINE)
-    
-    # Normalize multiple newlines (keep max 2)
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
-    
+    return _normalize_whitespace(get_engine(profile).remove(text)).strip()
+
+
+def _normalize_whitespace(text: str) -> str:
+    """Collapse space runs and drop blank lines (no final strip)."""
     # Normalize multiple spaces
-    cleaned = re.sub(r"[ \t]+", " ", cleaned)
+    cleaned = SPACE_RUN_PATTERN.sub(" ", text)
     
     # Clean up lines that are just whitespace
     cleaned = "\n".join(
@@ -132,7 +248,57 @@ def clean_legal_text(text: str) -> str:
         if line.strip()
     )
     
-    return cleaned.strip()
+    return cleaned
+
+
+def _window_cut(window: str, matches: List[re.Match]) -> int:
+    """
+    Return where a cleaning window can be split.
+    
+    The cut is the latest line start at least CARRY_LINES lines before the
+    end of the window that none of the window's rule matches straddles, or
+    0 if there is none (the whole window is carried over).
+    """
+    line_starts = [0] + [match.end() for match in re.finditer("\n", window)]
+    candidates = line_starts[1:len(line_starts) - CARRY_LINES + 1]
+    for cut in reversed(candidates):
+        if not any(match.start() < cut < match.end() for match in matches):
+            return cut
+    return 0
+
+
+def iter_clean_text(pages: Iterable[str], profile: str = DEFAULT_PROFILE) -> Iterator[str]:
+    """
+    Clean page texts as a stream, holding about one page at a time.
+    
+    Each window is the current page plus the raw lines carried over from
+    the previous one. It is cleaned up to a cut that no noise pattern
+    straddles, and the rest is carried into the next window. Joining the
+    yielded fragments with newlines and stripping the result gives
+    clean_legal_text() of the pages joined with newlines.
+    
+    Args:
+        pages: Raw page texts, in page order.
+        profile: Cleaning rule profile name or file path.
+    
+    Yields:
+        Non-empty cleaned fragments (whole lines, no blank lines).
+    """
+    engine = get_engine(profile)
+    carry: Optional[str] = None
+    for page in pages:
+        window = page if carry is None else carry + "\n" + page
+        # One scan of the window both places the cut and cleans the head
+        matches = engine.find(window)
+        cut = _window_cut(window, matches)
+        carry = window[cut:]
+        fragment = _normalize_whitespace(engine.remove(window, matches, cut))
+        if fragment:
+            yield fragment
+    if carry is not None:
+        fragment = _normalize_whitespace(engine.remove(carry))
+        if fragment:
+            yield fragment
 
 
 def extract_act_metadata(text: str, filename: str) -> dict:
@@ -174,86 +340,439 @@ def extract_act_metadata(text: str, filename: str) -> dict:
     return metadata
 
 
-def process_pdf(pdf_path: Path) -> Optional[dict]:
+class _JsonStringSpool:
+    """A JSON string value written piece by piece to a temporary file."""
+    
+    def __init__(self, directory: Path):
+        self.file = tempfile.TemporaryFile("w+", encoding="utf-8", dir=directory)
+        # Length of the unescaped text written so far
+        self.length = 0
+    
+    def write(self, text: str) -> None:
+        """Append text, escaped as json.dumps would escape it."""
+        self.file.write(json.dumps(text, ensure_ascii=False)[1:-1])
+        self.length += len(text)
+    
+    def copy_to(self, out: IO[str]) -> None:
+        """Write the spooled value to out as a quoted JSON string."""
+        self.file.seek(0)
+        out.write('"')
+        shutil.copyfileobj(self.file, out)
+        out.write('"')
+    
+    def close(self) -> None:
+        self.file.close()
+
+
+def _write_document(
+    output_path: Path,
+    document: dict,
+    spools: Dict[str, _JsonStringSpool]
+) -> None:
     """
-    Process a single PDF file: extract, clean, and save.
+    Write a processed document whose text fields are spooled.
+    
+    The output is the same as json.dump(document, ensure_ascii=False,
+    indent=2) with the spooled values in place, written via a temporary file
+    so a worker that dies mid-write never leaves a truncated output behind.
+    """
+    # Placeholders that cannot occur in the other (filename-derived) values
+    markers = {key: f"\0{key}\0" for key in spools}
+    remaining = json.dumps(
+        {key: markers.get(key, value) for key, value in document.items()},
+        ensure_ascii=False,
+        indent=2
+    )
+    
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp-{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for key, spool in spools.items():
+            before, remaining = remaining.split(json.dumps(markers[key]), 1)
+            f.write(before)
+            spool.copy_to(f)
+        f.write(remaining)
+    os.replace(tmp_path, output_path)
+
+
+def process_pdf(
+    pdf_path: Path,
+    output_dir: Optional[Path] = None,
+    pages: Optional[Iterable[str]] = None,
+    profile: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Process a single PDF file: extract, clean, and save, page by page.
     
     Args:
         pdf_path: Path to the PDF file.
+        output_dir: Where to save the JSON (default: the processed data dir).
+        pages: Page texts in page order if extracted elsewhere (e.g. by
+            page-range workers); may be a generator.
+        profile: Cleaning rule profile name or file path (default: the
+            profile for the language in the filename).
     
     Returns:
-        Dictionary with processed data, or None on error.
+        The saved document without its raw_text and cleaned_text (which are
+        only streamed to the file), or None on error.
     """
-    # Extract text
-    raw_text = extract_text_from_pdf(pdf_path)
-    if not raw_text:
-        logger.error(f"No text extracted from {pdf_path.name}")
-        return None
-    
-    # Clean text
-    cleaned_text = clean_legal_text(raw_text)
-    
-    # Extract metadata
-    metadata = extract_act_metadata(cleaned_text, pdf_path.name)
+    output_dir = output_dir or get_processed_data_dir()
+    output_name = pdf_path.stem + ".json"
+    if pages is None:
+        logger.info(f"Extracting text from: {pdf_path.name}")
+        pages = iter_pdf_pages(pdf_path)
+    
+    metadata = extract_act_metadata("", pdf_path.name)
+    profile = profile or profile_for_language(metadata["language"])
+    page_offsets: List[int] = []
+    raw_text = _JsonStringSpool(output_dir)
+    cleaned_text = _JsonStringSpool(output_dir)
+    
+    def spool_raw_pages() -> Iterator[str]:
+        for page in pages:
+            if page_offsets:
+                raw_text.write("\n")
+            page_offsets.append(raw_text.length)
+            raw_text.write(page)
+            yield page
     
-    # Create processed document
-    document = {
-        "metadata": metadata,
-        "raw_text": raw_text,
-        "cleaned_text": cleaned_text,
-        "char_count_raw": len(raw_text),
-        "char_count_cleaned": len(cleaned_text),
-    }
+    try:
+        # Clean text; fragments are joined by newlines and the whole text is
+        # stripped, so the last fragment is held back until the next arrives
+        previous: Optional[str] = None
+        for fragment in iter_clean_text(spool_raw_pages(), profile):
+            if previous is None:
+                fragment = fragment.lstrip()
+            else:
+                cleaned_text.write(previous + "\n")
+            
+            # Act number from the text if the filename has none (a match
+            # may start at the end of the previous fragment)
+            if metadata["act_number"] is None:
+                tail = previous[-16:] + "\n" if previous is not None else ""
+                metadata["act_number"] = extract_act_metadata(
+                    tail + fragment, pdf_path.name
+                )["act_number"]
+            previous = fragment
+        if previous is not None:
+            cleaned_text.write(previous.rstrip())
+        
+        if not raw_text.length:
+            logger.error(f"No text extracted from {pdf_path.name}")
+            return None
+        
+        # Create processed document
+        document = {
+            "metadata": metadata,
+            "raw_text": None,
+            "cleaned_text": None,
+            "char_count_raw": raw_text.length,
+            "char_count_cleaned": cleaned_text.length,
+            "page_count": len(page_offsets),
+            "page_offsets": page_offsets,
+        }
+        
+        # Save to processed directory
+        _write_document(
+            output_dir / output_name,
+            document,
+            {"raw_text": raw_text, "cleaned_text": cleaned_text}
+        )
     
-    # Save to processed directory
-    output_dir = get_processed_data_dir()
-    output_name = pdf_path.stem + ".json"
-    output_path = output_dir / output_name
+    except Exception as e:
+        logger.error(f"Error processing {pdf_path}: {e}")
+        return None
     
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(document, f, ensure_ascii=False, indent=2)
+    finally:
+        raw_text.close()
+        cleaned_text.close()
     
     logger.info(
         f"Processed: {pdf_path.name} -> {output_name} "
         f"({document['char_count_cleaned']} chars)"
     )
     
+    del document["raw_text"], document["cleaned_text"]
     return document
 
 
-def process_all_pdfs() -> dict:
+def _process_pdf_timed(
+    pdf_path: Path,
+    output_dir: Optional[Path] = None,
+    profile: Optional[str] = None
+) -> Tuple[bool, float, Optional[str]]:
+    """
+    Process one PDF and time it.
+    
+    Returns:
+        (success, seconds, error message or None).
+    """
+    start = time.perf_counter()
+    try:
+        success = process_pdf(pdf_path, output_dir, profile=profile) is not None
+        error = None if success else "no text extracted"
+    except Exception as e:
+        success, error = False, f"{type(e).__name__}: {e}"
+    return success, time.perf_counter() - start, error
+
+
+class _RangeQueue:
+    """
+    Page-range extraction tasks fed to a process pool a few at a time.
+    
+    Tasks are submitted in order, keeping at most max_in_flight queued or
+    finished but unconsumed, and consumed in the same order, PDF by PDF.
+    """
+    
+    def __init__(
+        self,
+        pool: ProcessPoolExecutor,
+        tasks: List[Tuple[int, Path, int, int]],
+        max_in_flight: int
+    ):
+        """
+        Args:
+            pool: The pool to run _extract_page_range_timed on.
+            tasks: (job, pdf_path, start, end) per range, in job order.
+            max_in_flight: Most ranges submitted but not yet consumed.
+        """
+        self._pool = pool
+        self._tasks = iter(tasks)
+        self._max_in_flight = max_in_flight
+        self._in_flight: Deque[Tuple[int, Future]] = deque()
+        self._fill()
+    
+    def _fill(self) -> None:
+        while len(self._in_flight) < self._max_in_flight:
+            task = next(self._tasks, None)
+            if task is None:
+                return
+            job, pdf_path, start, end = task
+            future = self._pool.submit(_extract_page_range_timed, pdf_path, start, end)
+            self._in_flight.append((job, future))
+    
+    def pages(self, job: int, range_seconds: List[float]) -> Iterator[str]:
+        """
+        Yield the pages of one job in page order.
+        
+        Ranges left over by earlier jobs (that stopped consuming on an
+        error) are discarded. Each range's extraction time is appended to
+        range_seconds.
+        """
+        while self._in_flight and self._in_flight[0][0] <= job:
+            owner, future = self._in_flight.popleft()
+            self._fill()
+            if owner < job:
+                future.cancel()
+                continue
+            range_pages, seconds = future.result()
+            range_seconds.append(seconds)
+            yield from range_pages
+
+
+def _process_pdfs_in_pool(
+    pdf_files: List[Path],
+    output_dir: Path,
+    workers: int,
+    profile: Optional[str] = None
+) -> List[Tuple[bool, float, Optional[str]]]:
+    """
+    Extract PDFs page range by page range on one shared process pool.
+    
+    Ranges are queued in file and page order, a couple per worker at a time,
+    so workers stay busy across file boundaries and a long act is spread over
+    all of them while the extracted text waiting here stays bounded. Each
+    PDF's pages are streamed, in page order, into cleaning and saving here,
+    in file order.
+    
+    Returns:
+        (success, seconds, error message or None) per PDF, where seconds is
+        the extraction time summed over its ranges plus cleaning and saving.
+    """
+    errors: List[Optional[str]] = []
+    tasks: List[Tuple[int, Path, int, int]] = []
+    for job, pdf_path in enumerate(pdf_files):
+        try:
+            ranges = page_ranges(len(PdfReader(pdf_path).pages))
+        except Exception as e:
+            logger.error(f"Error extracting text from {pdf_path}: {e}")
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        errors.append(None)
+        tasks.extend((job, pdf_path, start, end) for start, end in ranges)
+    
+    outcomes: List[Tuple[bool, float, Optional[str]]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = _RangeQueue(pool, tasks, workers * RANGES_IN_FLIGHT_PER_WORKER)
+        for job, (pdf_path, error) in enumerate(zip(pdf_files, errors)):
+            if error is not None:
+                outcomes.append((False, 0.0, error))
+                continue
+            started = time.perf_counter()
+            range_seconds: List[float] = []
+            pages = queue.pages(job, range_seconds)
+            success = process_pdf(pdf_path, output_dir, pages, profile) is not None
+            error = None if success else "no text extracted"
+            outcomes.append((
+                success,
+                sum(range_seconds) + time.perf_counter() - started,
+                error
+            ))
+    return outcomes
+
+
+def _extraction_settings(profile: Optional[str]) -> Dict[str, Any]:
+    """Settings that shape the processed JSON: the cleaning rules applied."""
+    profiles = [profile] if profile else list(PROFILES)
+    return {
+        "profile": profile,
+        "rules": {
+            name: [[rule.name, rule.pattern] for rule in resolve_profile(name).rules]
+            for name in profiles
+        },
+    }
+
+
+def process_all_pdfs(
+    workers: int = 1,
+    raw_dir: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+    profile: Optional[str] = None,
+    incremental: bool = True
+) -> Dict[str, bool]:
     """
     Process all PDF files in the raw data directory.
     
+    Args:
+        workers: Number of worker processes (1 = process in this process,
+            0 = one per CPU). Files and page ranges of large files share
+            the pool.
+        raw_dir: Directory of PDFs (default: the raw data dir).
+        output_dir: Where to save the JSON files (default: the processed
+            data dir).
+        profile: Cleaning rule profile name or file path for every PDF
+            (default: chosen per PDF by the language in its filename).
+        incremental: Skip PDFs that are unchanged since the last run and
+            whose output is intact (False = process every PDF).
+    
     Returns:
-        Dictionary mapping filenames to processing status.
+        Dictionary mapping filenames to processing status (skipped PDFs
+        count as successes), in filename order.
     """
-    raw_dir = get_raw_data_dir()
-    pdf_files = list(raw_dir.glob("*.pdf"))
+    raw_dir = raw_dir or get_raw_data_dir()
+    output_dir = output_dir or get_processed_data_dir()
+    pdf_files = sorted(raw_dir.glob("*.pdf"))
+    workers = workers or os.cpu_count() or 1
     
     logger.info("=" * 60)
     logger.info("Starting PDF Text Extraction and Cleaning")
     logger.info(f"Source directory: {raw_dir}")
-    logger.info(f"Output directory: {get_processed_data_dir()}")
-    logger.info(f"PDFs to process: {len(pdf_files)}")
+    logger.info(f"Output directory: {output_dir}")
+    logger.info(f"PDFs to process: {len(pdf_files)} (workers: {workers})")
     logger.info("=" * 60)
     
-    results = {}
+    hits_before = rule_stats()
+    start = time.perf_counter()
+    
+    # Skip PDFs whose hash and output match the manifest
+    manifest = IngestionManifest.load(output_dir / MANIFEST_FILE)
+    stage = manifest.stage("extract", EXTRACTION_VERSION, _extraction_settings(profile))
+    if not incremental:
+        stage.clear()
+    input_hashes = {pdf_path.name: file_sha256(pdf_path) for pdf_path in pdf_files}
+    pending = [
+        pdf_path for pdf_path in pdf_files
+        if not stage.is_current(
+            pdf_path.name,
+            input_hashes[pdf_path.name],
+            output_dir / (pdf_path.stem + ".json")
+        )
+    ]
+    skipped = len(pdf_files) - len(pending)
+    if skipped:
+        logger.info(f"Skipping {skipped} unchanged PDFs")
+    
+    pending_outcomes: List[Tuple[bool, float, Optional[str]]]
+    if workers > 1 and pending:
+        pending_outcomes = _process_pdfs_in_pool(pending, output_dir, workers, profile)
+    else:
+        pending_outcomes = [
+            _process_pdf_timed(pdf_path, output_dir, profile) for pdf_path in pending
+        ]
+    processed = dict(zip(pending, pending_outcomes))
+    
+    # Record what was written (failed PDFs are retried next run)
+    for pdf_path, (success, _, _) in processed.items():
+        if success:
+            stage.record(
+                pdf_path.name,
+                input=input_hashes[pdf_path.name],
+                output=file_sha256(output_dir / (pdf_path.stem + ".json"))
+            )
+        else:
+            stage.forget(pdf_path.name)
+    stage.retain(input_hashes)
+    manifest.save()
+    
+    outcomes: List[Tuple[bool, float, Optional[str]]] = [
+        processed.get(pdf_path, (True, 0.0, None)) for pdf_path in pdf_files
+    ]
+    elapsed = time.perf_counter() - start
     
-    for pdf_path in pdf_files:
-        doc = process_pdf(pdf_path)
-        results[pdf_path.name] = doc is not None
+    results = {}
     
     # Summary
     logger.info("\n" + "=" * 60)
     logger.info("Processing Summary:")
-    for filename, success in results.items():
-        status = "✓ Success" if success else "✗ Failed"
-        logger.info(f"  {filename}: {status}")
+    for pdf_path, (success, seconds, error) in zip(pdf_files, outcomes):
+        results[pdf_path.name] = success
+        if pdf_path not in processed:
+            logger.info(f"  {pdf_path.name}: ✓ Unchanged (skipped)")
+            continue
+        status = "✓ Success" if success else f"✗ Failed ({error})"
+        logger.info(f"  {pdf_path.name}: {status} in {seconds:.2f}s")
+    failed = sum(not success for success in results.values())
+    logger.info(
+        f"Processed {len(results) - failed}/{len(results)} PDFs in {elapsed:.2f}s "
+        f"({sum(seconds for _, seconds, _ in outcomes):.2f}s of extraction, "
+        f"{skipped} unchanged)"
+    )
+    
+    # Cleaning rule hits of this run, per profile used
+    for profile_name, hits in rule_stats().items():
+        before = hits_before.get(profile_name, {})
+        run_hits = {rule: count - before.get(rule, 0) for rule, count in hits.items()}
+        if profile_name in hits_before and not any(run_hits.values()):
+            continue
+        logger.info(
+            f"Cleaning rule hits ({profile_name}): "
+            + ", ".join(f"{rule}={count}" for rule, count in run_hits.items())
+        )
+        unused = [rule for rule, count in run_hits.items() if not count]
+        if unused:
+            logger.info(f"  Rules that never fired: {', '.join(unused)}")
     logger.info("=" * 60)
     
     return results
 
 
 if __name__ == "__main__":
-    process_all_pdfs()
+    parser = argparse.ArgumentParser(description="Extract and clean text from the raw PDFs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes (0 = one per CPU)"
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        help="Cleaning rule profile name or JSON file (default: by language)"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Reprocess every PDF, including unchanged ones"
+    )
+    args = parser.parse_args()
+    
+    process_all_pdfs(workers=args.workers, profile=args.profile, incremental=not args.full)
@@ -5,24 +5,69 @@ This module handles:
 - Embedding legal chunks using sentence-transformers (local, free)
 - Storing vectors in ChromaDB for local retrieval
 - Metadata management for citation
+- Collection versioning and the persisted BM25 keyword index artifact,
+  maintained incrementally (delta segments and tombstones) on upsert/delete
+- Exporting embeddings to the matrix used by exact vector search
+- Writing the memory-mapped chunk text store the retriever reads content from
+
+With RAGConfig.tracing, run_ingestion() records a span per stage (see
+tracing.py).
+
+Runs are incremental: the ingestion manifest (see manifest.py) records a
+content hash per chunk id, and only new or changed chunks are upserted, and
+so embedded. The manifest is trusted only while the collection is still at
+the version it recorded; otherwise every chunk is upserted again.
 
 ChromaDB is used for MVP as it's local and requires no external dependencies.
 """
 
+import argparse
+import hashlib
 import json
 import logging
-from typing import Optional, List, Dict, Any, Union
+import os
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Sequence, Union
+
+import numpy as np
 
+import tracing
 from config import (
     RAGConfig,
+    get_chunk_store_dir,
+    get_keyword_index_dir,
     get_processed_dir,
     get_vector_db_dir,
+    get_vector_index_dir,
     setup_logging
 )
+from ingestion.manifest import MANIFEST_FILE, IngestionManifest, content_hash
+from retrieval.bm25_index import (
+    BM25Index,
+    append_keyword_segment,
+    load_keyword_index,
+    merge_in_background,
+    needs_merge,
+    read_keyword_manifest,
+    save_keyword_index,
+    tokenize
+)
+from retrieval.chunk_store import CHUNK_STORE_FORMAT_VERSION, save_chunk_store
+from retrieval.citation_index import CitationIndex, save_citation_index
+from retrieval.document_store import act_order
+from retrieval.vector_index import (
+    QUANTIZATIONS,
+    VECTOR_INDEX_FORMAT_VERSION,
+    save_vector_index
+)
 
 # Configure logging
 logger = setup_logging(__name__)
 
+# Bump when a change alters what is stored per chunk, so the next run
+# upserts every chunk instead of skipping unchanged ones
+EMBEDDING_VERSION = 1
+
 
 def load_all_chunks() -> List[Dict[str, Any]]:
     """
@@ -52,6 +97,27 @@ def load_all_chunks() -> List[Dict[str, Any]]:
     return all_chunks
 
 
+def chunk_metadata(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the ChromaDB metadata stored for a chunk."""
+    return {
+        "act_name": chunk["act_name"],
+        "act_number": chunk["act_number"],
+        "part": chunk.get("part") or "",
+        "section_number": chunk.get("section_number") or "",
+        "section_title": chunk.get("section_title") or "",
+        # Ensure values are strings or numbers, no Nones
+        "token_count": chunk["token_count"],
+        # Where the chunk's section starts in the act (tells the citation
+        # index the arrangement of sections from the body)
+        "start_position": chunk.get("start_position") or 0,
+    }
+
+
+def chunk_fingerprint(chunk: Dict[str, Any]) -> str:
+    """Return the content hash of what is stored (and embedded) for a chunk."""
+    return content_hash({"content": chunk["content"], "metadata": chunk_metadata(chunk)})
+
+
 def create_chroma_collection(
     collection_name: str
 ) -> Any:
@@ -98,25 +164,118 @@ def create_chroma_collection(
         raise
 
 
+def get_collection_version_path(collection_name: str) -> Path:
+    """Get the path of the version file for a collection."""
+    return get_vector_db_dir() / f"{collection_name}.version.json"
+
+
+def get_citation_index_path(collection_name: str) -> Path:
+    """Get the path of the section citation index for a collection."""
+    return get_keyword_index_dir() / f"{collection_name}.citations.json"
+
+
+def get_collection_version(collection_name: str) -> Optional[str]:
+    """
+    Get the stored version of a collection.
+    
+    The version changes every time ingest_chunks_to_chroma writes to the
+    collection, so derived artifacts (keyword index, caches) can detect
+    that they are stale.
+    
+    Args:
+        collection_name: Name of the collection.
+    
+    Returns:
+        Version string, or None if no version has been recorded.
+    """
+    version_path = get_collection_version_path(collection_name)
+    if not version_path.exists():
+        return None
+    
+    try:
+        with open(version_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read collection version from {version_path}: {e}")
+        return None
+
+
+def bump_collection_version(
+    collection_name: str,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+    deleted_ids: Sequence[str] = ()
+) -> str:
+    """
+    Record a new collection version after an upsert or delete.
+    
+    The new version is a hash of the previous version and the upserted
+    content (or deleted ids).
+    
+    Args:
+        collection_name: Name of the collection.
+        ids: Upserted chunk ids.
+        documents: Upserted documents.
+        metadatas: Upserted metadata.
+        deleted_ids: Deleted chunk ids.
+    
+    Returns:
+        The new version string.
+    """
+    digest = hashlib.sha256()
+    digest.update((get_collection_version(collection_name) or "").encode("utf-8"))
+    for record in zip(ids, documents, metadatas):
+        digest.update(
+            json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        )
+    for doc_id in deleted_ids:
+        digest.update(f"deleted:{doc_id}".encode("utf-8"))
+    version = digest.hexdigest()[:16]
+    
+    version_path = get_collection_version_path(collection_name)
+    version_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = version_path.with_suffix(f".tmp-{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": version,
+                "chunks_upserted": len(ids),
+                "chunks_deleted": len(deleted_ids)
+            },
+            f,
+            indent=2
+        )
+    os.replace(tmp_path, version_path)
+    
+    return version
+
+
 def ingest_chunks_to_chroma(
     chunks: List[Dict[str, Any]],
     collection: Any,
-    batch_size: int = 50
+    batch_size: int = 50,
+    config: Optional[RAGConfig] = None
 ) -> int:
     """
     Ingest legal chunks into ChromaDB.
     Uses upsert to update existing chunks with new content.
     
+    The keyword index is updated with a delta segment holding only the
+    upserted chunks (see update_keyword_index).
+    
     Args:
         chunks: List of chunk dictionaries.
         collection: ChromaDB collection.
         batch_size: Number of chunks to insert per batch.
+        config: Optional RAGConfig object. If None, uses defaults.
     
     Returns:
         Number of chunks ingested.
     """
     try:
         logger.info(f"Ingesting/Updating {len(chunks)} chunks into ChromaDB")
+        base_version = get_collection_version(collection.name)
         
         # Prepare data for insertion
         ids = []
@@ -126,18 +285,11 @@ def ingest_chunks_to_chroma(
         for chunk in chunks:
             ids.append(chunk["chunk_id"])
             documents.append(chunk["content"])
-            metadatas.append({
-                "act_name": chunk["act_name"],
-                "act_number": chunk["act_number"],
-                "part": chunk.get("part") or "",
-                "section_number": chunk.get("section_number") or "",
-                "section_title": chunk.get("section_title") or "",
-                # Ensure values are strings or numbers, no Nones
-                "token_count": chunk["token_count"],
-            })
+            metadatas.append(chunk_metadata(chunk))
         
         # Insert in batches
         total_inserted = 0
+        upserted = []
         for i in range(0, len(ids), batch_size):
             try:
                 batch_ids = ids[i:i + batch_size]
@@ -151,11 +303,24 @@ def ingest_chunks_to_chroma(
                 )
                 
                 total_inserted += len(batch_ids)
+                upserted.extend(range(i, i + len(batch_ids)))
                 logger.info(f"Processed batch {i // batch_size + 1}: {len(batch_ids)} chunks")
             except Exception as batch_error:
                 logger.error(f"Error processing batch {i // batch_size + 1}: {batch_error}")
                 continue
         
+        if total_inserted:
+            ids = [ids[i] for i in upserted]
+            documents = [documents[i] for i in upserted]
+            metadatas = [metadatas[i] for i in upserted]
+            version = bump_collection_version(collection.name, ids, documents, metadatas)
+            logger.info(f"Collection '{collection.name}' is now at version {version}")
+            
+            if not update_keyword_index(
+                collection, ids, documents, metadatas, base_version, config=config
+            ):
+                build_keyword_index(collection, config)
+        
         return total_inserted
         
     except Exception as e:
@@ -163,6 +328,343 @@ def ingest_chunks_to_chroma(
         return 0
 
 
+def delete_chunks_from_chroma(
+    ids: List[str],
+    collection: Any,
+    config: Optional[RAGConfig] = None
+) -> int:
+    """
+    Delete chunks from ChromaDB and tombstone them in the keyword index.
+    
+    Args:
+        ids: Chunk ids to delete.
+        collection: ChromaDB collection.
+        config: Optional RAGConfig object. If None, uses defaults.
+    
+    Returns:
+        Number of chunks deleted.
+    """
+    if not ids:
+        return 0
+    
+    try:
+        base_version = get_collection_version(collection.name)
+        collection.delete(ids=ids)
+        version = bump_collection_version(collection.name, [], [], [], deleted_ids=ids)
+        logger.info(
+            f"Deleted {len(ids)} chunks, collection '{collection.name}' "
+            f"is now at version {version}"
+        )
+        
+        if not update_keyword_index(
+            collection, [], [], [], base_version, deleted_ids=ids, config=config
+        ):
+            build_keyword_index(collection, config)
+        return len(ids)
+    except Exception as e:
+        logger.error(f"Deletion failed: {e}")
+        return 0
+
+
+def remove_stale_chunks(
+    chunks: List[Dict[str, Any]],
+    collection: Any,
+    config: Optional[RAGConfig] = None
+) -> int:
+    """
+    Delete chunks of re-ingested acts that the chunker no longer produces.
+    
+    When an amended act is re-chunked, sections that were repealed or
+    renumbered leave chunks behind in the collection; only acts present in
+    chunks are considered.
+    
+    Args:
+        chunks: The chunks just ingested.
+        collection: ChromaDB collection.
+        config: Optional RAGConfig object. If None, uses defaults.
+    
+    Returns:
+        Number of chunks deleted.
+    """
+    act_numbers = {chunk["act_number"] for chunk in chunks}
+    current_ids = {chunk["chunk_id"] for chunk in chunks}
+    
+    stored = collection.get(include=["metadatas"])
+    stale = [
+        doc_id
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"])
+        if (metadata or {}).get("act_number") in act_numbers and doc_id not in current_ids
+    ]
+    return delete_chunks_from_chroma(stale, collection, config)
+
+
+def _save_citation_index(
+    collection_name: str,
+    doc_ids: List[str],
+    metadatas: List[Dict[str, Any]],
+    collection_version: Optional[str]
+) -> int:
+    """Build the section citation index from chunk metadata and save it."""
+    citations = CitationIndex.build(doc_ids, metadatas)
+    save_citation_index(
+        get_citation_index_path(collection_name),
+        citations,
+        collection_version
+    )
+    return len(citations)
+
+
+def update_keyword_index(
+    collection: Any,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+    base_version: Optional[str],
+    deleted_ids: Iterable[str] = (),
+    config: Optional[RAGConfig] = None
+) -> bool:
+    """
+    Apply an upsert or delete to the persisted keyword index incrementally.
+    
+    Only the upserted chunks are tokenized, into a delta segment; their
+    previous copies and the deleted chunks are tombstoned. A background
+    merge is started when the artifact has too many segments or
+    tombstones. The citation index is rebuilt from metadata alone.
+    
+    Args:
+        collection: ChromaDB collection (already updated).
+        ids: Upserted chunk ids.
+        documents: Upserted documents.
+        metadatas: Upserted metadata.
+        base_version: Collection version before the change.
+        deleted_ids: Deleted chunk ids.
+        config: Optional RAGConfig object. If None, uses defaults.
+    
+    Returns:
+        True if the artifact was updated, False if it is missing or not at
+        base_version and must be rebuilt with build_keyword_index.
+    """
+    config = config or RAGConfig()
+    
+    order = act_order(metadatas)
+    index = BM25Index.build(
+        (tokenize(documents[i] or "") for i in order),
+        k1=config.bm25_k1,
+        b=config.bm25_b
+    )
+    
+    collection_version = get_collection_version(collection.name)
+    index_dir = get_keyword_index_dir() / collection.name
+    manifest = append_keyword_segment(
+        index_dir,
+        index,
+        [ids[i] for i in order],
+        collection_version,
+        base_version,
+        act_numbers=[(metadatas[i] or {}).get("act_number") or 0 for i in order],
+        deleted_ids=deleted_ids
+    )
+    if manifest is None:
+        logger.info(f"Keyword index at {index_dir} is not at version {base_version}")
+        return False
+    
+    all_docs = collection.get(include=["metadatas"])
+    _save_citation_index(
+        collection.name, all_docs["ids"], all_docs["metadatas"], collection_version
+    )
+    
+    logger.info(
+        f"Keyword index delta: {index.n_docs} documents indexed, "
+        f"{len(manifest['segments'])} segments, {manifest['n_docs']} live documents"
+    )
+    if needs_merge(manifest, config.keyword_max_segments, config.keyword_max_deleted_ratio):
+        logger.info("Merging keyword index segments in the background")
+        merge_in_background(index_dir)
+    return True
+
+
+def build_keyword_index(
+    collection: Any,
+    config: Optional[RAGConfig] = None
+) -> int:
+    """
+    Build the BM25 keyword index from a collection and persist it.
+    
+    The artifact is written to get_keyword_index_dir() / <collection name>
+    and tagged with the current collection version, so HybridRetriever can
+    memory-map it at startup instead of re-tokenizing the corpus. Documents
+    are indexed grouped by act, so act-filtered searches read contiguous
+    postings ranges.
+    
+    The section citation index (act + section -> chunk ids) is built from
+    the same metadata and written next to it.
+    
+    Args:
+        collection: ChromaDB collection.
+        config: Optional RAGConfig object. If None, uses defaults.
+    
+    Returns:
+        Number of documents in the keyword index.
+    """
+    config = config or RAGConfig()
+    
+    all_docs = collection.get(include=["documents", "metadatas"])
+    order = act_order(all_docs["metadatas"])
+    doc_ids = [all_docs["ids"][i] for i in order]
+    
+    index = BM25Index.build(
+        (tokenize(all_docs["documents"][i] or "") for i in order),
+        k1=config.bm25_k1,
+        b=config.bm25_b
+    )
+    
+    collection_version = get_collection_version(collection.name)
+    index_dir = get_keyword_index_dir() / collection.name
+    save_keyword_index(
+        index_dir,
+        index,
+        doc_ids,
+        collection_version,
+        act_numbers=[(all_docs["metadatas"][i] or {}).get("act_number") or 0 for i in order]
+    )
+    
+    cited_sections = _save_citation_index(
+        collection.name, all_docs["ids"], all_docs["metadatas"], collection_version
+    )
+    
+    logger.info(
+        f"Keyword index written to {index_dir} "
+        f"({index.n_docs} documents, {len(index.vocabulary)} terms, "
+        f"{cited_sections} cited sections)"
+    )
+    return index.n_docs
+
+
+def keyword_index_doc_ids(collection: Any) -> List[str]:
+    """
+    Return the chunk ids of a collection in keyword index ordinal order.
+    
+    Falls back to the act-grouped order build_keyword_index writes if the
+    keyword index is missing or stale.
+    """
+    artifact = load_keyword_index(get_keyword_index_dir() / collection.name)
+    if artifact is not None:
+        _, doc_ids, manifest = artifact
+        if manifest.get("collection_version") == get_collection_version(collection.name):
+            return doc_ids
+    
+    all_docs = collection.get(include=["metadatas"])
+    return [all_docs["ids"][i] for i in act_order(all_docs["metadatas"])]
+
+
+def build_vector_index(
+    collection: Any,
+    doc_ids: Optional[List[str]] = None,
+    quantizations: Sequence[str] = QUANTIZATIONS,
+    batch_size: int = 1000
+) -> int:
+    """
+    Export a collection's embeddings to the exact vector search artifact.
+    
+    The matrix is written to get_vector_index_dir() / <collection name>
+    with one row per chunk, tagged with the current collection version,
+    together with the requested quantized (int8 / binary) copies.
+    
+    Args:
+        collection: ChromaDB collection.
+        doc_ids: Row order of the matrix. Defaults to the document order of
+            the keyword index, so both share document ordinals.
+        quantizations: Quantized copies to store ("int8", "binary").
+        batch_size: Number of embeddings fetched per request.
+    
+    Returns:
+        Number of rows in the exported matrix.
+    """
+    if doc_ids is None:
+        doc_ids = keyword_index_doc_ids(collection)
+    
+    rows: Dict[str, Any] = {}
+    for i in range(0, len(doc_ids), batch_size):
+        batch = collection.get(ids=doc_ids[i:i + batch_size], include=["embeddings"])
+        rows.update(zip(batch["ids"], batch["embeddings"]))
+    
+    missing = [doc_id for doc_id in doc_ids if doc_id not in rows]
+    if missing:
+        raise ValueError(f"{len(missing)} chunks have no stored embedding, e.g. {missing[0]}")
+    
+    index_dir = get_vector_index_dir() / collection.name
+    save_vector_index(
+        index_dir,
+        np.asarray([rows[doc_id] for doc_id in doc_ids], dtype=np.float32),
+        doc_ids,
+        get_collection_version(collection.name),
+        quantizations
+    )
+    
+    logger.info(
+        f"Vector index written to {index_dir} ({len(doc_ids)} rows, "
+        f"quantized: {', '.join(q for q in quantizations if q != 'none') or 'none'})"
+    )
+    return len(doc_ids)
+
+
+def build_chunk_store(
+    collection: Any,
+    doc_ids: Optional[List[str]] = None,
+    batch_size: int = 1000
+) -> int:
+    """
+    Write a collection's chunk texts to the memory-mapped chunk text store.
+    
+    The store is written to get_chunk_store_dir() / <collection name>,
+    tagged with the current collection version.
+    
+    Args:
+        collection: ChromaDB collection.
+        doc_ids: Ordinal order of the store. Defaults to the document order
+            of the keyword index, so both share document ordinals.
+        batch_size: Number of documents fetched per request.
+    
+    Returns:
+        Number of chunks in the store.
+    """
+    if doc_ids is None:
+        doc_ids = keyword_index_doc_ids(collection)
+    
+    texts: Dict[str, Optional[str]] = {}
+    for i in range(0, len(doc_ids), batch_size):
+        batch = collection.get(ids=doc_ids[i:i + batch_size], include=["documents"])
+        texts.update(zip(batch["ids"], batch["documents"]))
+    
+    missing = [doc_id for doc_id in doc_ids if doc_id not in texts]
+    if missing:
+        raise ValueError(f"{len(missing)} chunks are not in the collection, e.g. {missing[0]}")
+    
+    store_dir = get_chunk_store_dir() / collection.name
+    save_chunk_store(
+        store_dir,
+        doc_ids,
+        [texts[doc_id] for doc_id in doc_ids],
+        get_collection_version(collection.name)
+    )
+    
+    logger.info(f"Chunk text store written to {store_dir} ({len(doc_ids)} chunks)")
+    return len(doc_ids)
+
+
+def _artifact_is_current(directory: Path, format_version: int, collection_name: str) -> bool:
+    """Return True if an index artifact was written from the current collection version."""
+    try:
+        with open(directory / "manifest.json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (
+        manifest.get("format_version") == format_version
+        and manifest.get("collection_version") == get_collection_version(collection_name)
+    )
+
+
 def test_retrieval(
     collection: Any,
     query: str,
@@ -201,21 +703,38 @@ def test_retrieval(
         return []
 
 
-def run_ingestion() -> Dict[str, Union[int, str]]:
+def run_ingestion(incremental: bool = True) -> Dict[str, Union[int, str]]:
     """
     Run the full ingestion pipeline.
     
+    Args:
+        incremental: Only upsert chunks that are new or changed since the
+            last run, and keep derived artifacts that are already at the
+            collection's version (False = upsert and rebuild everything).
+    
     Returns:
         Dictionary with ingestion statistics.
     """
     config = RAGConfig()
-    
+    with tracing.trace(
+        "ingestion", enabled=config.tracing, exporter=tracing.exporter_for(config)
+    ) as trace:
+        stats = _run_ingestion(config, incremental)
+    if trace is not None:
+        logger.info(f"Ingestion stage timings (ms): {trace.timings()}")
+    return stats
+
+
+def _run_ingestion(config: RAGConfig, incremental: bool = True) -> Dict[str, Union[int, str]]:
+    """Run the ingestion stages (see run_ingestion), each in its own span."""
     logger.info("=" * 60)
     logger.info("Starting Vector Database Ingestion")
     logger.info("=" * 60)
     
     # Load chunks
-    chunks = load_all_chunks()
+    with tracing.span("load_chunks") as span:
+        chunks = load_all_chunks()
+        span.set(chunks=len(chunks))
     
     if not chunks:
         logger.error("No chunks found to ingest")
@@ -223,19 +742,87 @@ def run_ingestion() -> Dict[str, Union[int, str]]:
     
     try:
         # Create collection
-        collection = create_chroma_collection(config.collection_name)
+        with tracing.span("open_collection"):
+            collection = create_chroma_collection(config.collection_name)
+        
+        # Skip chunks whose content hash matches the manifest, unless the
+        # collection changed since it was written
+        manifest = IngestionManifest.load(get_processed_dir() / MANIFEST_FILE)
+        stage = manifest.stage(
+            "embed",
+            EMBEDDING_VERSION,
+            {"collection": config.collection_name, "embedding_model": config.embedding_model}
+        )
+        if (
+            not incremental
+            or stage.state.get("collection_version") != get_collection_version(collection.name)
+        ):
+            stage.clear()
+        fingerprints = {chunk["chunk_id"]: chunk_fingerprint(chunk) for chunk in chunks}
+        changed = [
+            chunk for chunk in chunks
+            if not stage.is_current(chunk["chunk_id"], fingerprints[chunk["chunk_id"]])
+        ]
+        unchanged = len(chunks) - len(changed)
         
-        # Ingest chunks
-        ingested = ingest_chunks_to_chroma(chunks, collection)
+        # Ingest chunks (the keyword index is updated incrementally)
+        with tracing.span("embed_and_upsert") as span:
+            ingested = ingest_chunks_to_chroma(changed, collection, config=config) if changed else 0
+            span.set(chunks=ingested, unchanged=unchanged)
+        with tracing.span("remove_stale") as span:
+            removed = remove_stale_chunks(chunks, collection, config)
+            span.set(chunks=removed)
+        
+        # Record the upserted chunks; if a batch failed, which chunks made
+        # it is unknown, so all changed chunks are retried next run
+        for chunk in changed:
+            if ingested == len(changed):
+                stage.record(chunk["chunk_id"], input=fingerprints[chunk["chunk_id"]])
+            else:
+                stage.forget(chunk["chunk_id"])
+        stage.retain(fingerprints)
+        stage.state["collection_version"] = get_collection_version(collection.name)
+        manifest.save()
         
         # Get collection stats
         count = collection.count()
         
+        # Persist the keyword index for fast retriever startup, unless the
+        # incremental updates already brought it to the current version
+        manifest = read_keyword_manifest(get_keyword_index_dir() / collection.name)
+        if (
+            manifest is None
+            or manifest.get("collection_version") != get_collection_version(collection.name)
+        ):
+            with tracing.span("build_keyword_index"):
+                build_keyword_index(collection, config)
+        
+        if config.semantic_backend == "exact" and not (
+            incremental and _artifact_is_current(
+                get_vector_index_dir() / collection.name,
+                VECTOR_INDEX_FORMAT_VERSION,
+                collection.name
+            )
+        ):
+            with tracing.span("build_vector_index"):
+                build_vector_index(collection)
+        
+        if not (
+            incremental and _artifact_is_current(
+                get_chunk_store_dir() / collection.name,
+                CHUNK_STORE_FORMAT_VERSION,
+                collection.name
+            )
+        ):
+            with tracing.span("build_chunk_store"):
+                build_chunk_store(collection)
+        
         # Test retrieval
         logger.info("\n" + "-" * 40)
         logger.info("Testing retrieval...")
         test_query = "What is the definition of consideration in contract law?"
-        results = test_retrieval(collection, test_query)
+        with tracing.span("test_retrieval"):
+            results = test_retrieval(collection, test_query)
         
         logger.info(f"\nTest query: '{test_query}'")
         for i, result in enumerate(results, 1):
@@ -248,15 +835,20 @@ def run_ingestion() -> Dict[str, Union[int, str]]:
         # Summary
         logger.info("\n" + "=" * 60)
         logger.info("Ingestion Summary:")
-        logger.info(f"  Chunks ingested: {ingested}")
+        logger.info(f"  Chunks ingested: {ingested} ({unchanged} unchanged, skipped)")
+        logger.info(f"  Stale chunks removed: {removed}")
         logger.info(f"  Total in collection: {count}")
         logger.info(f"  Vector DB path: {get_vector_db_dir()}")
+        logger.info(f"  Keyword index path: {get_keyword_index_dir()}")
         logger.info("=" * 60)
         
         return {
             "chunks_ingested": ingested,
+            "chunks_unchanged": unchanged,
+            "chunks_removed": removed,
             "total_in_collection": count,
-            "db_path": str(get_vector_db_dir())
+            "db_path": str(get_vector_db_dir()),
+            "keyword_index_path": str(get_keyword_index_dir())
         }
     except Exception as e:
         logger.error(f"Ingestion process failed: {e}")
@@ -264,4 +856,12 @@ def run_ingestion() -> Dict[str, Union[int, str]]:
 
 
 if __name__ == "__main__":
-    run_ingestion()
+    parser = argparse.ArgumentParser(description="Embed the chunks into ChromaDB")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Upsert every chunk and rebuild every artifact"
+    )
+    args = parser.parse_args()
+    
+    run_ingestion(incremental=not args.full)
@@ -0,0 +1,1187 @@
+"""
+Sparse BM25 Index for Malaysian Legal RAG
+
+This module implements the inverted-index BM25 (Okapi) engine used by the
+keyword leg of the hybrid retriever.
+
+rank_bm25's BM25Okapi scores every document in the corpus for every query
+and the caller then sorts the whole score vector. This index instead keeps
+term -> postings (document ordinals and term frequencies) in a compressed
+sparse row (CSR) layout with precomputed IDF and document length norms, so a
+query only touches documents containing at least one query term, and the
+top-k is selected with a heap over that candidate set.
+
+Scoring follows BM25Okapi exactly (k1, b and the epsilon IDF floor), so
+rankings are unchanged.
+
+Terms are integer ids throughout. Building interns every token into a
+compact array('I') of term ids, and queries are turned into term-id arrays
+by an Analyzer bound to the index's frozen vocabulary, which memoizes the
+analysis of repeated questions.
+
+Multi-term queries are evaluated with MaxScore: terms are scored in order of
+their per-term score upper bound, and once the current top-k cannot be
+reached by a document matching only the remaining terms, those terms are
+looked up for the existing candidates only instead of being scored over their
+whole postings. The top-k is unchanged. Separately, prune_query() drops very
+common terms ("what", "is", "the") from long questions before searching.
+
+Searches can be restricted to a DocSubset (e.g. one act): each term's
+postings are cut down to the subset before any score is computed, so a
+filtered query only scores documents inside the slice it searches.
+
+The index can be persisted as a versioned on-disk artifact (vocabulary,
+postings, document lengths and doc-id table) that is memory-mapped at load
+time, so the retriever does not have to re-tokenize the corpus on startup.
+
+The artifact is a list of segments. Upserted chunks are indexed into a new
+delta segment and their previous copies (and removed chunks) are tombstoned
+in the older segments, so updating one act only tokenizes that act. Loading
+a segmented artifact merges the live postings of all segments, which keeps
+document frequencies and the average document length exact; a background
+merge compacts the segments on disk once there are too many of them or too
+many tombstones.
+"""
+
+import heapq
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from retrieval.cache import LRUCache
+
+# Bump when the on-disk layout or the tokenizer changes
+KEYWORD_INDEX_FORMAT_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+VOCABULARY_FILE = "vocabulary.json"
+DOC_IDS_FILE = "doc_ids.json"
+ACT_NUMBERS_FILE = "act_numbers.npy"
+ARRAY_FILES = ("offsets", "postings_docs", "postings_tfs", "doc_lengths")
+SEGMENT_PREFIX = "seg_"
+
+# Above this many contiguous runs, a subset is applied as a mask instead
+MAX_SUBSET_RANGES = 64
+
+SECTION_PATTERN = re.compile(r"section\s+(\d+[a-z]*)")
+TOKEN_PATTERN = re.compile(r"\b\w+\b")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text for BM25 indexing.
+
+    Uses simple whitespace + punctuation tokenization.
+    Preserves legal terms like "Section 10" as single tokens.
+    """
+    if not text:
+        return []
+
+    # Lowercase
+    text = text.lower()
+
+    # Keep "section X" together
+    text = SECTION_PATTERN.sub(r"section_\1", text)
+
+    # Split on whitespace and punctuation
+    tokens = TOKEN_PATTERN.findall(text)
+
+    return tokens
+
+
+class Analyzer:
+    """
+    Maps text to the integer term ids of one index's frozen vocabulary.
+
+    Text is tokenized with tokenize() (so "Section 10" is still the single
+    term "section_10") and terms the index does not contain are dropped.
+    Analyses are memoized, so a repeated query skips the regexes and the
+    vocabulary lookups.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], cache_size: int = 1024):
+        """
+        Initialize the analyzer.
+
+        Args:
+            vocabulary: Term -> term id mapping of the index. It must not
+                change afterwards.
+            cache_size: Maximum number of memoized analyses.
+        """
+        self.vocabulary = vocabulary
+        self._cache = LRUCache(cache_size)
+
+    def term_ids(self, text: str) -> np.ndarray:
+        """
+        Return the term ids of a text, in token order.
+
+        Args:
+            text: Query text.
+
+        Returns:
+            Read-only int32 array (shared between callers of the same text).
+        """
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+
+        vocabulary = self.vocabulary
+        term_ids = np.array(
+            [vocabulary[term] for term in tokenize(text) if term in vocabulary],
+            dtype=np.int32
+        )
+        term_ids.flags.writeable = False
+        self._cache.put(text, term_ids)
+        return term_ids
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the memoization cache statistics."""
+        return self._cache.stats()
+
+
+class DocSubset:
+    """
+    A set of document ordinals, stored as a packed bitmap.
+
+    When the set is made of a few contiguous ordinal runs (as for acts, whose
+    chunks are indexed contiguously), postings are restricted with binary
+    search over the runs; otherwise the unpacked mask is gathered.
+    """
+
+    def __init__(self, bitmap: np.ndarray, n_docs: int):
+        """
+        Unpack a bitmap and find its contiguous runs.
+
+        Args:
+            bitmap: Packed bitmap (np.packbits) of member ordinals.
+            n_docs: Number of documents the bitmap covers.
+        """
+        self.bitmap = bitmap
+        self.n_docs = n_docs
+        self.mask = np.unpackbits(bitmap, count=n_docs).astype(bool)
+
+        # Contiguous runs [start, end) of member ordinals
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], self.mask, [False]))))
+        self.starts = edges[0::2]
+        self.ends = edges[1::2]
+        self._size = int((self.ends - self.starts).sum())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def select(self, docs: np.ndarray) -> np.ndarray:
+        """
+        Return the positions in a sorted ordinal array that are members.
+
+        Args:
+            docs: Ascending document ordinals (e.g. one term's postings).
+
+        Returns:
+            Integer positions into docs.
+        """
+        if len(self.starts) > MAX_SUBSET_RANGES:
+            return np.flatnonzero(self.mask[docs])
+
+        lows = np.searchsorted(docs, self.starts)
+        highs = np.searchsorted(docs, self.ends)
+        runs = [np.arange(low, high) for low, high in zip(lows, highs) if high > low]
+        if not runs:
+            return np.zeros(0, dtype=np.int64)
+        return runs[0] if len(runs) == 1 else np.concatenate(runs)
+
+
+class BM25Index:
+    """
+    Inverted-index BM25 (Okapi) scorer.
+
+    Postings are stored in CSR form: the postings of term id ``t`` live in
+    ``postings_docs[offsets[t]:offsets[t + 1]]`` (document ordinals, ascending)
+    and ``postings_tfs`` (term frequencies) at the same positions.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation parameter.
+            b: Document length normalization parameter.
+            epsilon: Floor for negative IDF values, as a fraction of the
+                average IDF (same as BM25Okapi).
+        """
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.vocabulary: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.postings_docs = np.zeros(0, dtype=np.int32)
+        self.postings_tfs = np.zeros(0, dtype=np.float32)
+        self.doc_lengths = np.zeros(0, dtype=np.int32)
+        self.idf = np.zeros(0, dtype=np.float64)
+        self.avgdl = 0.0
+        self._length_norms = np.zeros(0, dtype=np.float64)
+        self._max_scores: Optional[np.ndarray] = None
+
+        # MaxScore evaluation of multi-term queries (exact; off = score
+        # every posting of every query term)
+        self.dynamic_pruning = True
+        # Postings scored or looked up by searches so far (approximate when
+        # searches run concurrently)
+        self.postings_scored = 0
+
+    @classmethod
+    def build(
+        cls,
+        tokenized_docs: Iterable[Sequence[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25
+    ) -> "BM25Index":
+        """
+        Build an index from tokenized documents.
+
+        Args:
+            tokenized_docs: Token lists, one per document. The position of a
+                document in this iterable is its ordinal in search results.
+            k1: Term frequency saturation parameter.
+            b: Document length normalization parameter.
+            epsilon: IDF floor factor.
+
+        Returns:
+            A ready-to-query BM25Index.
+        """
+        index = cls(k1=k1, b=b, epsilon=epsilon)
+
+        # Intern the corpus into one flat array of term ids (4 bytes a token)
+        vocabulary = index.vocabulary
+        token_ids = array("I")
+        doc_lengths = array("I")
+        for tokens in tokenized_docs:
+            doc_lengths.append(len(tokens))
+            token_ids.extend(
+                vocabulary.setdefault(term, len(vocabulary)) for term in tokens
+            )
+
+        # One (term, document) key per token; unique keys in ascending order
+        # are the CSR postings and their counts the term frequencies
+        n_docs = len(doc_lengths)
+        lengths = np.frombuffer(doc_lengths, dtype=np.uint32).astype(np.int64)
+        keys = np.frombuffer(token_ids, dtype=np.uint32).astype(np.int64) * n_docs
+        keys += np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        keys, tfs = np.unique(keys, return_counts=True)
+
+        index.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(keys // max(n_docs, 1), minlength=len(vocabulary)),
+            out=index.offsets[1:]
+        )
+        index.postings_docs = (keys % max(n_docs, 1)).astype(np.int32)
+        index.postings_tfs = tfs.astype(np.float32)
+        index.doc_lengths = lengths.astype(np.int32)
+
+        index._finalize()
+        return index
+
+    def _finalize(self) -> None:
+        """Precompute IDF values and per-document length norms."""
+        n_docs = self.n_docs
+        if n_docs == 0:
+            self.avgdl = 0.0
+            self.idf = np.zeros(len(self.vocabulary), dtype=np.float64)
+            self._length_norms = np.zeros(0, dtype=np.float64)
+            return
+
+        self.avgdl = float(self.doc_lengths.sum()) / n_docs
+
+        df = np.diff(self.offsets).astype(np.float64)
+        idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+        if len(idf):
+            # Same floor as BM25Okapi: very common terms get a small
+            # positive weight instead of a negative one.
+            average_idf = float(idf.sum()) / len(idf)
+            idf[idf < 0] = self.epsilon * average_idf
+        self.idf = idf
+
+        avgdl = self.avgdl or 1.0
+        self._length_norms = self.k1 * (
+            1 - self.b + self.b * self.doc_lengths.astype(np.float64) / avgdl
+        )
+        self._max_scores = None
+
+    @property
+    def max_scores(self) -> np.ndarray:
+        """
+        Upper bound of each term's BM25 contribution to any document.
+
+        Computed from all postings on first use.
+        """
+        if self._max_scores is None:
+            lengths = np.diff(self.offsets)
+            tfs = np.asarray(self.postings_tfs, dtype=np.float64)
+            contributions = (
+                np.repeat(self.idf, lengths) * tfs * (self.k1 + 1)
+                / (tfs + self._length_norms[self.postings_docs])
+            )
+            bounds = np.zeros(len(lengths), dtype=np.float64)
+            nonempty = lengths > 0
+            if contributions.size:
+                bounds[nonempty] = np.maximum.reduceat(
+                    contributions, self.offsets[:-1][nonempty]
+                )
+            self._max_scores = bounds
+        return self._max_scores
+
+    def shard(self, ordinals: np.ndarray) -> "BM25Index":
+        """
+        Return the index of a subset of documents, renumbered from 0.
+
+        The shard keeps this index's vocabulary, IDF values and average
+        document length rather than recomputing them from its own documents,
+        so it scores each document exactly as this index does and hits from
+        several shards can be merged by score.
+
+        Args:
+            ordinals: Ascending ordinals of the shard's documents. Document
+                ordinals[i] becomes ordinal i of the shard.
+
+        Returns:
+            A new in-memory BM25Index.
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        members = np.zeros(self.n_docs, dtype=bool)
+        members[ordinals] = True
+
+        docs = np.asarray(self.postings_docs)
+        keep = members[docs]
+        term_of_posting = np.repeat(
+            np.arange(len(self.offsets) - 1, dtype=np.int64),
+            np.diff(self.offsets)
+        )[keep]
+
+        shard = BM25Index(k1=self.k1, b=self.b, epsilon=self.epsilon)
+        shard.vocabulary = self.vocabulary
+        shard.offsets = np.zeros(len(self.offsets), dtype=np.int64)
+        np.cumsum(
+            np.bincount(term_of_posting, minlength=len(self.offsets) - 1),
+            out=shard.offsets[1:]
+        )
+        shard.postings_docs = np.searchsorted(ordinals, docs[keep]).astype(np.int32)
+        shard.postings_tfs = np.asarray(self.postings_tfs)[keep]
+        shard.doc_lengths = np.asarray(self.doc_lengths)[ordinals]
+        shard.idf = self.idf
+        shard.avgdl = self.avgdl
+        shard._length_norms = self._length_norms[ordinals]
+        return shard
+
+    @property
+    def n_docs(self) -> int:
+        """Number of indexed documents."""
+        return len(self.doc_lengths)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def lookup(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """Return the term ids of the indexed tokens, in order (int32)."""
+        vocabulary = self.vocabulary
+        return np.array(
+            [vocabulary[term] for term in query_tokens if term in vocabulary],
+            dtype=np.int32
+        )
+
+    def search(
+        self,
+        query_tokens: Sequence[str],
+        n_results: int,
+        subset: Optional[DocSubset] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Return the top documents for a tokenized query.
+
+        Only the postings of query terms are read; documents that share no
+        term with the query, or fall outside the subset, are never scored.
+
+        Args:
+            query_tokens: Tokenized query (repeated terms count repeatedly).
+            n_results: Maximum number of results.
+            subset: Optional set of ordinals to restrict the search to.
+
+        Returns:
+            List of (document ordinal, score) tuples, best first. Ties keep
+            the lower ordinal first.
+        """
+        return self._search(
+            self.lookup(query_tokens), n_results, {}, subset, self.dynamic_pruning
+        )
+
+    def search_many(
+        self,
+        queries: Sequence[Sequence[str]],
+        n_results: int,
+        subset: Optional[DocSubset] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Search a batch of tokenized queries.
+
+        The postings of a term shared by several queries are read and
+        scored once for the whole batch.
+
+        Args:
+            queries: Tokenized queries.
+            n_results: Maximum number of results per query.
+            subset: Optional set of ordinals to restrict all searches to.
+
+        Returns:
+            One result list per query, as returned by search().
+        """
+        return self.search_ids_many(
+            [self.lookup(tokens) for tokens in queries],
+            n_results,
+            subset
+        )
+
+    def search_ids_many(
+        self,
+        queries: Sequence[np.ndarray],
+        n_results: int,
+        subset: Optional[DocSubset] = None,
+        dynamic_pruning: Optional[bool] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Search a batch of queries given as term-id arrays (see Analyzer).
+
+        Args:
+            queries: Term ids per query (repeated ids count repeatedly).
+            n_results: Maximum number of results per query.
+            subset: Optional set of ordinals to restrict all searches to.
+            dynamic_pruning: Use MaxScore for these searches (None: the
+                index's dynamic_pruning setting).
+
+        Returns:
+            One result list per query, as returned by search().
+        """
+        if dynamic_pruning is None:
+            dynamic_pruning = self.dynamic_pruning
+        term_scores: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        return [
+            self._search(term_ids, n_results, term_scores, subset, dynamic_pruning)
+            for term_ids in queries
+        ]
+
+    def prune_term_ids(self, term_ids: np.ndarray, max_df_ratio: float) -> np.ndarray:
+        """
+        Drop query terms that occur in more than max_df_ratio of the documents.
+
+        Such terms ("what", "is", "the", "under") carry almost no IDF weight
+        but have the longest postings lists. If every term is that common,
+        the rarest one is kept.
+
+        Args:
+            term_ids: Query term ids.
+            max_df_ratio: Maximum document frequency, as a fraction of the
+                number of documents.
+
+        Returns:
+            The remaining term ids, in query order.
+        """
+        df = self.offsets[term_ids + 1] - self.offsets[term_ids]
+        keep = df <= max_df_ratio * self.n_docs
+        if keep.any() or not len(term_ids):
+            return term_ids[keep]
+        return term_ids[term_ids == term_ids[np.argmin(df)]]
+
+    def prune_query(
+        self,
+        query_tokens: Sequence[str],
+        max_df_ratio: float
+    ) -> List[str]:
+        """
+        Token version of prune_term_ids(); unknown tokens are dropped too.
+
+        Args:
+            query_tokens: Tokenized query.
+            max_df_ratio: Maximum document frequency, as a fraction of the
+                number of documents.
+
+        Returns:
+            The remaining tokens, in query order.
+        """
+        known = [term for term in query_tokens if term in self.vocabulary]
+        kept = set(self.prune_term_ids(self.lookup(known), max_df_ratio).tolist())
+        return [term for term in known if self.vocabulary[term] in kept]
+
+    def _term_scores(
+        self,
+        term_id: int,
+        subset: Optional[DocSubset] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (doc ordinals, BM25 contributions) for one query occurrence of a term."""
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        docs = self.postings_docs[start:end]
+        tfs = self.postings_tfs[start:end]
+        if subset is not None:
+            keep = subset.select(docs)
+            docs, tfs = docs[keep], tfs[keep]
+        self.postings_scored += len(docs)
+        return docs, self.idf[term_id] * tfs * (self.k1 + 1) / (tfs + self._length_norms[docs])
+
+    def _candidate_scores(self, term_id: int, candidates: np.ndarray) -> np.ndarray:
+        """Return one query occurrence's contributions of a term to given documents."""
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        docs = self.postings_docs[start:end]
+        positions = np.searchsorted(docs, candidates)
+        found = positions < len(docs)
+        found[found] = docs[positions[found]] == candidates[found]
+        self.postings_scored += len(candidates)
+
+        scores = np.zeros(len(candidates), dtype=np.float64)
+        tfs = np.asarray(self.postings_tfs[start:end])[positions[found]]
+        scores[found] = self.idf[term_id] * tfs * (self.k1 + 1) / (
+            tfs + self._length_norms[candidates[found]]
+        )
+        return scores
+
+    def _score_exhaustive(
+        self,
+        terms: List[Tuple[int, int]],
+        term_scores: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        subset: Optional[DocSubset] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every posting of every (term id, query tf) pair."""
+        doc_parts: List[np.ndarray] = []
+        score_parts: List[np.ndarray] = []
+
+        for term_id, query_tf in terms:
+            if term_id not in term_scores:
+                term_scores[term_id] = self._term_scores(term_id, subset)
+            docs, scores = term_scores[term_id]
+            if not len(docs):
+                continue
+
+            doc_parts.append(docs)
+            score_parts.append(scores * query_tf if query_tf > 1 else scores)
+
+        if not doc_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        if len(doc_parts) == 1:
+            return doc_parts[0], score_parts[0]
+
+        candidates, inverse = np.unique(
+            np.concatenate(doc_parts),
+            return_inverse=True
+        )
+        scores = np.bincount(
+            inverse,
+            weights=np.concatenate(score_parts),
+            minlength=len(candidates)
+        )
+        return candidates, scores
+
+    def _score_max_score(
+        self,
+        terms: List[Tuple[int, int]],
+        n_results: int,
+        term_scores: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        subset: Optional[DocSubset] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score (term id, query tf) pairs term-at-a-time with MaxScore pruning.
+
+        Terms are processed in decreasing order of their score upper bound.
+        The threshold is the k-th best partial score so far. Once the bounds
+        of the unprocessed terms add up to less than the threshold, no new
+        document can enter the top k: the remaining terms are only looked up
+        for the current candidates, and candidates whose partial score plus
+        the remaining bounds falls below the threshold are dropped.
+
+        Returns:
+            (candidate ordinals, scores). The top n_results of these, and
+            their scores, are those of exhaustive scoring.
+        """
+        bounds = [float(self.max_scores[term_id]) * query_tf for term_id, query_tf in terms]
+        order = sorted(range(len(terms)), key=bounds.__getitem__, reverse=True)
+        # remaining[j]: the most the terms from order[j] onwards can add
+        remaining = [0.0] * (len(order) + 1)
+        for j in range(len(order) - 1, -1, -1):
+            remaining[j] = remaining[j + 1] + bounds[order[j]]
+
+        threshold = -np.inf
+        candidates = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float64)
+
+        for j, i in enumerate(order):
+            term_id, query_tf = terms[i]
+
+            if len(candidates) >= n_results and remaining[j] < threshold:
+                scores = scores + self._candidate_scores(term_id, candidates) * query_tf
+            else:
+                if term_id not in term_scores:
+                    term_scores[term_id] = self._term_scores(term_id, subset)
+                docs, term_contributions = term_scores[term_id]
+                candidates, inverse = np.unique(
+                    np.concatenate((candidates, docs)),
+                    return_inverse=True
+                )
+                scores = np.bincount(
+                    inverse,
+                    weights=np.concatenate((scores, term_contributions * query_tf)),
+                    minlength=len(candidates)
+                )
+
+            if len(candidates) >= n_results:
+                threshold = np.partition(scores, len(scores) - n_results)[len(scores) - n_results]
+                viable = scores + remaining[j + 1] >= threshold
+                if not viable.all():
+                    candidates, scores = candidates[viable], scores[viable]
+
+        return candidates, scores
+
+    def _search(
+        self,
+        term_ids: np.ndarray,
+        n_results: int,
+        term_scores: Dict[int, Tuple[np.ndarray, np.ndarray]],
+        subset: Optional[DocSubset] = None,
+        dynamic_pruning: bool = True
+    ) -> List[Tuple[int, float]]:
+        """Score one query's term ids, reusing per-term scores cached in term_scores."""
+        if n_results <= 0 or self.n_docs == 0 or not len(term_ids):
+            return []
+
+        unique_ids, query_tfs = np.unique(term_ids, return_counts=True)
+        terms = list(zip(unique_ids.tolist(), query_tfs.tolist()))
+
+        if dynamic_pruning and len(terms) > 1:
+            candidates, scores = self._score_max_score(terms, n_results, term_scores, subset)
+        else:
+            candidates, scores = self._score_exhaustive(terms, term_scores, subset)
+
+        if not len(candidates):
+            return []
+
+        top = heapq.nlargest(
+            n_results,
+            range(len(candidates)),
+            key=scores.__getitem__
+        )
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def term_idf(self, term: str) -> float:
+        """Return the IDF of a term, or 0.0 if it is not indexed."""
+        term_id = self.vocabulary.get(term)
+        if term_id is None:
+            return 0.0
+        return float(self.idf[term_id])
+
+
+def merge_indexes(
+    indexes: Sequence[BM25Index],
+    keep: Sequence[np.ndarray],
+    act_numbers: Optional[Sequence[np.ndarray]] = None,
+    k1: float = 1.5,
+    b: float = 0.75,
+    epsilon: float = 0.25
+) -> Tuple[BM25Index, np.ndarray]:
+    """
+    Merge index segments into one index without re-tokenizing.
+
+    The postings of the kept documents are renumbered, concatenated and
+    re-sorted per term. Terms left without postings are dropped, so IDF
+    values and the average document length are those of a fresh build over
+    the kept documents.
+
+    Args:
+        indexes: Segments, in ordinal order.
+        keep: Per segment, a boolean mask of the documents to keep.
+        act_numbers: Optional per-segment act numbers. Kept documents are
+            then grouped by act (stable), as build_keyword_index orders them.
+        k1: Term frequency saturation parameter.
+        b: Document length normalization parameter.
+        epsilon: IDF floor factor.
+
+    Returns:
+        (index, sources) where sources[i] is the position of merged
+        document i in the concatenation of the segments' documents.
+    """
+    sizes = [index.n_docs for index in indexes]
+    bases = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+
+    live = np.concatenate(
+        [np.zeros(0, dtype=bool), *(np.asarray(mask, dtype=bool) for mask in keep)]
+    )
+    sources = np.flatnonzero(live)
+    if act_numbers is not None and len(sources):
+        acts = np.concatenate([np.asarray(numbers) for numbers in act_numbers])
+        sources = sources[np.argsort(acts[sources], kind="stable")]
+    ordinals = np.full(len(live), -1, dtype=np.int64)
+    ordinals[sources] = np.arange(len(sources))
+
+    vocabulary: Dict[str, int] = {}
+    term_parts = [np.zeros(0, dtype=np.int64)]
+    doc_parts = [np.zeros(0, dtype=np.int64)]
+    tf_parts = [np.zeros(0, dtype=np.float32)]
+    for index, base in zip(indexes, bases):
+        terms = [""] * len(index.vocabulary)
+        for term, term_id in index.vocabulary.items():
+            terms[term_id] = term
+        term_map = np.fromiter(
+            (vocabulary.setdefault(term, len(vocabulary)) for term in terms),
+            dtype=np.int64,
+            count=len(terms)
+        )
+
+        docs = ordinals[base + np.asarray(index.postings_docs, dtype=np.int64)]
+        kept = docs >= 0
+        term_parts.append(np.repeat(term_map, np.diff(index.offsets))[kept])
+        doc_parts.append(docs[kept])
+        tf_parts.append(np.asarray(index.postings_tfs)[kept])
+
+    term_ids = np.concatenate(term_parts)
+    docs = np.concatenate(doc_parts)
+    tfs = np.concatenate(tf_parts)
+
+    # Drop terms that only occurred in removed documents
+    df = np.bincount(term_ids, minlength=len(vocabulary))
+    alive = df > 0
+    remap = np.cumsum(alive) - 1
+    term_ids = remap[term_ids]
+
+    merged = BM25Index(k1=k1, b=b, epsilon=epsilon)
+    merged.vocabulary = {
+        term: int(remap[term_id])
+        for term, term_id in vocabulary.items() if alive[term_id]
+    }
+    order = np.lexsort((docs, term_ids))
+    merged.postings_docs = docs[order].astype(np.int32)
+    merged.postings_tfs = tfs[order].astype(np.float32)
+    merged.offsets = np.zeros(len(merged.vocabulary) + 1, dtype=np.int64)
+    np.cumsum(df[alive], out=merged.offsets[1:])
+    merged.doc_lengths = np.concatenate(
+        [np.zeros(0, dtype=np.int32), *(np.asarray(index.doc_lengths) for index in indexes)]
+    )[sources].astype(np.int32)
+
+    merged._finalize()
+    return merged, sources
+
+
+# Writers of one artifact directory are serialized per process: the lock
+# guards manifest updates, the merge lock allows one merge at a time
+_directory_locks: Dict[str, Tuple[threading.Lock, threading.Lock]] = {}
+_directory_locks_guard = threading.Lock()
+
+
+def _locks(directory: Path) -> Tuple[threading.Lock, threading.Lock]:
+    """Return the (manifest lock, merge lock) of an artifact directory."""
+    key = str(Path(directory).resolve())
+    with _directory_locks_guard:
+        if key not in _directory_locks:
+            _directory_locks[key] = (threading.Lock(), threading.Lock())
+        return _directory_locks[key]
+
+
+def _write_json(path: Path, payload: Any, **kwargs: Any) -> None:
+    """Write a JSON file atomically, via a temporary file."""
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def _write_segment(
+    directory: Path,
+    index: BM25Index,
+    doc_ids: Sequence[str],
+    act_numbers: Optional[Sequence[int]] = None
+) -> Dict[str, Any]:
+    """
+    Write one segment under a fresh name.
+
+    Returns:
+        The segment's manifest entry.
+    """
+    if len(doc_ids) != index.n_docs:
+        raise ValueError(
+            f"doc_ids has {len(doc_ids)} entries but the index has {index.n_docs} documents"
+        )
+
+    name = f"{SEGMENT_PREFIX}{uuid.uuid4().hex[:12]}"
+    tmp_dir = directory / f"{name}.tmp"
+    tmp_dir.mkdir(parents=True)
+
+    for array_name in ARRAY_FILES:
+        np.save(tmp_dir / f"{array_name}.npy", getattr(index, array_name))
+    np.save(
+        tmp_dir / ACT_NUMBERS_FILE,
+        np.asarray(act_numbers if act_numbers is not None else [0] * index.n_docs, dtype=np.int32)
+    )
+
+    # Vocabulary is stored as a list in term-id order
+    vocabulary = [""] * len(index.vocabulary)
+    for term, term_id in index.vocabulary.items():
+        vocabulary[term_id] = term
+    _write_json(tmp_dir / VOCABULARY_FILE, vocabulary)
+    _write_json(tmp_dir / DOC_IDS_FILE, list(doc_ids))
+
+    tmp_dir.rename(directory / name)
+    return {
+        "name": name,
+        "n_docs": index.n_docs,
+        "n_terms": len(index.vocabulary),
+        "n_postings": int(index.offsets[-1]),
+        "deleted": [],
+    }
+
+
+def _read_segment_doc_ids(directory: Path, entry: Dict[str, Any]) -> List[str]:
+    """Read the doc-id table of a segment."""
+    with open(directory / entry["name"] / DOC_IDS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_segment(
+    directory: Path,
+    entry: Dict[str, Any],
+    k1: float = 1.5,
+    b: float = 0.75,
+    epsilon: float = 0.25
+) -> Tuple[BM25Index, List[str], np.ndarray]:
+    """
+    Memory-map one segment.
+
+    Returns:
+        (index, doc_ids, act_numbers). The index is not finalized.
+    """
+    segment_dir = directory / entry["name"]
+    index = BM25Index(k1=k1, b=b, epsilon=epsilon)
+    for name in ARRAY_FILES:
+        setattr(index, name, np.load(segment_dir / f"{name}.npy", mmap_mode="r"))
+
+    with open(segment_dir / VOCABULARY_FILE, "r", encoding="utf-8") as f:
+        index.vocabulary = {term: term_id for term_id, term in enumerate(json.load(f))}
+
+    act_numbers = np.load(segment_dir / ACT_NUMBERS_FILE, mmap_mode="r")
+    return index, _read_segment_doc_ids(directory, entry), act_numbers
+
+
+def _live_mask(entry: Dict[str, Any]) -> np.ndarray:
+    """Return the mask of a segment's documents that are not tombstoned."""
+    mask = np.ones(entry["n_docs"], dtype=bool)
+    mask[np.asarray(entry["deleted"], dtype=np.int64)] = False
+    return mask
+
+
+def _live_doc_count(segments: Sequence[Dict[str, Any]]) -> int:
+    """Count the documents of a segment list that are not tombstoned."""
+    return sum(entry["n_docs"] - len(entry["deleted"]) for entry in segments)
+
+
+def read_keyword_manifest(directory: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read the manifest of a keyword index artifact.
+
+    Args:
+        directory: Artifact directory.
+
+    Returns:
+        The manifest, or None if the artifact is missing or was written with
+        a different format version.
+    """
+    manifest_path = Path(directory) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != KEYWORD_INDEX_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def save_keyword_index(
+    directory: Path,
+    index: BM25Index,
+    doc_ids: Sequence[str],
+    collection_version: Optional[str],
+    act_numbers: Optional[Sequence[int]] = None
+) -> None:
+    """
+    Write a keyword index artifact made of a single segment.
+
+    The artifact is written to a temporary sibling directory and then moved
+    into place, so readers never see a half-written index.
+
+    Args:
+        directory: Target artifact directory.
+        index: The index to persist.
+        doc_ids: Chunk ids in ordinal order.
+        collection_version: Version of the collection the index was built from.
+        act_numbers: Act number of each document, used to keep acts
+            contiguous when segments are merged.
+    """
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    old_dir = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    segment = _write_segment(tmp_dir, index, doc_ids, act_numbers)
+    manifest = {
+        "format_version": KEYWORD_INDEX_FORMAT_VERSION,
+        "collection_version": collection_version,
+        "n_docs": index.n_docs,
+        "segments": [segment],
+    }
+    _write_json(tmp_dir / MANIFEST_FILE, manifest, indent=2)
+
+    with _locks(directory)[0]:
+        if directory.exists():
+            directory.rename(old_dir)
+        tmp_dir.rename(directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def append_keyword_segment(
+    directory: Path,
+    index: BM25Index,
+    doc_ids: Sequence[str],
+    collection_version: Optional[str],
+    base_version: Optional[str],
+    act_numbers: Optional[Sequence[int]] = None,
+    deleted_ids: Iterable[str] = ()
+) -> Optional[Dict[str, Any]]:
+    """
+    Apply an upsert or delete to a keyword index artifact incrementally.
+
+    The upserted documents are written as a new delta segment, and their
+    previous copies and the deleted documents are tombstoned in the older
+    segments. Nothing already indexed is re-tokenized.
+
+    Args:
+        directory: Artifact directory.
+        index: Index of the upserted documents only (may be empty).
+        doc_ids: Chunk ids of the upserted documents, in ordinal order.
+        collection_version: Collection version after the change.
+        base_version: Collection version the change was applied to. The
+            artifact must be at this version, or it would miss changes.
+        act_numbers: Act number of each upserted document.
+        deleted_ids: Chunk ids removed from the collection.
+
+    Returns:
+        The new manifest, or None if the artifact is missing or not at
+        base_version (a full rebuild is then needed).
+    """
+    directory = Path(directory)
+    with _locks(directory)[0]:
+        manifest = read_keyword_manifest(directory)
+        if manifest is None or manifest.get("collection_version") != base_version:
+            return None
+
+        removed = set(doc_ids)
+        removed.update(deleted_ids)
+        for entry in manifest["segments"]:
+            tombstones = [
+                ordinal
+                for ordinal, doc_id in enumerate(_read_segment_doc_ids(directory, entry))
+                if doc_id in removed
+            ]
+            if tombstones:
+                entry["deleted"] = sorted(set(entry["deleted"]).union(tombstones))
+
+        if index.n_docs:
+            manifest["segments"].append(_write_segment(directory, index, doc_ids, act_numbers))
+        manifest["collection_version"] = collection_version
+        manifest["n_docs"] = _live_doc_count(manifest["segments"])
+        _write_json(directory / MANIFEST_FILE, manifest, indent=2)
+        return manifest
+
+
+def needs_merge(
+    manifest: Dict[str, Any],
+    max_segments: int,
+    max_deleted_ratio: float
+) -> bool:
+    """
+    Return True if an artifact's segments should be merged.
+
+    Args:
+        manifest: Artifact manifest.
+        max_segments: Merge when there are more segments than this.
+        max_deleted_ratio: Merge when more than this fraction of the stored
+            documents are tombstoned.
+    """
+    segments = manifest["segments"]
+    stored = sum(entry["n_docs"] for entry in segments)
+    deleted = sum(len(entry["deleted"]) for entry in segments)
+    return len(segments) > max_segments or (stored > 0 and deleted / stored > max_deleted_ratio)
+
+
+def merge_keyword_segments(directory: Path) -> bool:
+    """
+    Merge all segments of a keyword index artifact into one.
+
+    The merge reads a snapshot of the segments and runs without blocking
+    upserts. Tombstones added to the snapshot segments in the meantime are
+    carried over to the merged segment, and segments appended in the
+    meantime are kept after it.
+
+    Args:
+        directory: Artifact directory.
+
+    Returns:
+        True if the merged segment was committed.
+    """
+    directory = Path(directory)
+    manifest_lock, merge_lock = _locks(directory)
+
+    with merge_lock:
+        with manifest_lock:
+            manifest = read_keyword_manifest(directory)
+        if manifest is None:
+            return False
+        snapshot = manifest["segments"]
+        if len(snapshot) <= 1 and not any(entry["deleted"] for entry in snapshot):
+            return False
+
+        segments = [_read_segment(directory, entry) for entry in snapshot]
+        merged, sources = merge_indexes(
+            [index for index, _, _ in segments],
+            [_live_mask(entry) for entry in snapshot],
+            [act_numbers for _, _, act_numbers in segments]
+        )
+        all_doc_ids = [doc_id for _, doc_ids, _ in segments for doc_id in doc_ids]
+        all_act_numbers = np.concatenate(
+            [np.zeros(0, dtype=np.int32), *(act_numbers for _, _, act_numbers in segments)]
+        )
+        segment = _write_segment(
+            directory,
+            merged,
+            [all_doc_ids[source] for source in sources],
+            all_act_numbers[sources]
+        )
+
+        with manifest_lock:
+            current = read_keyword_manifest(directory)
+            names = [entry["name"] for entry in snapshot]
+            if current is None or [
+                entry["name"] for entry in current["segments"][:len(snapshot)]
+            ] != names:
+                # The artifact was rebuilt while merging
+                shutil.rmtree(directory / segment["name"], ignore_errors=True)
+                return False
+
+            # Carry over tombstones added since the snapshot
+            merged_ordinals = np.full(len(all_doc_ids), -1, dtype=np.int64)
+            merged_ordinals[sources] = np.arange(len(sources))
+            base = 0
+            for before, after in zip(snapshot, current["segments"]):
+                added = sorted(set(after["deleted"]) - set(before["deleted"]))
+                segment["deleted"].extend(
+                    int(merged_ordinals[base + ordinal]) for ordinal in added
+                )
+                base += before["n_docs"]
+            segment["deleted"].sort()
+
+            current["segments"] = [segment] + current["segments"][len(snapshot):]
+            current["n_docs"] = _live_doc_count(current["segments"])
+            _write_json(directory / MANIFEST_FILE, current, indent=2)
+
+        for name in names:
+            shutil.rmtree(directory / name, ignore_errors=True)
+    return True
+
+
+def merge_in_background(directory: Path) -> threading.Thread:
+    """
+    Start merge_keyword_segments on a background thread.
+
+    The thread is not a daemon, so a process that started a merge finishes
+    it before exiting.
+
+    Args:
+        directory: Artifact directory.
+
+    Returns:
+        The started thread.
+    """
+    thread = threading.Thread(
+        target=merge_keyword_segments,
+        args=(Path(directory),),
+        name="keyword-index-merge"
+    )
+    thread.start()
+    return thread
+
+
+def load_keyword_index(
+    directory: Path,
+    k1: float = 1.5,
+    b: float = 0.75,
+    epsilon: float = 0.25
+) -> Optional[Tuple[BM25Index, List[str], Dict[str, Any]]]:
+    """
+    Load a keyword index artifact.
+
+    A single segment without tombstones is memory-mapped as is. Otherwise
+    the live postings of all segments are merged in memory, so statistics
+    never count tombstoned documents. IDF values and length norms are
+    recomputed from the stored statistics, so changing k1/b does not require
+    re-ingestion.
+
+    Args:
+        directory: Artifact directory written by save_keyword_index.
+        k1: Term frequency saturation parameter.
+        b: Document length normalization parameter.
+        epsilon: IDF floor factor.
+
+    Returns:
+        (index, doc_ids, manifest), or None if the artifact is missing or
+        was written with a different format version.
+    """
+    directory = Path(directory)
+    for attempt in range(2):
+        manifest = read_keyword_manifest(directory)
+        if manifest is None:
+            return None
+        try:
+            segments = [
+                _read_segment(directory, entry, k1=k1, b=b, epsilon=epsilon)
+                for entry in manifest["segments"]
+            ]
+            break
+        except FileNotFoundError:
+            # A merge replaced the segments after the manifest was read
+            if attempt:
+                raise
+
+    entries = manifest["segments"]
+    if len(entries) == 1 and not entries[0]["deleted"]:
+        index, doc_ids, _ = segments[0]
+        index._finalize()
+        return index, doc_ids, manifest
+
+    index, sources = merge_indexes(
+        [index for index, _, _ in segments],
+        [_live_mask(entry) for entry in entries],
+        [act_numbers for _, _, act_numbers in segments],
+        k1=k1,
+        b=b,
+        epsilon=epsilon
+    )
+    all_doc_ids = [doc_id for _, doc_ids, _ in segments for doc_id in doc_ids]
+    return index, [all_doc_ids[source] for source in sources], manifest
@@ -0,0 +1,224 @@
+"""
+Caching Utilities for Malaysian Legal RAG
+
+This module provides the caches used by the retriever to keep hot queries
+off the critical path:
+- LRUCache: a small thread-safe LRU with hit/miss/eviction counters
+- ResultCache: a two-tier (in-process + shared SQLite) retrieval result
+  cache invalidated by the collection version
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded, thread-safe least-recently-used cache with statistics."""
+
+    def __init__(self, max_size: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries. 0 disables caching.
+        """
+        self.max_size = max_size
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key (marking it recent), or None."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (statistics are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the hit ratio."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ResultCache:
+    """
+    Two-tier cache of retrieval results.
+
+    Tier 1 is an in-process LRUCache. Tier 2 is an optional SQLite file that
+    several Streamlit/worker processes can share. Every entry is tagged with
+    the collection version; when the version reported by version_provider
+    changes (e.g. after ingest_chunks_to_chroma), both tiers are invalidated.
+
+    Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        version_provider: Callable[[], Optional[str]],
+        disk_path: Optional[Path] = None,
+        disk_max_size: int = 10000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum entries in the in-process tier (0 disables it).
+            version_provider: Returns the current collection version.
+            disk_path: SQLite file for the shared tier, or None to disable it.
+            disk_max_size: Maximum entries in the shared tier.
+        """
+        self.memory = LRUCache(max_size)
+        self.version_provider = version_provider
+        self.disk_path = disk_path
+        self.disk_max_size = disk_max_size
+
+        self._version = version_provider()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        self.invalidations = 0
+
+        if disk_path is not None:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(disk_path),
+                timeout=5.0,
+                check_same_thread=False
+            )
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, version TEXT, value TEXT, accessed REAL)"
+                )
+
+    @staticmethod
+    def _disk_key(key: Hashable) -> str:
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def _check_version(self) -> Optional[str]:
+        """Invalidate both tiers if the collection version has changed."""
+        version = self.version_provider()
+        if version != self._version:
+            self.memory.clear()
+            if self._conn is not None:
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "DELETE FROM results WHERE version IS NOT ?", (version,)
+                    )
+            self._version = version
+            self.invalidations += 1
+        return version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        version = self._check_version()
+
+        value = self.memory.get(key)
+        if value is not None or self._conn is None:
+            return value
+
+        disk_key = self._disk_key(key)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ? AND version IS ?",
+                (disk_key, version)
+            ).fetchone()
+            if row is None:
+                self.disk_misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?",
+                (time.time(), disk_key)
+            )
+            self.disk_hits += 1
+
+        value = json.loads(row[0])
+        self.memory.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value in both tiers."""
+        version = self._check_version()
+        self.memory.put(key, value)
+
+        if self._conn is None:
+            return
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, version, value, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (self._disk_key(key), version, json.dumps(value), time.time())
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            overflow = count - self.disk_max_size
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                    (overflow,)
+                )
+                self.disk_evictions += overflow
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-tier statistics and the overall hit ratio."""
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.disk_hits
+        stats: Dict[str, Any] = {
+            "memory": memory,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "version": self._version,
+        }
+        if self._conn is not None:
+            disk_lookups = self.disk_hits + self.disk_misses
+            stats["disk"] = {
+                "path": str(self.disk_path),
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "evictions": self.disk_evictions,
+                "hit_ratio": self.disk_hits / disk_lookups if disk_lookups else 0.0,
+            }
+        return stats
@@ -0,0 +1,155 @@
+"""
+On-disk Chunk Text Store for Malaysian Legal RAG
+
+This module keeps chunk text out of the retriever's heap.
+
+All chunk texts are written, UTF-8 encoded and back to back, into one
+memory-mapped byte array, with an int64 offset table (n_docs + 1 entries) in
+document-store ordinal order. Reading a chunk decodes one slice of the map,
+so only the pages of chunks that are actually shown (context formatting, the
+UI) are ever touched, and resident memory does not grow with the corpus.
+
+The artifact lives in get_chunk_store_dir() / <collection name>, tagged with
+the collection version it was written from, like the keyword and vector
+index artifacts.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bump when the on-disk layout changes
+CHUNK_STORE_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+DOC_IDS_FILE = "doc_ids.json"
+TEXTS_FILE = "texts.npy"
+OFFSETS_FILE = "offsets.npy"
+
+
+class ChunkTextStore:
+    """
+    Read-only sequence of chunk texts backed by a memory-mapped byte array.
+
+    Supports len(), indexing by ordinal and iteration, so it can stand in
+    for the list of texts a DocumentStore is built from.
+    """
+
+    def __init__(self, texts: np.ndarray, offsets: np.ndarray):
+        """
+        Wrap the text bytes and their offsets.
+
+        Args:
+            texts: uint8 array of all chunk texts, UTF-8 encoded.
+            offsets: int64 array; text i is texts[offsets[i]:offsets[i + 1]].
+        """
+        self.texts = texts
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, ordinal: int) -> str:
+        start, end = self.offsets[ordinal], self.offsets[ordinal + 1]
+        return self.texts[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for ordinal in range(len(self)):
+            yield self[ordinal]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded texts in bytes."""
+        return int(self.offsets[-1]) if len(self.offsets) else 0
+
+
+def save_chunk_store(
+    directory: Path,
+    doc_ids: Sequence[str],
+    documents: Sequence[Optional[str]],
+    collection_version: Optional[str]
+) -> None:
+    """
+    Write a chunk text store artifact.
+
+    The artifact is written to a temporary sibling directory and then moved
+    into place, so readers never see a half-written store.
+
+    Args:
+        directory: Target artifact directory.
+        doc_ids: Chunk ids in ordinal order.
+        documents: Chunk texts, one per doc id (None is stored as "").
+        collection_version: Version of the collection the texts came from.
+    """
+    if len(documents) != len(doc_ids):
+        raise ValueError(
+            f"Expected one text per doc id, got {len(documents)} "
+            f"for {len(doc_ids)} doc ids"
+        )
+
+    encoded = [(doc or "").encode("utf-8") for doc in documents]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in encoded], out=offsets[1:])
+
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    old_dir = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    np.save(tmp_dir / TEXTS_FILE, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(tmp_dir / OFFSETS_FILE, offsets)
+
+    with open(tmp_dir / DOC_IDS_FILE, "w", encoding="utf-8") as f:
+        json.dump(list(doc_ids), f, ensure_ascii=False)
+
+    manifest = {
+        "format_version": CHUNK_STORE_FORMAT_VERSION,
+        "collection_version": collection_version,
+        "n_docs": len(doc_ids),
+        "n_bytes": int(offsets[-1]),
+    }
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if directory.exists():
+        directory.rename(old_dir)
+    tmp_dir.rename(directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_chunk_store(
+    directory: Path
+) -> Optional[Tuple[ChunkTextStore, List[str], Dict[str, Any]]]:
+    """
+    Load a chunk text store artifact, memory-mapping the texts.
+
+    Args:
+        directory: Artifact directory written by save_chunk_store.
+
+    Returns:
+        (store, doc_ids, manifest), or None if the artifact is missing or
+        was written with a different format version.
+    """
+    directory = Path(directory)
+    manifest_path = directory / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != CHUNK_STORE_FORMAT_VERSION:
+        return None
+
+    texts = np.load(directory / TEXTS_FILE, mmap_mode="r")
+    offsets = np.load(directory / OFFSETS_FILE)
+
+    with open(directory / DOC_IDS_FILE, "r", encoding="utf-8") as f:
+        doc_ids = json.load(f)
+
+    return ChunkTextStore(texts, offsets), doc_ids, manifest
@@ -0,0 +1,308 @@
+"""
+Section Citation Index for Malaysian Legal RAG
+
+This module answers queries that cite a section directly ("Section 10 free
+consent", "s. 24 Specific Relief Act") without going through embedding or
+BM25 search.
+
+The index is built at ingestion from chunk metadata and maps
+(act_number, section_number) to the chunk ids of that section, in part
+order (act_136_s74_1, act_136_s74_2, ...). Only one occurrence of a section
+number in an act is indexed. A section number can occur several times: in
+the arrangement of sections (the act's table of contents), in the body, and
+in schedules or amending acts. The chunker numbers them in text order,
+suffixing all but the first with "_dupN", so the first occurrence is often
+just the one-line arrangement entry.
+
+The indexed occurrence is therefore the first one in the body. The body is
+taken to start at the first occurrence of the act's lowest-numbered section,
+and the occurrences before it form the arrangement table. Chunk metadata
+without a start_position (collections ingested before it was stored) falls
+back to the first occurrence.
+
+A citation is unambiguous when it resolves to exactly one act and section,
+either because the query names the act ("Act 137", "Specific Relief Act")
+or because only one loaded act has that section.
+"""
+
+import json
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from retrieval.document_store import section_index
+
+# Bump when the on-disk layout changes
+CITATION_INDEX_FORMAT_VERSION = 2
+
+# "Section 10", "sections 10A", "sec. 5", "s. 24", "s24"
+CITATION_PATTERN = re.compile(
+    r"(?<![\w'’])(?:sections?|sec\.?|s\.)\s*(\d+[a-z]{0,2})\b"
+    r"|(?<![\w'’])s\s?(\d+[a-z]{0,2})\b",
+    re.IGNORECASE
+)
+# "Act 136", "Act No. 136"
+ACT_NUMBER_PATTERN = re.compile(r"\bact\s*(?:no\.?\s*)?(\d+)\b", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"\s*\b\d{4}\b")
+PARENTHESES_PATTERN = re.compile(r"\s*\([^)]*\)")
+CHUNK_SUFFIX_PATTERN = re.compile(r"_s[^_]+(?:_(\d+))?(?:_dup(\d+))?$")
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and collapse whitespace."""
+    return " ".join(text.lower().split())
+
+
+def act_aliases(act_name: str) -> List[str]:
+    """
+    Return the normalized names an act can be cited by.
+
+    "Housing Development (Control and Licensing) Act 1966" can be cited with
+    or without its year and parenthesized qualifier.
+    """
+    name = _normalize(YEAR_PATTERN.sub("", act_name))
+    aliases = [name, _normalize(PARENTHESES_PATTERN.sub("", name))]
+    return [alias for alias in dict.fromkeys(aliases) if alias]
+
+
+def chunk_part(chunk_id: str) -> Optional[Tuple[int, int]]:
+    """
+    Return (occurrence, part) of a section chunk, or None for other chunks.
+
+    The occurrence is N for a "_dupN" chunk and 0 otherwise; unsplit
+    sections are part 0.
+    """
+    match = CHUNK_SUFFIX_PATTERN.search(chunk_id)
+    if match is None:
+        return None
+    return int(match.group(2) or 0), int(match.group(1) or 0)
+
+
+@dataclass
+class CitationMatch:
+    """Chunks cited by a query."""
+    doc_ids: List[str]
+    sections: List[Tuple[int, str]]  # (act_number, section_number) resolved
+
+    @property
+    def unambiguous(self) -> bool:
+        """True if the query cites exactly one section of one act."""
+        return len(self.sections) == 1
+
+
+class CitationIndex:
+    """Maps (act_number, section_number) to the chunk ids of that section."""
+
+    def __init__(
+        self,
+        sections: Dict[Tuple[int, str], List[str]],
+        act_names: Dict[int, str]
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            sections: (act_number, upper-cased section number) -> chunk ids
+                in part order.
+            act_names: act_number -> act name.
+        """
+        self.sections = sections
+        self.act_names = act_names
+
+        self._acts_by_section: Dict[str, List[int]] = defaultdict(list)
+        for act_number, section_number in sorted(sections):
+            self._acts_by_section[section_number].append(act_number)
+
+        self._aliases: List[Tuple[str, int]] = sorted(
+            (
+                (alias, act_number)
+                for act_number, act_name in act_names.items()
+                for alias in act_aliases(act_name)
+            ),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+
+    @classmethod
+    def build(
+        cls,
+        doc_ids: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]]
+    ) -> "CitationIndex":
+        """
+        Build the index from chunk ids and their metadata.
+
+        Args:
+            doc_ids: Chunk ids.
+            metadatas: Chunk metadata dicts (act_number, act_name,
+                section_number, start_position).
+
+        Returns:
+            A CitationIndex.
+        """
+        # (act, section) -> occurrence -> [(part, doc_id)]; an occurrence is
+        # keyed by its start position in the act, else by its "_dupN" number
+        occurrences: Dict[Tuple[int, str], Dict[Tuple[int, int], List[Tuple[int, str]]]] = (
+            defaultdict(lambda: defaultdict(list))
+        )
+        act_names: Dict[int, str] = {}
+
+        for doc_id, metadata in zip(doc_ids, metadatas):
+            metadata = metadata or {}
+            act_number = metadata.get("act_number") or 0
+            section_number = str(metadata.get("section_number") or "").upper()
+            if metadata.get("act_name"):
+                act_names[act_number] = metadata["act_name"]
+
+            parsed = chunk_part(doc_id)
+            if parsed is None or not section_number[:1].isdigit():
+                continue
+            duplicate, part = parsed
+            position = metadata.get("start_position")
+            occurrence = (duplicate, 0) if position is None else (0, position)
+            occurrences[(act_number, section_number)][occurrence].append((part, doc_id))
+
+        # Where each act's body starts: the first occurrence of its
+        # lowest-numbered section (only known with start positions)
+        body_starts: Dict[int, Tuple[int, int]] = {}
+        for act_number, section_number in sorted(
+            occurrences, key=lambda key: (key[0], section_index(key[1]), key[1])
+        ):
+            body_starts.setdefault(
+                act_number, min(occurrences[(act_number, section_number)])
+            )
+
+        sections = {}
+        for key, found in occurrences.items():
+            ordered = sorted(found)
+            in_body = [occurrence for occurrence in ordered if occurrence >= body_starts[key[0]]]
+            chosen = in_body[0] if in_body else ordered[0]
+            sections[key] = [doc_id for _, doc_id in sorted(found[chosen])]
+        return cls(sections, act_names)
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def cited_acts(self, query: str) -> List[int]:
+        """Return the act numbers a query names, by number or by name."""
+        acts = [
+            int(number) for number in ACT_NUMBER_PATTERN.findall(query)
+            if int(number) in self.act_names
+        ]
+
+        text = _normalize(query)
+        for alias, act_number in self._aliases:
+            if alias in text:
+                acts.append(act_number)
+                text = text.replace(alias, " ")
+        return list(dict.fromkeys(acts))
+
+    def match(
+        self,
+        query: str,
+        act_numbers: Optional[Iterable[int]] = None
+    ) -> Optional[CitationMatch]:
+        """
+        Resolve the section citations in a query.
+
+        Args:
+            query: The user's question.
+            act_numbers: Acts the search is restricted to, if any.
+
+        Returns:
+            CitationMatch, or None if the query cites no indexed section.
+        """
+        cited = [
+            (first or second).upper()
+            for first, second in CITATION_PATTERN.findall(query)
+        ]
+        if not cited:
+            return None
+
+        # Acts the citation may refer to (None: any loaded act)
+        acts: Optional[List[int]] = self.cited_acts(query) or None
+        if act_numbers is not None:
+            allowed = set(act_numbers)
+            acts = [act for act in acts if act in allowed] if acts else sorted(allowed)
+
+        sections: List[Tuple[int, str]] = []
+        for section_number in dict.fromkeys(cited):
+            for act_number in self._acts_by_section.get(section_number, []):
+                if acts is None or act_number in acts:
+                    sections.append((act_number, section_number))
+
+        if not sections:
+            return None
+        return CitationMatch(
+            doc_ids=[doc_id for key in sections for doc_id in self.sections[key]],
+            sections=sections
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "sections": [
+                [act_number, section_number, doc_ids]
+                for (act_number, section_number), doc_ids in sorted(self.sections.items())
+            ],
+            "act_names": {str(act): name for act, name in self.act_names.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CitationIndex":
+        """Rebuild an index from to_dict() output."""
+        return cls(
+            {(act, section): doc_ids for act, section, doc_ids in data["sections"]},
+            {int(act): name for act, name in data["act_names"].items()}
+        )
+
+
+def save_citation_index(
+    path: Path,
+    index: CitationIndex,
+    collection_version: Optional[str]
+) -> None:
+    """
+    Write a citation index artifact (atomically, via a temporary file).
+
+    Args:
+        path: Target JSON file.
+        index: The index to persist.
+        collection_version: Version of the collection the index was built from.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "format_version": CITATION_INDEX_FORMAT_VERSION,
+        "collection_version": collection_version,
+        **index.to_dict(),
+    }
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_citation_index(path: Path) -> Optional[Tuple[CitationIndex, Optional[str]]]:
+    """
+    Load a citation index artifact.
+
+    Args:
+        path: JSON file written by save_citation_index.
+
+    Returns:
+        (index, collection_version), or None if the artifact is missing or
+        was written with a different format version.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("format_version") != CITATION_INDEX_FORMAT_VERSION:
+        return None
+    return CitationIndex.from_dict(payload), payload.get("collection_version")
@@ -0,0 +1,294 @@
+"""
+Columnar Document Store for Malaysian Legal RAG
+
+This module holds the chunk text and citation metadata used to build
+retrieval results. The text is usually a memory-mapped ChunkTextStore, so it
+is only read for the chunks whose content is actually used.
+
+Instead of a list of per-chunk metadata dicts searched with list.index(),
+the store keeps:
+- An id -> ordinal hash index for O(1) lookups
+- Compact columns for each metadata field: low-cardinality strings (act
+  name, part, section number) are dictionary-encoded into integer codes,
+  numeric fields live in NumPy arrays
+- Precomputed per-act and per-part bitmaps used to resolve metadata filters
+  (RetrievalFilter) into the subset of documents a search may score
+"""
+
+import re
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from retrieval.bm25_index import DocSubset
+from retrieval.cache import LRUCache
+from retrieval.chunk_store import ChunkTextStore
+
+SECTION_NUMBER_PATTERN = re.compile(r"^(\d+)")
+
+
+@dataclass(frozen=True)
+class RetrievalFilter:
+    """
+    Metadata filter for retrieval.
+
+    All given conditions must hold. Parts match either exactly or by their
+    identifier, so "Part II" matches "Part II - SPECIFIC RELIEF". Section
+    ranges compare the numeric part of the section number (5A counts as 5)
+    and are inclusive; chunks without a numbered section never match.
+    """
+    act_numbers: Optional[Tuple[int, ...]] = None
+    parts: Optional[Tuple[str, ...]] = None
+    section_range: Optional[Tuple[int, int]] = None
+
+    def __post_init__(self):
+        # Accept lists, but store tuples so filters can be cache keys
+        for name in ("act_numbers", "parts", "section_range"):
+            value = getattr(self, name)
+            if value is not None:
+                object.__setattr__(self, name, tuple(value))
+
+    def is_empty(self) -> bool:
+        """Return True if the filter has no conditions."""
+        return not (self.act_numbers or self.parts or self.section_range)
+
+
+def section_index(section_number: Optional[str]) -> int:
+    """Return the leading number of a section (e.g. 5 for "5A"), or -1."""
+    match = SECTION_NUMBER_PATTERN.match(str(section_number or ""))
+    return int(match.group(1)) if match else -1
+
+
+def act_order(metadatas: Sequence[Optional[Dict[str, Any]]]) -> List[int]:
+    """
+    Return positions that group documents by act number.
+
+    The sort is stable, so chunks keep their original (document) order
+    within an act. Indexing in this order makes every act, and every part
+    within it, a contiguous range of ordinals.
+    """
+    return sorted(
+        range(len(metadatas)),
+        key=lambda i: (metadatas[i] or {}).get("act_number", 0) or 0
+    )
+
+
+class CategoricalColumn:
+    """A dictionary-encoded string column (value table + integer codes)."""
+
+    def __init__(self, values: Iterable[str]):
+        """
+        Encode a sequence of strings.
+
+        Args:
+            values: Column values in ordinal order.
+        """
+        self.categories: List[str] = []
+        lookup: Dict[str, int] = {}
+        codes: List[int] = []
+
+        for value in values:
+            code = lookup.get(value)
+            if code is None:
+                code = len(self.categories)
+                lookup[value] = code
+                self.categories.append(value)
+            codes.append(code)
+
+        self.codes = np.asarray(codes, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, ordinal: int) -> str:
+        return self.categories[self.codes[ordinal]]
+
+
+class DocumentStore:
+    """
+    Columnar store of chunk text and metadata, addressed by ordinal.
+
+    Ordinals are the positions used by the keyword index, so a BM25 hit can
+    be turned into a result without any id lookup.
+    """
+
+    def __init__(
+        self,
+        doc_ids: Sequence[str],
+        documents: Sequence[Optional[str]],
+        metadatas: Sequence[Optional[Dict[str, Any]]]
+    ):
+        """
+        Build the store from parallel lists as returned by Chroma.
+
+        Args:
+            doc_ids: Chunk ids.
+            documents: Chunk texts (None is stored as ""), or a
+                ChunkTextStore in the same order, which is kept on disk.
+            metadatas: Chunk metadata dicts (None is treated as empty).
+        """
+        self.doc_ids: List[str] = list(doc_ids)
+        self._ordinals: Dict[str, int] = {
+            doc_id: i for i, doc_id in enumerate(self.doc_ids)
+        }
+        self.documents: Sequence[str] = (
+            documents if isinstance(documents, ChunkTextStore)
+            else [doc if doc is not None else "" for doc in documents]
+        )
+
+        metadatas = [metadata or {} for metadata in metadatas]
+
+        self.act_name = CategoricalColumn(m.get("act_name", "") for m in metadatas)
+        self.part = CategoricalColumn(m.get("part", "") for m in metadatas)
+        self.section_number = CategoricalColumn(
+            str(m.get("section_number", "")) for m in metadatas
+        )
+        self.section_title: List[str] = [
+            sys.intern(m.get("section_title", "")) for m in metadatas
+        ]
+        self.act_number = np.asarray(
+            [m.get("act_number", 0) or 0 for m in metadatas],
+            dtype=np.int32
+        )
+        self.token_count = np.asarray(
+            [m.get("token_count", 0) or 0 for m in metadatas],
+            dtype=np.int32
+        )
+        section_indexes = np.asarray(
+            [section_index(value) for value in self.section_number.categories],
+            dtype=np.int32
+        )
+        self.section_index = section_indexes[self.section_number.codes]
+
+        # Packed per-act and per-part membership bitmaps
+        self.act_bitmaps: Dict[int, np.ndarray] = self._bitmaps(self.act_number)
+        self.part_bitmaps: Dict[int, np.ndarray] = self._bitmaps(self.part.codes)
+        self._subsets = LRUCache(128)
+
+    def _bitmaps(self, column: np.ndarray) -> Dict[int, np.ndarray]:
+        """Build a packed bitmap of ordinals for each distinct column value."""
+        bitmaps: Dict[int, np.ndarray] = {}
+        order = np.argsort(column, kind="stable")
+        values, starts = np.unique(column[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for value, start, end in zip(values, starts, ends):
+            members = np.zeros(len(column), dtype=bool)
+            members[order[start:end]] = True
+            bitmaps[int(value)] = np.packbits(members)
+        return bitmaps
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._ordinals
+
+    def ordinal(self, doc_id: str) -> Optional[int]:
+        """Return the ordinal of a chunk id, or None if it is not stored."""
+        return self._ordinals.get(doc_id)
+
+    def content(self, ordinal: int) -> str:
+        """Return the text of the chunk at an ordinal."""
+        return self.documents[ordinal]
+
+    def _matching_parts(self, parts: Sequence[str]) -> List[int]:
+        """Return the part codes matched by the requested part names."""
+        wanted = [part.strip().lower() for part in parts]
+        return [
+            code for code, category in enumerate(self.part.categories)
+            if category and any(
+                category.lower() == part or category.lower().startswith(part + " ")
+                for part in wanted
+            )
+        ]
+
+    def resolve_filter(self, spec: Optional[RetrievalFilter]) -> Optional[DocSubset]:
+        """
+        Resolve a filter into the subset of ordinals it allows.
+
+        Combines the precomputed act and part bitmaps with the section
+        range. Resolved subsets are cached per filter.
+
+        Args:
+            spec: The filter, or None.
+
+        Returns:
+            DocSubset of allowed ordinals, or None if the filter is empty.
+        """
+        if spec is None or spec.is_empty():
+            return None
+
+        cached = self._subsets.get(spec)
+        if cached is not None:
+            return cached
+
+        n_bytes = (len(self) + 7) // 8
+        bitmap = np.full(n_bytes, 0xFF, dtype=np.uint8)
+        empty = np.zeros(n_bytes, dtype=np.uint8)
+
+        if spec.act_numbers:
+            acts = empty.copy()
+            for act_number in spec.act_numbers:
+                acts |= self.act_bitmaps.get(int(act_number), empty)
+            bitmap &= acts
+
+        if spec.parts:
+            parts = empty.copy()
+            for code in self._matching_parts(spec.parts):
+                parts |= self.part_bitmaps.get(code, empty)
+            bitmap &= parts
+
+        if spec.section_range:
+            low, high = spec.section_range
+            bitmap &= np.packbits(
+                (self.section_index >= low) & (self.section_index <= high)
+            )
+
+        subset = DocSubset(bitmap, len(self))
+        self._subsets.put(spec, subset)
+        return subset
+
+    def where_clause(self, spec: Optional[RetrievalFilter]) -> Optional[Dict[str, Any]]:
+        """
+        Translate a filter into a Chroma where clause.
+
+        Part names and section ranges are expanded into the exact stored
+        values they match.
+
+        Args:
+            spec: The filter, or None.
+
+        Returns:
+            Chroma where dict, or None if the filter is empty.
+        """
+        if spec is None or spec.is_empty():
+            return None
+
+        conditions: List[Dict[str, Any]] = []
+        if spec.act_numbers:
+            conditions.append({"act_number": {"$in": [int(a) for a in spec.act_numbers]}})
+        if spec.parts:
+            conditions.append({"part": {"$in": [
+                self.part.categories[code] for code in self._matching_parts(spec.parts)
+            ]}})
+        if spec.section_range:
+            low, high = spec.section_range
+            conditions.append({"section_number": {"$in": [
+                value for value in self.section_number.categories
+                if low <= section_index(value) <= high
+            ]}})
+
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def metadata(self, ordinal: int) -> Dict[str, Any]:
+        """Return the metadata of the chunk at an ordinal as a dict."""
+        return {
+            "act_name": self.act_name[ordinal],
+            "act_number": int(self.act_number[ordinal]),
+            "part": self.part[ordinal],
+            "section_number": self.section_number[ordinal],
+            "section_title": self.section_title[ordinal],
+            "token_count": int(self.token_count[ordinal]),
+        }
@@ -2,45 +2,192 @@
 Hybrid Retriever for Malaysian Legal RAG
 
 This module implements a hybrid search combining:
-1. Semantic Search: Vector similarity using ChromaDB embeddings
-2. Keyword Search: BM25-based exact term matching
+1. Semantic Search: Vector similarity using ChromaDB embeddings, either
+   through Chroma's HNSW index or exactly, with one matrix product over the
+   exported embedding matrix (semantic_backend="exact"), optionally over an
+   int8/binary quantized copy with full-precision rescoring
+2. Keyword Search: BM25-based exact term matching (sparse inverted index)
 
 Hybrid search is critical for legal documents because:
 - Legal terms like "consideration" have specific meanings
 - Semantic search alone may miss exact terminology
 - BM25 provides precision; vectors provide recall
 
-The retriever uses Reciprocal Rank Fusion (RRF) to combine results.
+The retriever uses Reciprocal Rank Fusion (RRF) to combine results. In hybrid
+mode both searches run concurrently, each with its own deadline; if one misses
+it, results are fused from the other alone and marked as degraded.
+
+Queries that cite a section ("Section 10 free consent") are first looked up in
+the section citation index, and the cited chunks are ranked ahead of search
+results. An unambiguous citation (one act, one section) skips the embedding
+call entirely and only uses BM25 to fill the remaining slots.
+
+aretrieve() is the coroutine version of retrieve() for asyncio services: the
+search runs on a small, bounded thread pool, so the event loop is never
+blocked and concurrent requests queue for a worker instead of each holding a
+thread.
+
+All indexes built from one collection version form an IndexGeneration.
+reload() loads a new generation in the background and swaps it in with a
+single assignment; queries pin the generation they started on, so in-flight
+queries finish on the old one. A watcher thread can trigger reloads when
+ingestion records a new collection version.
+
+With config.tracing, each retrieve() records a trace (see tracing.py) with
+spans for the citation lookup, query embedding, the Chroma or exact vector
+query, BM25 scoring and fusion, including candidate counts and cache hits.
 """
 
-import re
+import asyncio
+import functools
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Tuple, Any
+from typing import Optional, List, Dict, Sequence, Tuple, Any, Callable
 
-from rank_bm25 import BM25Okapi
+import numpy as np
 
+import tracing
 from config import (
     RAGConfig,
+    get_cache_dir,
+    get_chunk_store_dir,
+    get_keyword_index_dir,
     get_vector_db_dir,
+    get_vector_index_dir,
     setup_logging
 )
+from ingestion.vector_ingest import (
+    build_chunk_store,
+    build_vector_index,
+    get_citation_index_path,
+    get_collection_version
+)
+from retrieval.bm25_index import (
+    Analyzer,
+    BM25Index,
+    DocSubset,
+    load_keyword_index,
+    tokenize,
+)
+from retrieval.cache import ResultCache
+from retrieval.chunk_store import load_chunk_store
+from retrieval.citation_index import CitationIndex, CitationMatch, load_citation_index
+from retrieval.document_store import DocumentStore, RetrievalFilter, act_order
+from retrieval.query_embedder import QueryEmbedder, normalize_query
+from retrieval.vector_index import VectorIndex, load_vector_index
 
 # Configure logging
 logger = setup_logging(__name__)
 
 
-@dataclass
 class RetrievalResult:
-    """A single retrieval result with metadata."""
-    chunk_id: str
-    content: str
-    act_name: str
-    act_number: int
-    section_number: str
-    section_title: str
-    score: float
-    retrieval_method: str  # "semantic", "keyword", or "hybrid"
+    """
+    A single retrieval result with metadata.
+    
+    A slotted class rather than a dataclass: results are built for every
+    query, and their text is read lazily. Results made by the retriever
+    carry their document store and ordinal instead of the chunk text, which
+    is only read from the (memory-mapped) store when content is accessed,
+    e.g. by format_context() or the UI.
+    """
+    
+    __slots__ = (
+        "chunk_id",
+        "act_name",
+        "act_number",
+        "section_number",
+        "section_title",
+        "score",
+        "retrieval_method",  # "semantic", "keyword", "hybrid", or "citation"
+        "degraded",  # "keyword_only"/"semantic_only" if a leg missed its deadline
+        "_content",
+        "_store",
+        "_ordinal",
+    )
+    
+    FIELDS = (
+        "chunk_id", "content", "act_name", "act_number", "section_number",
+        "section_title", "score", "retrieval_method", "degraded"
+    )
+    
+    def __init__(
+        self,
+        chunk_id: str,
+        content: Optional[str],
+        act_name: str,
+        act_number: int,
+        section_number: str,
+        section_title: str,
+        score: float,
+        retrieval_method: str,
+        degraded: Optional[str] = None,
+        store: Optional[DocumentStore] = None,
+        ordinal: int = -1
+    ):
+        """
+        Create a result.
+        
+        Args:
+            content: The chunk text, or None to read it from store on access.
+            store: Document store holding the text (with content=None).
+            ordinal: The chunk's ordinal in store.
+        """
+        self.chunk_id = chunk_id
+        self._content = content
+        self.act_name = act_name
+        self.act_number = act_number
+        self.section_number = section_number
+        self.section_title = section_title
+        self.score = score
+        self.retrieval_method = retrieval_method
+        self.degraded = degraded
+        self._store = store
+        self._ordinal = ordinal
+    
+    @property
+    def content(self) -> str:
+        """The chunk text (read from the document store if not given)."""
+        if self._content is None:
+            return self._store.content(self._ordinal) if self._store is not None else ""
+        return self._content
+    
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+    
+    def to_dict(self, include_content: bool = True) -> Dict[str, Any]:
+        """Return the result's fields as a dict (without content if asked)."""
+        return {
+            name: getattr(self, name)
+            for name in self.FIELDS
+            if include_content or name != "content"
+        }
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RetrievalResult):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={value!r}" for name, value in self.to_dict(include_content=False).items()
+        )
+        return f"RetrievalResult({fields})"
+
+
+@dataclass
+class IndexGeneration:
+    """The indexes built from one collection version, swapped in as a unit."""
+    version: Optional[str]
+    collection: Any
+    store: DocumentStore
+    bm25: Optional[BM25Index] = None
+    analyzer: Optional[Analyzer] = None
+    citations: Optional[CitationIndex] = None
+    vectors: Optional[VectorIndex] = None
 
 
 class HybridRetriever:
@@ -69,138 +216,534 @@ class HybridRetriever:
         self.rrf_k = self.config.rrf_k
         
         # Initialize components
-        self._collection: Any = None
-        self._bm25: Optional[BM25Okapi] = None
-        self._documents: List[str] = []
-        self._doc_ids: List[str] = []
-        self._doc_metadata: List[Dict[str, Any]] = []
+        self._client: Any = None
+        self._embedder: Optional[QueryEmbedder] = None
+        self._generation = IndexGeneration(
+            version=None,
+            collection=None,
+            store=DocumentStore([], [], [])
+        )
+        self._result_cache: Optional[ResultCache] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(2, self.config.search_workers),
+            thread_name_prefix="hybrid-retriever"
+        )
+        
+        # Where finished traces go (None = not exported)
+        self._trace_exporter = tracing.exporter_for(self.config)
+        
+        # aretrieve() runs retrievals here, off the event loop; kept apart
+        # from the search pool, which retrieve() itself waits on
+        self._async_executor = ThreadPoolExecutor(
+            max_workers=max(1, self.config.async_retrieval_workers),
+            thread_name_prefix="hybrid-retriever-async"
+        )
+        
+        # Reloads run one at a time, off the search pool
+        self._reload_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="hybrid-retriever-reload"
+        )
+        self._reload_lock = threading.Lock()
+        self._reload_future: Optional[Future] = None
+        self._watch_stop: Optional[threading.Event] = None
         
         self._initialize()
+        
+        if self.config.index_watch_interval_s is not None:
+            self.start_index_watch(self.config.index_watch_interval_s)
+    
+    @property
+    def generation(self) -> IndexGeneration:
+        """The index generation new queries are served from."""
+        return self._generation
     
     def _initialize(self) -> None:
-        """Initialize ChromaDB and BM25 index."""
+        """Initialize ChromaDB, the caches and the first index generation."""
         try:
-            import chromadb
-            from chromadb.config import Settings
+            self._client = self._connect()
             
-            # Load ChromaDB collection
-            db_path = str(get_vector_db_dir())
-            client = chromadb.PersistentClient(
-                path=db_path,
-                settings=Settings(anonymized_telemetry=False)
+            self._embedder = QueryEmbedder(
+                cache_size=self.config.query_embedding_cache_size,
+                batch_max_wait_ms=self.config.embedding_batch_max_wait_ms,
+                batch_max_size=self.config.embedding_batch_max_size
             )
-            
-            self._collection = client.get_collection(name=self.collection_name)
-            
-            # Get all documents for BM25 indexing
-            all_docs = self._collection.get(include=["documents", "metadatas"])
-            
-            if not all_docs or not all_docs["ids"]:
-                logger.warning(f"Collection {self.collection_name} is empty or not found.")
-                return
-
-            self._doc_ids = all_docs["ids"]
-            # Ensure documents are strings, handle potential None values
-            self._documents = [doc if doc is not None else "" for doc in all_docs["documents"]]
-            self._doc_metadata = all_docs["metadatas"]
-            
-            # Build BM25 index
-            tokenized_docs = [self._tokenize(doc) for doc in self._documents]
-            self._bm25 = BM25Okapi(tokenized_docs)
-            
-            logger.info(
-                f"Initialized HybridRetriever with {len(self._documents)} documents"
+            if self.config.semantic_deadline_ms is not None:
+                # Load the embedding model now rather than inside the first
+                # query's semantic deadline
+                try:
+                    self._embedder.warm_up()
+                except Exception as e:
+                    logger.warning(f"Embedding model warm-up failed: {e}")
+            self._result_cache = ResultCache(
+                max_size=self.config.result_cache_size,
+                # Results are tagged with the version of the serving generation
+                version_provider=lambda: self._generation.version,
+                disk_path=(
+                    get_cache_dir() / f"{self.collection_name}_results.sqlite3"
+                    if self.config.result_cache_disk else None
+                ),
+                disk_max_size=self.config.result_cache_disk_size
             )
+            
+            self._generation = self._load_generation()
         except Exception as e:
             logger.error(f"Failed to initialize HybridRetriever: {e}")
             raise
     
-    def _tokenize(self, text: str) -> List[str]:
+    def _connect(self, fresh: bool = False) -> Any:
+        """
+        Open the ChromaDB client.
+        
+        Args:
+            fresh: Start a new Chroma system instead of reusing the one
+                cached for the database path. Chroma's in-process HNSW
+                segments do not see writes made by another process (the
+                ingestion script), so reloads need a new system; clients
+                opened earlier keep working on the old one.
+        
+        Returns:
+            The ChromaDB client.
         """
-        Tokenize text for BM25 indexing.
+        import chromadb
+        from chromadb.config import Settings
         
-        Uses simple whitespace + punctuation tokenization.
-        Preserves legal terms like "Section 10" as single tokens.
+        if fresh:
+            from chromadb.api.shared_system_client import SharedSystemClient
+            SharedSystemClient.clear_system_cache()
+        
+        return chromadb.PersistentClient(
+            path=str(get_vector_db_dir()),
+            settings=Settings(anonymized_telemetry=False)
+        )
+    
+    def _load_generation(self, client: Optional[Any] = None) -> IndexGeneration:
         """
-        if not text:
-            return []
-            
-        # Lowercase
-        text = text.lower()
+        Load every index for the current collection version.
+        
+        Nothing here touches the serving generation, so this can run while
+        queries are being answered.
+        
+        Args:
+            client: ChromaDB client to load the collection from (default:
+                the retriever's client).
+        
+        Returns:
+            The new IndexGeneration.
+        """
+        # Read the version first: if ingestion moves on while loading, the
+        # generation looks stale and is reloaded again
+        version = get_collection_version(self.collection_name)
+        collection = (client or self._client).get_collection(name=self.collection_name)
+        
+        # Chunk text is read from the chunk store, not held in memory
+        all_docs = collection.get(include=["metadatas"])
+        
+        if not all_docs or not all_docs["ids"]:
+            logger.warning(f"Collection {self.collection_name} is empty or not found.")
+            return IndexGeneration(
+                version=version,
+                collection=collection,
+                store=DocumentStore([], [], [])
+            )
+
+        doc_ids = all_docs["ids"]
+        metadatas = all_docs["metadatas"]
+        
+        # Prefer the persisted keyword index; its doc-id table fixes the
+        # ordinal order of the document store
+        artifact = self._load_keyword_index(doc_ids, version)
+        # (otherwise use the same act-contiguous order ingestion writes)
+        if artifact is not None:
+            bm25, order = artifact
+        else:
+            order = act_order(metadatas)
+        doc_ids = [doc_ids[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+        
+        store = DocumentStore(
+            doc_ids, self._load_chunk_store(collection, doc_ids, version), metadatas
+        )
+        
+        # Rebuild BM25 only if the artifact is missing or stale
+        if artifact is None:
+            bm25 = BM25Index.build(
+                (self._tokenize(doc) for doc in store.documents),
+                k1=self.config.bm25_k1,
+                b=self.config.bm25_b
+            )
+        
+        generation = IndexGeneration(
+            version=version,
+            collection=collection,
+            store=store,
+            bm25=bm25,
+            analyzer=Analyzer(bm25.vocabulary, self.config.query_analysis_cache_size),
+            citations=self._load_citation_index(doc_ids, metadatas, version)
+        )
+        if self.config.semantic_backend == "exact":
+            generation.vectors = self._load_vector_index(collection, store, version)
+        
+        logger.info(
+            f"Loaded index generation {version} with {len(store)} documents"
+        )
+        return generation
+    
+    def _load_chunk_store(
+        self,
+        collection: Any,
+        doc_ids: List[str],
+        collection_version: Optional[str]
+    ) -> Sequence[Optional[str]]:
+        """
+        Memory-map the chunk text store written at ingestion.
+        
+        The store is rewritten from the collection (once) if it is missing,
+        from another collection version, or not in the given ordinal order.
+        
+        Args:
+            collection: ChromaDB collection being loaded.
+            doc_ids: Chunk ids in document store ordinal order.
+            collection_version: Version of the collection being loaded.
+        
+        Returns:
+            The ChunkTextStore, or the texts as an in-memory list if the
+            store cannot be written.
+        """
+        store_dir = get_chunk_store_dir() / self.collection_name
+        
+        artifact = load_chunk_store(store_dir)
+        if artifact is not None:
+            texts, store_doc_ids, manifest = artifact
+            if (
+                collection_version is not None
+                and manifest.get("collection_version") == collection_version
+                and store_doc_ids == doc_ids
+            ):
+                logger.info(f"Loaded chunk text store from {store_dir}")
+                return texts
+        
+        logger.info(f"No usable chunk text store at {store_dir}, writing it")
+        try:
+            build_chunk_store(collection, doc_ids)
+            artifact = load_chunk_store(store_dir)
+            if artifact is not None:
+                return artifact[0]
+        except Exception as e:
+            logger.error(f"Failed to write chunk text store, keeping texts in memory: {e}")
+        
+        all_docs = collection.get(ids=doc_ids, include=["documents"])
+        texts_by_id = dict(zip(all_docs["ids"], all_docs["documents"]))
+        return [texts_by_id.get(doc_id) for doc_id in doc_ids]
+    
+    def _load_keyword_index(
+        self,
+        doc_ids: List[str],
+        collection_version: Optional[str]
+    ) -> Optional[Tuple[BM25Index, List[int]]]:
+        """
+        Load the persisted keyword index maintained at ingestion.
+        
+        The artifact is used only if it was built from the current collection
+        version and covers exactly the given documents.
+        
+        Args:
+            doc_ids: Chunk ids in the order returned by the collection.
+            collection_version: Version of the collection being loaded.
         
-        # Keep "section X" together
-        text = re.sub(r"section\s+(\d+[a-z]*)", r"section_\1", text)
+        Returns:
+            (index, order) where order[i] is the position in doc_ids of the
+            artifact's i-th document, or None if a rebuild is needed.
+        """
+        index_dir = get_keyword_index_dir() / self.collection_name
+        artifact = load_keyword_index(
+            index_dir,
+            k1=self.config.bm25_k1,
+            b=self.config.bm25_b
+        )
+        if artifact is None:
+            logger.info(f"No usable keyword index at {index_dir}, rebuilding BM25")
+            return None
+        
+        index, index_doc_ids, manifest = artifact
+        positions = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+        
+        if (
+            collection_version is None
+            or manifest.get("collection_version") != collection_version
+            or len(index_doc_ids) != len(positions)
+            or any(doc_id not in positions for doc_id in index_doc_ids)
+        ):
+            logger.warning(
+                f"Keyword index at {index_dir} does not match collection "
+                f"version {collection_version}, rebuilding BM25"
+            )
+            return None
+        
+        logger.info(f"Loaded keyword index from {index_dir}")
+        return index, [positions[doc_id] for doc_id in index_doc_ids]
+    
+    def _load_citation_index(
+        self,
+        doc_ids: List[str],
+        metadatas: List[Dict[str, Any]],
+        collection_version: Optional[str]
+    ) -> CitationIndex:
+        """
+        Load the section citation index written at ingestion.
+        
+        Falls back to building it from the collection metadata if the
+        artifact is missing or from another collection version.
+        
+        Args:
+            doc_ids: Chunk ids.
+            metadatas: Chunk metadata, parallel to doc_ids.
+            collection_version: Version of the collection being loaded.
+        
+        Returns:
+            The CitationIndex.
+        """
+        path = get_citation_index_path(self.collection_name)
+        artifact = load_citation_index(path)
         
-        # Split on whitespace and punctuation
-        tokens = re.findall(r"\b\w+\b", text)
+        if (
+            artifact is not None
+            and collection_version is not None
+            and artifact[1] == collection_version
+        ):
+            return artifact[0]
         
-        return tokens
+        logger.info(f"No usable citation index at {path}, rebuilding from metadata")
+        return CitationIndex.build(doc_ids, metadatas)
+    
+    def _load_vector_index(
+        self,
+        collection: Any,
+        store: DocumentStore,
+        collection_version: Optional[str]
+    ) -> Optional[VectorIndex]:
+        """
+        Memory-map the exported embedding matrix for exact vector search.
+        
+        The matrix is exported from the collection (once) if it is missing,
+        from another collection version, not aligned with the document
+        store's ordinals, or lacks the configured quantized copy.
+        
+        Args:
+            collection: ChromaDB collection being loaded.
+            store: Document store whose ordinals the matrix rows must match.
+            collection_version: Version of the collection being loaded.
+        
+        Returns:
+            The VectorIndex, or None if the export failed (Chroma is then
+            used for semantic search).
+        """
+        index_dir = get_vector_index_dir() / self.collection_name
+        
+        artifact = load_vector_index(
+            index_dir,
+            quantization=self.config.vector_quantization,
+            rescore_factor=self.config.vector_rescore_factor
+        )
+        if artifact is not None:
+            index, index_doc_ids, manifest = artifact
+            if (
+                collection_version is not None
+                and manifest.get("collection_version") == collection_version
+                and index_doc_ids == store.doc_ids
+            ):
+                logger.info(
+                    f"Loaded vector index from {index_dir} "
+                    f"(quantization: {index.quantization})"
+                )
+                return index
+        
+        logger.info(f"No usable vector index at {index_dir}, exporting embeddings")
+        try:
+            build_vector_index(collection, store.doc_ids)
+        except Exception as e:
+            logger.error(f"Failed to export vector index, using Chroma: {e}")
+            return None
+        artifact = load_vector_index(
+            index_dir,
+            quantization=self.config.vector_quantization,
+            rescore_factor=self.config.vector_rescore_factor
+        )
+        if artifact is None:
+            logger.error(
+                f"Vector index at {index_dir} has no "
+                f"{self.config.vector_quantization!r} copy, using Chroma"
+            )
+            return None
+        return artifact[0]
+    
+    def _tokenize(self, text: str) -> List[str]:
+        """Tokenize text for BM25 (see retrieval.bm25_index.tokenize)."""
+        return tokenize(text)
     
     def _semantic_search(
         self,
         query: str,
-        n_results: int
+        n_results: int,
+        filters: Optional[RetrievalFilter] = None,
+        generation: Optional[IndexGeneration] = None
     ) -> List[Tuple[str, float]]:
         """
         Perform semantic search using ChromaDB.
         
-        Returns list of (doc_id, distance) tuples.
+        Returns list of (doc_id, similarity) tuples.
         """
-        if not self._collection:
+        return self._semantic_search_many([query], n_results, filters, generation)[0]
+    
+    def _semantic_search_many(
+        self,
+        queries: List[str],
+        n_results: int,
+        filters: Optional[RetrievalFilter] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Perform semantic search for a batch of queries.
+        
+        Queries are embedded through the query-embedding cache (misses in one
+        batch). With the exact backend they are scored against the embedding
+        matrix in one matrix product, restricted to the filter's documents;
+        otherwise they are sent in a single Chroma query with the filter
+        pushed down as a where clause.
+        
+        Returns one list of (doc_id, similarity) tuples per query.
+        """
+        generation = generation or self._generation
+        if not generation.collection or not self._embedder:
             logger.error("Collection not initialized.")
-            return []
+            return [[] for _ in queries]
             
         try:
-            results = self._collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                include=["distances"]
-            )
+            embeddings = self._embedder.embed(queries)
+            if generation.vectors is not None:
+                with tracing.span("vector_search", queries=len(queries)) as span:
+                    batch_hits = generation.vectors.search(
+                        np.vstack(embeddings),
+                        n_results,
+                        generation.store.resolve_filter(filters)
+                    )
+                    span.set(candidates=sum(len(hits) for hits in batch_hits))
+                return [
+                    [(generation.store.doc_ids[doc], score) for doc, score in hits]
+                    for hits in batch_hits
+                ]
+            
+            with tracing.span("chroma_query", queries=len(queries)) as span:
+                results = generation.collection.query(
+                    query_embeddings=embeddings,
+                    n_results=n_results,
+                    where=generation.store.where_clause(filters),
+                    include=["distances"]
+                )
+                span.set(candidates=sum(len(ids) for ids in results["ids"] or []))
             
             if not results["ids"]:
-                return []
+                return [[] for _ in queries]
 
             # Convert distances to similarity scores (1 - distance for cosine)
             return [
-                (doc_id, 1 - distance)
-                for doc_id, distance in zip(
-                    results["ids"][0],
-                    results["distances"][0]
-                )
+                [
+                    (doc_id, 1 - distance)
+                    for doc_id, distance in zip(ids, distances)
+                ]
+                for ids, distances in zip(results["ids"], results["distances"])
             ]
         except Exception as e:
             logger.error(f"Semantic search failed: {e}")
-            return []
+            return [[] for _ in queries]
     
     def _keyword_search(
         self,
         query: str,
-        n_results: int
+        n_results: int,
+        subset: Optional[DocSubset] = None,
+        generation: Optional[IndexGeneration] = None,
+        max_df_ratio: Optional[float] = None,
+        dynamic_pruning: Optional[bool] = None
     ) -> List[Tuple[str, float]]:
         """
-        Perform keyword search using BM25.
+        Perform keyword search using the sparse BM25 index.
+        
+        Only documents containing at least one query term (and inside the
+        subset, if given) are scored.
         
         Returns list of (doc_id, score) tuples.
         """
-        if not self._bm25:
+        return self._keyword_search_many(
+            [query], n_results, subset, generation, max_df_ratio, dynamic_pruning
+        )[0]
+    
+    def _query_term_ids(
+        self,
+        queries: List[str],
+        generation: IndexGeneration,
+        max_df_ratio: Optional[float] = None
+    ) -> List[np.ndarray]:
+        """
+        Analyze queries to term ids, dropping terms that occur in more than
+        max_df_ratio of the chunks (None: config.bm25_max_df_ratio; 1.0
+        keeps every term).
+        """
+        if max_df_ratio is None:
+            max_df_ratio = self.config.bm25_max_df_ratio
+        with tracing.span("analyze_query", queries=len(queries)):
+            query_term_ids = [generation.analyzer.term_ids(query) for query in queries]
+            if max_df_ratio is not None and max_df_ratio < 1.0:
+                query_term_ids = [
+                    generation.bm25.prune_term_ids(term_ids, max_df_ratio)
+                    for term_ids in query_term_ids
+                ]
+        return query_term_ids
+    
+    def _keyword_search_many(
+        self,
+        queries: List[str],
+        n_results: int,
+        subset: Optional[DocSubset] = None,
+        generation: Optional[IndexGeneration] = None,
+        max_df_ratio: Optional[float] = None,
+        dynamic_pruning: Optional[bool] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Perform keyword search for a batch of queries.
+        
+        Queries are analyzed to term ids by the generation's memoizing
+        Analyzer. Postings of terms shared between queries are scored once.
+        Terms occurring in more than max_df_ratio (default:
+        config.bm25_max_df_ratio) of the chunks are dropped from each query
+        first. dynamic_pruning overrides the index's MaxScore setting for
+        this search only.
+        
+        Returns one list of (doc_id, score) tuples per query.
+        """
+        generation = generation or self._generation
+        if not generation.bm25:
             logger.warning("BM25 index not initialized.")
-            return []
+            return [[] for _ in queries]
             
-        tokenized_query = self._tokenize(query)
-        scores = self._bm25.get_scores(tokenized_query)
-        
-        # Get top N indices
-        top_indices = sorted(
-            range(len(scores)),
-            key=lambda i: scores[i],
-            reverse=True
-        )[:n_results]
+        query_term_ids = self._query_term_ids(queries, generation, max_df_ratio)
+        with tracing.span("bm25_score", queries=len(queries)) as span:
+            batch_hits = generation.bm25.search_ids_many(
+                query_term_ids, n_results, subset, dynamic_pruning
+            )
+            span.set(
+                terms=sum(len(term_ids) for term_ids in query_term_ids),
+                candidates=sum(len(hits) for hits in batch_hits)
+            )
         
         # Return (doc_id, score) pairs
         return [
-            (self._doc_ids[i], scores[i])
-            for i in top_indices
-            if scores[i] > 0  # Filter zero scores
+            [
+                (generation.store.doc_ids[i], score)
+                for i, score in top_hits
+                if score > 0  # Filter zero scores
+            ]
+            for top_hits in batch_hits
         ]
     
     def _reciprocal_rank_fusion(
@@ -232,79 +775,729 @@ class HybridRetriever:
         
         return dict(rrf_scores)
     
+    def _build_results(
+        self,
+        method: str,
+        semantic_results: List[Tuple[str, float]],
+        keyword_results: List[Tuple[str, float]],
+        n_results: int,
+        degraded: Optional[str] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> List[RetrievalResult]:
+        """
+        Combine the search legs of one query into ranked results.
+        
+        Args:
+            method: "hybrid", "semantic", or "keyword".
+            semantic_results: List of (doc_id, score) from semantic search.
+            keyword_results: List of (doc_id, score) from keyword search.
+            n_results: Number of results to return.
+            degraded: Degraded mode to record on each result, if any.
+            generation: Index generation the legs searched (default: serving).
+        
+        Returns:
+            List of RetrievalResult objects, sorted by relevance.
+        """
+        generation = generation or self._generation
+        
+        with tracing.span("fusion", method=method) as span:
+            results = self._fuse(
+                method, semantic_results, keyword_results, n_results, degraded, generation
+            )
+            span.set(
+                semantic_candidates=len(semantic_results),
+                keyword_candidates=len(keyword_results),
+                results=len(results)
+            )
+        return results
+    
+    def _fuse(
+        self,
+        method: str,
+        semantic_results: List[Tuple[str, float]],
+        keyword_results: List[Tuple[str, float]],
+        n_results: int,
+        degraded: Optional[str],
+        generation: IndexGeneration
+    ) -> List[RetrievalResult]:
+        """Rank one query's candidates by method (see _build_results)."""
+        # Combine results
+        combined_scores: Dict[str, float] = {}
+        if method == "hybrid":
+            combined_scores = self._reciprocal_rank_fusion(
+                semantic_results, keyword_results
+            )
+        elif method == "semantic":
+            combined_scores = {doc_id: score for doc_id, score in semantic_results}
+        else:  # keyword
+            combined_scores = {doc_id: score for doc_id, score in keyword_results}
+        
+        # Sort by score and take top N
+        sorted_ids = sorted(
+            combined_scores.keys(),
+            key=lambda x: combined_scores[x],
+            reverse=True
+        )[:n_results]
+        
+        # Build result objects
+        results = []
+        for doc_id in sorted_ids:
+            # O(1) id -> ordinal lookup
+            idx = generation.store.ordinal(doc_id)
+            if idx is None:
+                continue
+            results.append(self._make_result(
+                idx, combined_scores[doc_id], method, degraded, generation
+            ))
+        
+        return results
+    
+    def _make_result(
+        self,
+        idx: int,
+        score: float,
+        method: str,
+        degraded: Optional[str] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> RetrievalResult:
+        """Build the RetrievalResult for the chunk at a store ordinal."""
+        store = (generation or self._generation).store
+        return RetrievalResult(
+            chunk_id=store.doc_ids[idx],
+            content=None,  # read from the store when used
+            act_name=store.act_name[idx],
+            act_number=int(store.act_number[idx]),
+            section_number=store.section_number[idx],
+            section_title=store.section_title[idx],
+            score=score,
+            retrieval_method=method,
+            degraded=degraded,
+            store=store,
+            ordinal=idx
+        )
+    
+    def _match_citation(
+        self,
+        query: str,
+        method: str,
+        filters: Optional[RetrievalFilter] = None,
+        subset: Optional[DocSubset] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> Optional[CitationMatch]:
+        """
+        Look up the sections a query cites.
+        
+        Pure semantic retrieval is left untouched. Cited chunks outside the
+        filter are dropped.
+        
+        Returns:
+            CitationMatch restricted to retrievable chunks, or None.
+        """
+        generation = generation or self._generation
+        if (
+            not self.config.citation_fast_path
+            or generation.citations is None
+            or method == "semantic"
+        ):
+            return None
+        
+        with tracing.span("citation_lookup") as span:
+            match = generation.citations.match(
+                query,
+                act_numbers=filters.act_numbers if filters is not None else None
+            )
+            span.set(matched=match is not None)
+        if match is None:
+            return None
+        
+        ordinals = [generation.store.ordinal(doc_id) for doc_id in match.doc_ids]
+        doc_ids = [
+            doc_id for doc_id, idx in zip(match.doc_ids, ordinals)
+            if idx is not None and (subset is None or subset.mask[idx])
+        ]
+        if not doc_ids:
+            return None
+        return CitationMatch(doc_ids=doc_ids, sections=match.sections)
+    
+    def _merge_citation_hits(
+        self,
+        citation: CitationMatch,
+        results: List[RetrievalResult],
+        n_results: int,
+        generation: Optional[IndexGeneration] = None
+    ) -> List[RetrievalResult]:
+        """
+        Rank cited chunks ahead of search results.
+        
+        For an unambiguous citation every chunk of the cited section is
+        placed first. When the citation matches the same section number in
+        several acts, only the cited chunks that search also found are moved
+        to the front, keeping their search order.
+        
+        Args:
+            citation: The query's citation match.
+            results: Ranked search results.
+            n_results: Number of results to return.
+            generation: Index generation the citation was matched in.
+        
+        Returns:
+            Merged results.
+        """
+        generation = generation or self._generation
+        cited = set(citation.doc_ids)
+        rest = [r for r in results if r.chunk_id not in cited]
+        
+        if not citation.unambiguous:
+            return ([r for r in results if r.chunk_id in cited] + rest)[:n_results]
+        
+        score = max([1.0] + [r.score for r in results])
+        hits = [
+            self._make_result(
+                generation.store.ordinal(doc_id), score, "citation", None, generation
+            )
+            for doc_id in citation.doc_ids
+        ]
+        return (hits + rest)[:n_results]
+    
+    def _result_cache_key(
+        self,
+        query: str,
+        n_results: int,
+        method: str,
+        filters: Optional[RetrievalFilter] = None
+    ) -> Tuple[Any, ...]:
+        """Build the result cache key for a query, filter and the fusion settings."""
+        return (
+            normalize_query(query),
+            method,
+            n_results,
+            self.semantic_weight,
+            self.keyword_weight,
+            self.rrf_k,
+            self.config.bm25_max_df_ratio,
+            filters,
+        )
+    
+    def _get_cached_results(
+        self,
+        query: str,
+        n_results: int,
+        method: str,
+        filters: Optional[RetrievalFilter] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> Optional[List[RetrievalResult]]:
+        """
+        Return cached results for a query, or None on a miss.
+        
+        Cached results hold no text; their content is read from the
+        generation's document store again.
+        """
+        if not self._result_cache:
+            return None
+        cached = self._result_cache.get(
+            self._result_cache_key(query, n_results, method, filters)
+        )
+        tracing.annotate(result_cache_hit=cached is not None)
+        if cached is None:
+            return None
+        
+        store = (generation or self._generation).store
+        results = []
+        for fields in cached:
+            ordinal = store.ordinal(fields["chunk_id"])
+            if ordinal is None:
+                return None
+            results.append(RetrievalResult(
+                **{"content": None, **fields}, store=store, ordinal=ordinal
+            ))
+        return results
+    
+    def _cache_results(
+        self,
+        query: str,
+        n_results: int,
+        method: str,
+        results: List[RetrievalResult],
+        filters: Optional[RetrievalFilter] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> None:
+        """
+        Store non-empty, non-degraded results in the result cache.
+        
+        Results computed on a generation that has since been swapped out
+        are not cached.
+        """
+        if generation is not None and generation is not self._generation:
+            return
+        if self._result_cache and results and not results[0].degraded:
+            self._result_cache.put(
+                self._result_cache_key(query, n_results, method, filters),
+                [result.to_dict(include_content=False) for result in results]
+            )
+    
+    def _run_search_legs(
+        self,
+        method: str,
+        semantic_call: Callable[[], Any],
+        keyword_call: Callable[[], Any],
+        enforce_deadlines: bool = True
+    ) -> Tuple[Any, Any, Optional[str]]:
+        """
+        Run the search legs needed by a method.
+        
+        In hybrid mode both legs run concurrently in the retriever's thread
+        pool, so latency is that of the slower leg rather than the sum. Each
+        leg has its own deadline (RAGConfig.semantic_deadline_ms and
+        keyword_deadline_ms, measured from the start of the search); a leg
+        that misses it is abandoned and contributes no results.
+        
+        Args:
+            method: "hybrid", "semantic", or "keyword".
+            semantic_call: Runs the semantic leg.
+            keyword_call: Runs the keyword leg.
+            enforce_deadlines: If False, wait for both legs.
+        
+        Returns:
+            (semantic results, keyword results, degraded mode). A leg that
+            was not run or missed its deadline returns []. The degraded mode
+            is "keyword_only", "semantic_only" or "no_results" if a deadline
+            was missed, else None.
+        """
+        semantic_call = self._traced_leg("semantic_search", semantic_call)
+        keyword_call = self._traced_leg("keyword_search", keyword_call)
+        if method == "semantic":
+            return semantic_call(), [], None
+        if method == "keyword":
+            return [], keyword_call(), None
+        
+        if not self.config.parallel_search:
+            return semantic_call(), keyword_call(), None
+        
+        start = time.monotonic()
+        legs = {
+            "semantic": (
+                self._executor.submit(tracing.bind(semantic_call)),
+                self.config.semantic_deadline_ms
+            ),
+            "keyword": (
+                self._executor.submit(tracing.bind(keyword_call)),
+                self.config.keyword_deadline_ms
+            ),
+        }
+        
+        results: Dict[str, Any] = {}
+        timed_out: List[str] = []
+        for leg, (future, deadline_ms) in legs.items():
+            timeout = None
+            if enforce_deadlines and deadline_ms is not None:
+                timeout = max(0.0, start + deadline_ms / 1000 - time.monotonic())
+            try:
+                results[leg] = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                # The thread cannot be interrupted; its result is discarded
+                future.cancel()
+                results[leg] = []
+                timed_out.append(leg)
+        
+        degraded = None
+        if timed_out:
+            if len(timed_out) == 2:
+                degraded = "no_results"
+            elif timed_out[0] == "semantic":
+                degraded = "keyword_only"
+            else:
+                degraded = "semantic_only"
+            logger.warning(
+                f"{', '.join(timed_out)} search missed its deadline, "
+                f"hybrid retrieval degraded to {degraded}"
+            )
+        
+        if degraded:
+            tracing.annotate(degraded=degraded)
+        return results["semantic"], results["keyword"], degraded
+    
+    @staticmethod
+    def _traced_leg(name: str, call: Callable[[], Any]) -> Callable[[], Any]:
+        """Wrap a search leg in a span, if tracing."""
+        if tracing.current_trace() is None:
+            return call
+        
+        def traced() -> Any:
+            with tracing.span(name):
+                return call()
+        
+        return traced
+    
     def retrieve(
         self,
         query: str,
         n_results: int = 5,
-        method: str = "hybrid"
+        method: str = "hybrid",
+        filters: Optional[RetrievalFilter] = None
     ) -> List[RetrievalResult]:
         """
         Retrieve relevant legal chunks for a query.
         
+        Results are served from the result cache when the same normalized
+        query was answered with the same settings and collection version.
+        Chunks of a cited section are ranked first (retrieval_method
+        "citation"); an unambiguous citation is answered without embedding.
+        The whole query runs on the generation serving when it started.
+        
         Args:
             query: The user's legal question.
             n_results: Number of results to return.
             method: "hybrid", "semantic", or "keyword".
+            filters: Optional act/part/section filter. Chroma gets it as a
+                where clause; keyword search (and exact vector search) only
+                score the documents in the filter's precomputed bitmap.
         
         Returns:
             List of RetrievalResult objects, sorted by relevance.
         """
+        with tracing.trace(
+            "retrieve",
+            enabled=self.config.tracing,
+            exporter=self._trace_exporter,
+            method=method,
+            n_results=n_results
+        ):
+            results = self._retrieve(query, n_results, method, filters)
+            tracing.annotate(results=len(results))
+            return results
+    
+    def _retrieve(
+        self,
+        query: str,
+        n_results: int,
+        method: str,
+        filters: Optional[RetrievalFilter]
+    ) -> List[RetrievalResult]:
+        """Run retrieve() (see there), inside its trace if tracing."""
         try:
+            generation = self._generation
+            cached = self._get_cached_results(query, n_results, method, filters, generation)
+            if cached is not None:
+                return cached
+            
+            subset = generation.store.resolve_filter(filters)
+            if subset is not None and not len(subset):
+                return []
+            
+            citation = self._match_citation(query, method, filters, subset, generation)
+            if citation is not None and citation.unambiguous:
+                # Exact section lookup: no embedding, BM25 fills the rest
+                results = self._build_results(
+                    "keyword",
+                    [],
+                    self._keyword_search(query, n_results * 2, subset, generation),
+                    n_results,
+                    generation=generation
+                )
+                results = self._merge_citation_hits(citation, results, n_results, generation)
+                self._cache_results(query, n_results, method, results, filters, generation)
+                return results
+            
             # Perform searches based on method
-            semantic_results: List[Tuple[str, float]] = []
-            keyword_results: List[Tuple[str, float]] = []
+            semantic_results, keyword_results, degraded = self._run_search_legs(
+                method,
+                lambda: self._semantic_search(query, n_results * 2, filters, generation),
+                lambda: self._keyword_search(query, n_results * 2, subset, generation)
+            )
             
-            if method in ("hybrid", "semantic"):
-                semantic_results = self._semantic_search(query, n_results * 2)
+            results = self._build_results(
+                method, semantic_results, keyword_results, n_results, degraded, generation
+            )
+            if citation is not None:
+                results = self._merge_citation_hits(citation, results, n_results, generation)
+            self._cache_results(query, n_results, method, results, filters, generation)
+            return results
             
-            if method in ("hybrid", "keyword"):
-                keyword_results = self._keyword_search(query, n_results * 2)
+        except Exception as e:
+            logger.error(f"Retrieval failed for query '{query}': {e}")
+            return []
+    
+    async def aretrieve(
+        self,
+        query: str,
+        n_results: int = 5,
+        method: str = "hybrid",
+        filters: Optional[RetrievalFilter] = None
+    ) -> List[RetrievalResult]:
+        """
+        Coroutine version of retrieve().
+        
+        The Chroma query and BM25 scoring run on the retriever's async pool
+        (config.async_retrieval_workers threads), never on the event loop.
+        Cancelling the awaiting task drops a retrieval that has not started
+        yet; one that is already running completes in the background and
+        only its result is discarded (it is still cached).
+        
+        Args:
+            query: The user's legal question.
+            n_results: Number of results to return.
+            method: "hybrid", "semantic", or "keyword".
+            filters: Optional act/part/section filter.
+        
+        Returns:
+            List of RetrievalResult objects, sorted by relevance.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._async_executor,
+            tracing.bind(functools.partial(self.retrieve, query, n_results, method, filters))
+        )
+    
+    def retrieve_many(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        method: str = "hybrid",
+        filters: Optional[RetrievalFilter] = None
+    ) -> List[List[RetrievalResult]]:
+        """
+        Retrieve relevant legal chunks for a batch of queries.
+        
+        Cached queries are answered from the result cache. The remaining
+        queries are embedded in one batch and sent in a single Chroma query,
+        and BM25 scores them in one pass. Use this for evaluation sweeps and
+        bulk Q&A jobs.
+        
+        Args:
+            queries: The legal questions.
+            n_results: Number of results to return per query.
+            method: "hybrid", "semantic", or "keyword".
+            filters: Optional act/part/section filter applied to every query.
+        
+        Returns:
+            One list of RetrievalResult objects per query, in query order.
+        """
+        if not queries:
+            return []
+        
+        with tracing.trace(
+            "retrieve_many",
+            enabled=self.config.tracing,
+            exporter=self._trace_exporter,
+            method=method,
+            n_results=n_results,
+            queries=len(queries)
+        ):
+            return self._retrieve_many(queries, n_results, method, filters)
+    
+    def _retrieve_many(
+        self,
+        queries: List[str],
+        n_results: int,
+        method: str,
+        filters: Optional[RetrievalFilter]
+    ) -> List[List[RetrievalResult]]:
+        """Run retrieve_many() (see there), inside its trace if tracing."""
+        try:
+            generation = self._generation
+            batch_results: List[Optional[List[RetrievalResult]]] = [
+                self._get_cached_results(query, n_results, method, filters, generation)
+                for query in queries
+            ]
+            pending = [i for i, results in enumerate(batch_results) if results is None]
+            if not pending:
+                return batch_results
             
-            # Combine results
-            combined_scores: Dict[str, float] = {}
-            if method == "hybrid":
-                combined_scores = self._reciprocal_rank_fusion(
-                    semantic_results, keyword_results
+            subset = generation.store.resolve_filter(filters)
+            if subset is not None and not len(subset):
+                return [results or [] for results in batch_results]
+            
+            # Unambiguous section citations are answered without embedding
+            citations = {
+                i: self._match_citation(queries[i], method, filters, subset, generation)
+                for i in pending
+            }
+            lookups = [
+                i for i in pending
+                if citations[i] is not None and citations[i].unambiguous
+            ]
+            if lookups:
+                keyword_batches = self._keyword_search_many(
+                    [queries[i] for i in lookups], n_results * 2, subset, generation
                 )
-            elif method == "semantic":
-                combined_scores = {doc_id: score for doc_id, score in semantic_results}
-            else:  # keyword
-                combined_scores = {doc_id: score for doc_id, score in keyword_results}
+                for i, keyword_results in zip(lookups, keyword_batches):
+                    results = self._build_results(
+                        "keyword", [], keyword_results, n_results, generation=generation
+                    )
+                    results = self._merge_citation_hits(
+                        citations[i], results, n_results, generation
+                    )
+                    self._cache_results(
+                        queries[i], n_results, method, results, filters, generation
+                    )
+                    batch_results[i] = results
+                pending = [i for i in pending if batch_results[i] is None]
+                if not pending:
+                    return batch_results
+            pending_queries = [queries[i] for i in pending]
             
-            # Sort by score and take top N
-            sorted_ids = sorted(
-                combined_scores.keys(),
-                key=lambda x: combined_scores[x],
-                reverse=True
-            )[:n_results]
+            # Batches run both legs concurrently but without deadlines
+            semantic_batches, keyword_batches, _ = self._run_search_legs(
+                method,
+                lambda: self._semantic_search_many(
+                    pending_queries, n_results * 2, filters, generation
+                ),
+                lambda: self._keyword_search_many(
+                    pending_queries, n_results * 2, subset, generation
+                ),
+                enforce_deadlines=False
+            )
+            if not semantic_batches:
+                semantic_batches = [[] for _ in pending]
+            if not keyword_batches:
+                keyword_batches = [[] for _ in pending]
             
-            # Build result objects
-            results = []
-            for doc_id in sorted_ids:
-                if doc_id not in self._doc_ids:
-                    continue 
-
-                # Find document index
-                idx = self._doc_ids.index(doc_id)
-                metadata = self._doc_metadata[idx]
-                
-                result = RetrievalResult(
-                    chunk_id=doc_id,
-                    content=self._documents[idx],
-                    act_name=metadata.get("act_name", ""),
-                    act_number=metadata.get("act_number", 0),
-                    section_number=metadata.get("section_number", ""),
-                    section_title=metadata.get("section_title", ""),
-                    score=combined_scores[doc_id],
-                    retrieval_method=method
+            for i, query, semantic_results, keyword_results in zip(
+                pending, pending_queries, semantic_batches, keyword_batches
+            ):
+                results = self._build_results(
+                    method, semantic_results, keyword_results, n_results,
+                    generation=generation
                 )
-                results.append(result)
+                if citations[i] is not None:
+                    results = self._merge_citation_hits(
+                        citations[i], results, n_results, generation
+                    )
+                self._cache_results(query, n_results, method, results, filters, generation)
+                batch_results[i] = results
             
-            return results
+            return batch_results
             
         except Exception as e:
-            logger.error(f"Retrieval failed for query '{query}': {e}")
-            return []
+            logger.error(f"Batch retrieval failed for {len(queries)} queries: {e}")
+            return [[] for _ in queries]
+    
+    def reload(self, wait: bool = False) -> Future:
+        """
+        Load a new index generation in the background and swap it in.
+        
+        Queries keep being served from the current generation while the new
+        one loads (double buffering); queries already running finish on the
+        generation they started with. Only one reload runs at a time:
+        calling reload() while one is in flight returns that reload.
+        
+        Args:
+            wait: Block until the reload has finished.
+        
+        Returns:
+            Future resolving to True if a new generation was swapped in, or
+            False if loading failed and the current one was kept.
+        """
+        with self._reload_lock:
+            if self._reload_future is None or self._reload_future.done():
+                self._reload_future = self._reload_executor.submit(self._reload)
+            future = self._reload_future
+        if wait:
+            future.result()
+        return future
+    
+    def _reload(self) -> bool:
+        """Load a new generation and swap it in (runs on the reload thread)."""
+        start = time.monotonic()
+        try:
+            client = self._connect(fresh=True)
+            generation = self._load_generation(client)
+        except Exception as e:
+            logger.error(
+                f"Index reload failed, still serving generation "
+                f"{self._generation.version}: {e}"
+            )
+            return False
+        
+        self._client = client
+        previous, self._generation = self._generation, generation
+        logger.info(
+            f"Swapped index generation {previous.version} -> {generation.version} "
+            f"(loaded in {time.monotonic() - start:.2f}s)"
+        )
+        self._retire_generation(previous)
+        return True
+    
+    def _retire_generation(self, generation: IndexGeneration) -> None:
+        """
+        Release a generation that was swapped out.
+        
+        Queries that started on it may still be running. The in-process
+        indexes are simply left to the garbage collector; subclasses holding
+        external resources release them here.
+        """
+    
+    def reload_if_stale(self) -> Optional[Future]:
+        """
+        Start a reload if ingestion recorded a newer collection version.
+        
+        Returns:
+            The reload's Future, or None if the serving generation is current.
+        """
+        version = get_collection_version(self.collection_name)
+        if version is None or version == self._generation.version:
+            return None
+        return self.reload()
+    
+    def start_index_watch(self, interval_s: float) -> None:
+        """
+        Watch the collection version file and reload when it changes.
+        
+        A new version is only acted on once it has been stable for one
+        polling interval, so an ingestion run that is still writing the
+        derived indexes is not picked up halfway.
+        
+        Args:
+            interval_s: Polling interval in seconds.
+        """
+        if self._watch_stop is not None:
+            return
+        self._watch_stop = threading.Event()
+        threading.Thread(
+            target=self._watch_index_version,
+            args=(interval_s, self._watch_stop),
+            name="hybrid-retriever-watch",
+            daemon=True
+        ).start()
+        logger.info(f"Watching collection version every {interval_s}s")
+    
+    def stop_index_watch(self) -> None:
+        """Stop the watcher started by start_index_watch()."""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+    
+    def _watch_index_version(self, interval_s: float, stop: threading.Event) -> None:
+        """Poll the collection version until stopped (runs on the watch thread)."""
+        last_seen = get_collection_version(self.collection_name)
+        while not stop.wait(interval_s):
+            try:
+                version = get_collection_version(self.collection_name)
+                if version == last_seen:
+                    self.reload_if_stale()
+                last_seen = version
+            except Exception as e:
+                logger.warning(f"Index version check failed: {e}")
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return hit/miss statistics of the retriever's caches.
+        
+        The query embedding entry also carries the micro-batcher's batch
+        counters and batch size histogram when batching is enabled. Query
+        analysis statistics are those of the serving generation.
+        
+        Returns:
+            Dictionary mapping cache name to its statistics.
+        """
+        stats: Dict[str, Dict[str, Any]] = {}
+        if self._embedder:
+            stats["query_embeddings"] = self._embedder.stats()
+        if self._result_cache:
+            stats["results"] = self._result_cache.stats()
+        if self._generation.analyzer:
+            stats["query_analysis"] = self._generation.analyzer.stats()
+        return stats
     
     def format_context(
         self,
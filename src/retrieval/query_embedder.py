@@ -0,0 +1,278 @@
+"""
+Query Embedding for Malaysian Legal RAG
+
+This module embeds queries for the semantic search leg, in front of a
+bounded LRU cache keyed on the normalized query text.
+
+Repeated questions (the same user question, or the evaluation harness
+re-running the golden dataset) are then answered without running the embedding model again.
+
+Cache misses from concurrent callers can go through an EmbeddingBatcher,
+which collects the queries that arrive within a few milliseconds and runs the
+model once for all of them instead of once per query at batch size 1. A
+query with no other query on its way is embedded at once, so a single user
+never waits for a batch that will not fill.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import tracing
+from retrieval.cache import LRUCache
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for caching: lowercase and collapse whitespace."""
+    return " ".join(query.lower().split())
+
+
+class _EmbeddingRequest:
+    """One caller's texts waiting in an EmbeddingBatcher."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.embeddings: List[Any] = []
+        self.error: Optional[BaseException] = None
+
+
+class EmbeddingBatcher:
+    """
+    Dynamic micro-batching in front of an embedding function.
+
+    Callers block in __call__ while a worker thread collects requests: a
+    batch is closed max_wait_ms after its first request arrives, as soon
+    as it holds max_batch_size texts, or as soon as no other request has
+    been submitted. Requests that arrive while the model is running queue
+    up for the next batch. The model then runs once on the
+    batch's distinct texts and each caller gets its own vectors back.
+    Requests are never split, so one large request can exceed
+    max_batch_size.
+
+    The batcher has the embedding function interface (list of texts in,
+    list of vectors out), so it can be passed to QueryEmbedder.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Any,
+        max_wait_ms: float = 2.0,
+        max_batch_size: int = 32
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embedding_function: Embedding function to batch calls to.
+            max_wait_ms: How long a batch waits for more requests after the
+                first one arrives.
+            max_batch_size: Number of texts that closes a batch early.
+        """
+        self.embedding_function = embedding_function
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._queue: "queue.Queue[_EmbeddingRequest]" = queue.Queue()
+        # Requests submitted by callers but not yet taken into a batch
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.batch_sizes: Counter = Counter()  # texts per model call -> count
+        self.requests = 0
+        self.texts = 0
+
+    def __call__(self, texts: List[str]) -> List[Any]:
+        """
+        Embed texts as part of the next batch.
+
+        Args:
+            texts: Texts to embed.
+
+        Returns:
+            One embedding per text, in order.
+        """
+        if not texts:
+            return []
+
+        request = _EmbeddingRequest(list(texts))
+        self._ensure_worker()
+        with self._pending_lock:
+            self._pending += 1
+        self._queue.put(request)
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+        return request.embeddings
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread on first use."""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="embedding-batcher",
+                    daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List[_EmbeddingRequest]:
+        """Block for the next request, then gather a batch around it."""
+        batch = [self._take(self._queue.get())]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+
+        while size < self.max_batch_size:
+            # Nobody else is embedding: waiting could not fill the batch
+            with self._pending_lock:
+                if self._pending == 0:
+                    break
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    request = self._queue.get(timeout=timeout)
+                else:
+                    # Past the deadline: only take requests already queued
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(self._take(request))
+            size += len(request.texts)
+        return batch
+
+    def _take(self, request: _EmbeddingRequest) -> _EmbeddingRequest:
+        """Count a request as taken off the queue into a batch."""
+        with self._pending_lock:
+            self._pending -= 1
+        return request
+
+    def _run(self) -> None:
+        """Worker loop: collect a batch, embed it, hand out the vectors."""
+        while True:
+            batch = self._collect()
+            # Identical queries from different callers are embedded once
+            distinct = list(dict.fromkeys(
+                text for request in batch for text in request.texts
+            ))
+
+            try:
+                embeddings = dict(zip(distinct, self.embedding_function(distinct)))
+                for request in batch:
+                    request.embeddings = [embeddings[text] for text in request.texts]
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+
+            with self._stats_lock:
+                self.batch_sizes[len(distinct)] += 1
+                self.requests += len(batch)
+                self.texts += sum(len(request.texts) for request in batch)
+
+            for request in batch:
+                request.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters and the histogram of texts per model call."""
+        with self._stats_lock:
+            batches = sum(self.batch_sizes.values())
+            embedded = sum(size * count for size, count in self.batch_sizes.items())
+            return {
+                "batches": batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "mean_batch_size": embedded / batches if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "max_wait_ms": self.max_wait_ms,
+                "max_batch_size": self.max_batch_size,
+            }
+
+
+class QueryEmbedder:
+    """Embeds queries with an LRU cache of normalized query -> vector."""
+
+    def __init__(
+        self,
+        embedding_function: Optional[Any] = None,
+        cache_size: int = 1024,
+        batch_max_wait_ms: Optional[float] = None,
+        batch_max_size: int = 32
+    ):
+        """
+        Initialize the query embedder.
+
+        Args:
+            embedding_function: Chroma-compatible embedding function (called
+                with a list of texts). If None, Chroma's default
+                all-MiniLM-L6-v2 function is used, matching ingestion.
+            cache_size: Maximum number of cached query embeddings
+                (0 disables the cache).
+            batch_max_wait_ms: If set, cache misses of concurrent callers
+                are micro-batched (see EmbeddingBatcher) with this wait.
+            batch_max_size: Number of texts that closes a batch early.
+        """
+        if embedding_function is None:
+            from chromadb.utils import embedding_functions
+            embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        if batch_max_wait_ms is not None:
+            embedding_function = EmbeddingBatcher(
+                embedding_function,
+                max_wait_ms=batch_max_wait_ms,
+                max_batch_size=batch_max_size
+            )
+
+        self.embedding_function = embedding_function
+        self.cache = LRUCache(cache_size)
+
+    def embed(self, queries: List[str]) -> List[np.ndarray]:
+        """
+        Embed queries, running the model only for cache misses.
+
+        Misses are deduplicated and embedded in a single batch.
+
+        Args:
+            queries: Query texts.
+
+        Returns:
+            One float32 vector per query, in query order.
+        """
+        keys = [normalize_query(query) for query in queries]
+        vectors: Dict[str, np.ndarray] = {}
+        misses: List[str] = []
+
+        for key in dict.fromkeys(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                misses.append(key)
+            else:
+                vectors[key] = cached
+
+        with tracing.span(
+            "embed_query", queries=len(keys), cache_hits=len(vectors), cache_misses=len(misses)
+        ):
+            if misses:
+                embeddings = self.embedding_function(misses)
+                for key, embedding in zip(misses, embeddings):
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    vectors[key] = vector
+                    self.cache.put(key, vector)
+
+        return [vectors[key] for key in keys]
+
+    def warm_up(self) -> None:
+        """Run the model once so the first real query does not pay its load time."""
+        self.embedding_function(["warm up"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics (and batching statistics, if batched)."""
+        stats = self.cache.stats()
+        if isinstance(self.embedding_function, EmbeddingBatcher):
+            stats["batching"] = self.embedding_function.stats()
+        return stats
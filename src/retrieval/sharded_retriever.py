@@ -0,0 +1,446 @@
+"""
+Sharded Retriever for Malaysian Legal RAG
+
+This module splits the hybrid retriever's search legs across worker
+processes, so keyword scoring and exact vector search are not bound to one
+core and one GIL as the corpus grows from a few acts to the statute book.
+
+Each shard is an act, or a group of acts (RAGConfig.shard_act_groups), and
+runs in its own process holding:
+- its slice of the BM25 postings, scored with the collection-wide IDF and
+  average document length, so shard scores equal the unsharded scores
+- its rows of the exported embedding matrix (semantic_backend="exact")
+
+The coordinating ShardedRetriever is a HybridRetriever: it analyzes (and
+prunes) each query and embeds it once, fans the term ids and vectors out to
+every shard the filter touches, merges the shard top-k lists by score and
+fuses the legs with the usual RRF. Caching, filters, citations and reloads
+behave as in HybridRetriever; each index generation starts its own shards,
+and a shard whose process dies is restarted on its own.
+"""
+
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import tracing
+from config import RAGConfig, setup_logging
+from retrieval.bm25_index import BM25Index, DocSubset
+from retrieval.document_store import DocumentStore, RetrievalFilter
+from retrieval.hybrid_retriever import HybridRetriever, IndexGeneration
+from retrieval.vector_index import VectorIndex
+
+# Configure logging
+logger = setup_logging(__name__)
+
+# Swapped-out shards are stopped after this long, once queries pinned to
+# their generation have finished
+SHARD_RETIRE_DELAY_S = 30.0
+
+# Worker-process state: (global ordinals, BM25 slice, vector slice)
+_shard_state: Optional[Tuple[np.ndarray, BM25Index, Optional[VectorIndex]]] = None
+
+
+def _load_shard(
+    ordinals: np.ndarray,
+    bm25: BM25Index,
+    vectors: Optional[VectorIndex]
+) -> int:
+    """Install a shard's indexes in the worker process; returns its size."""
+    global _shard_state
+    _shard_state = (ordinals, bm25, vectors)
+    return len(ordinals)
+
+
+def _local_subset(bitmap: Optional[np.ndarray], n_docs: int) -> Optional[DocSubset]:
+    """Rebuild the shard-local DocSubset sent by the coordinator."""
+    return DocSubset(bitmap, n_docs) if bitmap is not None else None
+
+
+def _shard_keyword_search(
+    queries: List[np.ndarray],
+    n_results: int,
+    bitmap: Optional[np.ndarray],
+    dynamic_pruning: Optional[bool] = None
+) -> List[List[Tuple[int, float]]]:
+    """Keyword search in the worker; returns hits with global ordinals."""
+    ordinals, bm25, _ = _shard_state
+    batch_hits = bm25.search_ids_many(
+        queries, n_results, _local_subset(bitmap, len(ordinals)), dynamic_pruning
+    )
+    return [[(int(ordinals[doc]), score) for doc, score in hits] for hits in batch_hits]
+
+
+def _shard_semantic_search(
+    query_vectors: np.ndarray,
+    n_results: int,
+    bitmap: Optional[np.ndarray]
+) -> List[List[Tuple[int, float]]]:
+    """Vector search in the worker; returns hits with global ordinals."""
+    ordinals, _, vectors = _shard_state
+    batch_hits = vectors.search(query_vectors, n_results, _local_subset(bitmap, len(ordinals)))
+    return [[(int(ordinals[doc]), score) for doc, score in hits] for hits in batch_hits]
+
+
+def merge_shard_hits(
+    shard_hits: Iterable[Sequence[Tuple[int, float]]],
+    n_results: int
+) -> List[Tuple[int, float]]:
+    """
+    Merge per-shard top-k lists into the overall top-k.
+
+    Args:
+        shard_hits: (global ordinal, score) lists, one per shard.
+        n_results: Number of results to keep.
+
+    Returns:
+        The best hits, highest score first; ties keep the lower ordinal
+        first, as in an unsharded search.
+    """
+    return heapq.nsmallest(
+        n_results,
+        chain.from_iterable(shard_hits),
+        key=lambda hit: (-hit[1], hit[0])
+    )
+
+
+def plan_shards(
+    store: DocumentStore,
+    act_groups: Optional[List[List[int]]] = None
+) -> List[Tuple[str, Tuple[int, ...], np.ndarray]]:
+    """
+    Assign the store's documents to shards.
+
+    Args:
+        store: Document store of the generation being sharded.
+        act_groups: Acts to keep together in one shard. Acts not listed
+            get a shard each.
+
+    Returns:
+        (name, act numbers, ascending ordinals) per non-empty shard.
+    """
+    present = sorted(int(act) for act in np.unique(store.act_number))
+    grouped = {int(act) for group in act_groups or [] for act in group}
+    groups = [list(group) for group in act_groups or []]
+    groups += [[act] for act in present if act not in grouped]
+
+    shards = []
+    for group in groups:
+        ordinals = np.flatnonzero(np.isin(store.act_number, group))
+        if len(ordinals):
+            name = "acts_" + "_".join(str(act) for act in group)
+            shards.append((name, tuple(group), ordinals))
+    return shards
+
+
+class Shard:
+    """A worker process serving one group of acts."""
+
+    def __init__(
+        self,
+        name: str,
+        act_numbers: Tuple[int, ...],
+        ordinals: np.ndarray,
+        bm25: BM25Index,
+        vectors: Optional[VectorIndex]
+    ):
+        """
+        Start the worker and send it the shard's slices of the indexes.
+
+        Args:
+            name: Shard name (for logs).
+            act_numbers: Acts served by the shard.
+            ordinals: Ascending global ordinals of the shard's documents.
+            bm25: The generation's full keyword index.
+            vectors: The generation's full vector index, if any.
+        """
+        self.name = name
+        self.act_numbers = act_numbers
+        self.ordinals = ordinals
+        self.has_vectors = vectors is not None
+        self._bm25 = bm25
+        self._vectors = vectors
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.ready: Future = self.restart()
+
+    def restart(self) -> Future:
+        """
+        (Re)start the worker process and load the shard into it.
+
+        Returns:
+            Future resolving to the number of documents loaded. Searches
+            submitted afterwards run once loading has finished.
+        """
+        with self._lock:
+            return self._restart()
+
+    def _restart(self) -> Future:
+        """restart() with the lock held."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        # Spawn rather than fork: the coordinator runs search and reload
+        # threads, which a forked child would inherit mid-operation
+        self._executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self.ready = self._executor.submit(
+            _load_shard,
+            self.ordinals,
+            self._bm25.shard(self.ordinals),
+            self._vectors.shard(self.ordinals) if self._vectors is not None else None
+        )
+        return self.ready
+
+    def local_bitmap(self, subset: Optional[DocSubset]) -> Optional[np.ndarray]:
+        """Return the shard-local packed bitmap of a subset (None = all)."""
+        if subset is None:
+            return None
+        members = subset.mask[self.ordinals]
+        return None if members.all() else np.packbits(members)
+
+    def overlaps(self, subset: Optional[DocSubset]) -> bool:
+        """Whether any of the shard's documents are in the subset."""
+        return subset is None or bool(subset.mask[self.ordinals].any())
+
+    def submit(self, function: Callable[..., Any], *args: Any) -> Future:
+        """Run a search function in the shard's worker, restarting it if it died."""
+        with self._lock:
+            try:
+                return self._executor.submit(function, *args)
+            except BrokenProcessPool:
+                logger.warning(f"Shard {self.name} worker died, restarting it")
+                self._restart()
+                return self._executor.submit(function, *args)
+
+    def close(self, wait: bool = False) -> None:
+        """Stop the worker (searches already submitted still complete)."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+
+
+@dataclass
+class ShardedGeneration(IndexGeneration):
+    """An index generation with the shard processes serving it."""
+    shards: List[Shard] = field(default_factory=list)
+
+
+class ShardedRetriever(HybridRetriever):
+    """
+    Hybrid retriever whose search legs fan out to per-act worker processes.
+
+    Semantic search is sharded when the exact vector backend is configured;
+    with Chroma, the semantic leg is queried as in HybridRetriever.
+    """
+
+    def _load_generation(self, client: Optional[Any] = None) -> IndexGeneration:
+        """Load the indexes, then start one shard per act group over them."""
+        generation = super()._load_generation(client)
+        if generation.bm25 is None:
+            return generation
+
+        shards = [
+            Shard(name, acts, ordinals, generation.bm25, generation.vectors)
+            for name, acts, ordinals in plan_shards(
+                generation.store, self.config.shard_act_groups
+            )
+        ]
+        try:
+            for shard in shards:
+                shard.ready.result()
+        except Exception:
+            for shard in shards:
+                shard.close()
+            raise
+
+        logger.info(
+            f"Started {len(shards)} shards: "
+            + ", ".join(f"{shard.name} ({len(shard.ordinals)} docs)" for shard in shards)
+        )
+        return ShardedGeneration(**vars(generation), shards=shards)
+
+    def _retire_generation(self, generation: IndexGeneration) -> None:
+        """Stop a swapped-out generation's shards after a grace period."""
+        shards = getattr(generation, "shards", [])
+
+        def close_shards() -> None:
+            for shard in shards:
+                shard.close()
+
+        if shards:
+            timer = threading.Timer(SHARD_RETIRE_DELAY_S, close_shards)
+            timer.daemon = True
+            timer.start()
+
+    def _fan_out(
+        self,
+        shards: List[Shard],
+        function: Callable[..., List[List[Tuple[int, float]]]],
+        payload: Any,
+        n_queries: int,
+        n_results: int,
+        subset: Optional[DocSubset],
+        *args: Any
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Run a search on every shard the subset touches and merge the hits.
+
+        Extra args are passed to the search function after the subset.
+
+        A shard that fails contributes no hits. If its process died, the
+        next search submitted to it restarts it first.
+
+        Returns:
+            Merged (global ordinal, score) top-k per query.
+        """
+        with tracing.span("shard_fan_out", search=function.__name__) as span:
+            futures = [
+                (shard, shard.submit(function, payload, n_results, shard.local_bitmap(subset), *args))
+                for shard in shards if shard.overlaps(subset)
+            ]
+
+            per_query: List[List[List[Tuple[int, float]]]] = [[] for _ in range(n_queries)]
+            failed = 0
+            for shard, future in futures:
+                try:
+                    batch_hits = future.result()
+                except Exception as e:
+                    logger.error(f"Shard {shard.name} failed: {e}")
+                    failed += 1
+                    continue
+                for hits, shard_hits in zip(per_query, batch_hits):
+                    hits.append(shard_hits)
+
+            merged = [merge_shard_hits(hits, n_results) for hits in per_query]
+            span.set(
+                shards=len(futures),
+                failed_shards=failed,
+                candidates=sum(len(hits) for hits in merged)
+            )
+        return merged
+
+    def _semantic_search_many(
+        self,
+        queries: List[str],
+        n_results: int,
+        filters: Optional[RetrievalFilter] = None,
+        generation: Optional[IndexGeneration] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Perform semantic search for a batch of queries across the shards.
+
+        Queries are embedded once here; each shard scans its rows of the
+        embedding matrix. Falls back to HybridRetriever's search when the
+        generation has no vector shards.
+
+        Returns one list of (doc_id, similarity) tuples per query.
+        """
+        generation = generation or self._generation
+        shards = getattr(generation, "shards", [])
+        if not shards or not shards[0].has_vectors or not self._embedder:
+            return super()._semantic_search_many(queries, n_results, filters, generation)
+
+        try:
+            batch_hits = self._fan_out(
+                shards,
+                _shard_semantic_search,
+                np.vstack(self._embedder.embed(queries)),
+                len(queries),
+                n_results,
+                generation.store.resolve_filter(filters)
+            )
+        except Exception as e:
+            logger.error(f"Semantic search failed: {e}")
+            return [[] for _ in queries]
+
+        return [
+            [(generation.store.doc_ids[doc], score) for doc, score in hits]
+            for hits in batch_hits
+        ]
+
+    def _keyword_search_many(
+        self,
+        queries: List[str],
+        n_results: int,
+        subset: Optional[DocSubset] = None,
+        generation: Optional[IndexGeneration] = None,
+        max_df_ratio: Optional[float] = None,
+        dynamic_pruning: Optional[bool] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Perform keyword search for a batch of queries across the shards.
+
+        Queries are analyzed (and pruned) once here against the collection
+        vocabulary; shards score the term ids on their postings slices.
+
+        Returns one list of (doc_id, score) tuples per query.
+        """
+        generation = generation or self._generation
+        shards = getattr(generation, "shards", [])
+        if not shards:
+            return super()._keyword_search_many(
+                queries, n_results, subset, generation, max_df_ratio, dynamic_pruning
+            )
+
+        query_term_ids = self._query_term_ids(queries, generation, max_df_ratio)
+        batch_hits = self._fan_out(
+            shards,
+            _shard_keyword_search,
+            query_term_ids,
+            len(queries),
+            n_results,
+            subset,
+            dynamic_pruning
+        )
+        return [
+            [
+                (generation.store.doc_ids[doc], score)
+                for doc, score in hits
+                if score > 0  # Filter zero scores
+            ]
+            for hits in batch_hits
+        ]
+
+    def shard_stats(self) -> List[Dict[str, Any]]:
+        """Return the name, acts and size of each shard of the serving generation."""
+        return [
+            {
+                "name": shard.name,
+                "act_numbers": list(shard.act_numbers),
+                "documents": len(shard.ordinals),
+                "vectors": shard.has_vectors,
+            }
+            for shard in getattr(self._generation, "shards", [])
+        ]
+
+    def close(self) -> None:
+        """Stop the index watch and every shard process."""
+        self.stop_index_watch()
+        for shard in getattr(self._generation, "shards", []):
+            shard.close(wait=True)
+
+
+def create_retriever(config: Optional[RAGConfig] = None) -> HybridRetriever:
+    """
+    Create the retriever selected by the configuration.
+
+    Args:
+        config: Optional RAGConfig object. If None, uses defaults.
+
+    Returns:
+        A ShardedRetriever if config.sharded_retrieval is set, otherwise a
+        HybridRetriever.
+    """
+    config = config or RAGConfig()
+    if config.sharded_retrieval:
+        return ShardedRetriever(config)
+    return HybridRetriever(config)
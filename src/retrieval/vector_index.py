@@ -0,0 +1,452 @@
+"""
+Exact Vector Index for Malaysian Legal RAG
+
+This module implements the in-process "exact" backend for the semantic leg
+of the hybrid retriever.
+
+The collection's embeddings are exported once into a contiguous float32
+matrix (rows L2-normalized, one row per chunk) stored as a memory-mapped
+.npy file with an aligned doc-id table. A query batch is answered with a
+single matrix product and np.argpartition, so results are exact (perfect
+recall) and latency depends only on corpus size, with no HNSW graph
+traversal or client round trip.
+
+To cut per-replica memory, the artifact also holds quantized copies of the
+matrix:
+- int8: per-dimension scalar quantization (4x smaller)
+- binary: one bit per dimension (above / below the corpus mean of that
+  dimension), compared by Hamming distance (32x smaller)
+
+With a quantized mode, the first pass scans only the (in-memory) quantized
+copy, and a shortlist of rescore_factor * n_results candidates is rescored
+against the full-precision rows, which stay memory-mapped and are only
+touched for those candidates.
+
+Searches can be restricted to a DocSubset: only the rows of the subset's
+contiguous runs are scanned.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from retrieval.bm25_index import MAX_SUBSET_RANGES, DocSubset
+
+# Bump when the on-disk layout changes
+VECTOR_INDEX_FORMAT_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+DOC_IDS_FILE = "doc_ids.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+INT8_CODES_FILE = "int8_codes.npy"
+INT8_SCALES_FILE = "int8_scales.npy"
+BINARY_CODES_FILE = "binary_codes.npy"
+BINARY_THRESHOLDS_FILE = "binary_thresholds.npy"
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+# Rows scored per block, bounding the temporaries of quantized scans
+BLOCK_ROWS = 1024
+
+# Number of set bits in each byte value (fallback for NumPy < 2.0)
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+# Default full-precision candidates per result for each quantized mode
+DEFAULT_RESCORE_FACTORS = {"none": 1, "int8": 4, "binary": 10}
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 vectors scaled to unit L2 norm (zero rows are kept)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scalar-quantize a matrix to int8 with one scale per dimension.
+
+    Returns:
+        (codes, scales) such that matrix ~= codes * scales.
+    """
+    scales = (np.abs(matrix).max(axis=0) / 127.0).astype(np.float32)
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def quantize_binary(
+    matrix: np.ndarray,
+    thresholds: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Binary-quantize a matrix to packed bits (one bit per dimension).
+
+    Args:
+        matrix: Vectors to quantize.
+        thresholds: Per-dimension thresholds (e.g. the corpus mean, so
+            that bits split every dimension evenly). Defaults to 0 (sign).
+
+    Returns:
+        (n, ceil(dim / 8)) uint8 packed bits.
+    """
+    matrix = np.asarray(matrix)
+    if thresholds is not None:
+        matrix = matrix - thresholds
+    return np.packbits(matrix > 0, axis=1)
+
+
+def hamming_distances(queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """
+    Return the Hamming distances between packed query and document codes.
+
+    Codes are compared as 64-bit words when their width allows it.
+
+    Args:
+        queries: (n_queries, n_bytes) packed bits.
+        codes: (n_docs, n_bytes) packed bits.
+
+    Returns:
+        (n_queries, n_docs) int32 distances.
+    """
+    if queries.shape[1] % 8 == 0:
+        queries = np.ascontiguousarray(queries).view(np.uint64)
+        codes = np.ascontiguousarray(codes).view(np.uint64)
+    xor = queries[:, None, :] ^ codes[None, :, :]
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=2, dtype=np.int32)
+    return POPCOUNT[xor.view(np.uint8)].sum(axis=2, dtype=np.int32)
+
+
+class VectorIndex:
+    """
+    Cosine-similarity search over an embedding matrix.
+
+    Exact with quantization="none"; otherwise a quantized first pass with
+    full-precision rescoring of the shortlist.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        quantization: str = "none",
+        codes: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+        rescore_factor: Optional[int] = None,
+        thresholds: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            matrix: (n_docs, dim) float32 matrix with unit-norm rows, in
+                document ordinal order. May be a np.memmap.
+            quantization: "none", "int8" or "binary".
+            codes: Quantized copy of matrix (required unless "none").
+            scales: Per-dimension int8 scales (required for "int8").
+            rescore_factor: Candidates rescored at full precision per
+                requested result, for quantized modes (None: the mode's
+                default from DEFAULT_RESCORE_FACTORS).
+            thresholds: Per-dimension bit thresholds ("binary").
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATIONS}")
+        if quantization != "none" and codes is None:
+            raise ValueError(f"Quantization {quantization!r} requires quantized codes")
+
+        self.matrix = matrix
+        self.quantization = quantization
+        self.codes = codes
+        self.scales = scales
+        self.thresholds = thresholds
+        self.rescore_factor = max(1, rescore_factor or DEFAULT_RESCORE_FACTORS[quantization])
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        embeddings: np.ndarray,
+        quantization: str = "none",
+        rescore_factor: Optional[int] = None
+    ) -> "VectorIndex":
+        """Build an in-memory index (normalizing and quantizing embeddings)."""
+        matrix = normalize_rows(embeddings)
+        codes, scales, thresholds = None, None, None
+        if quantization == "int8":
+            codes, scales = quantize_int8(matrix)
+        elif quantization == "binary":
+            thresholds = matrix.mean(axis=0)
+            codes = quantize_binary(matrix, thresholds)
+        return cls(matrix, quantization, codes, scales, rescore_factor, thresholds)
+
+    def shard(self, ordinals: np.ndarray) -> "VectorIndex":
+        """
+        Return an in-memory index of a subset of rows, renumbered from 0.
+
+        Args:
+            ordinals: Ascending ordinals of the shard's documents. Row
+                ordinals[i] becomes row i of the shard.
+
+        Returns:
+            A new VectorIndex with the same quantization and rescoring.
+        """
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        return VectorIndex(
+            np.asarray(self.matrix[ordinals]),
+            self.quantization,
+            self.codes[ordinals] if self.codes is not None else None,
+            self.scales,
+            self.rescore_factor,
+            self.thresholds
+        )
+
+    @property
+    def n_docs(self) -> int:
+        return int(self.matrix.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1])
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """
+        Return the size of the index structures.
+
+        "scanned" is what the first pass reads for every query (and should
+        stay resident); "full_precision" is the float32 matrix, which
+        quantized modes only touch for rescored candidates.
+        """
+        if self.quantization == "none":
+            scanned = self.matrix.nbytes
+        else:
+            scanned = self.codes.nbytes + sum(
+                extra.nbytes for extra in (self.scales, self.thresholds) if extra is not None
+            )
+        return {"scanned": int(scanned), "full_precision": int(self.matrix.nbytes)}
+
+    def _prepare(self, queries: np.ndarray) -> np.ndarray:
+        """Convert normalized queries into the first pass's representation."""
+        if self.quantization == "int8":
+            return queries * self.scales
+        if self.quantization == "binary":
+            return quantize_binary(queries, self.thresholds)
+        return queries
+
+    def _score_block(self, prepared: np.ndarray, rows: Union[slice, np.ndarray]) -> np.ndarray:
+        """First-pass scores (higher is better) of the given rows."""
+        if self.quantization == "none":
+            return prepared @ self.matrix[rows].T
+        block = self.codes[rows]
+        if self.quantization == "int8":
+            return prepared @ block.T.astype(np.float32)
+        # Binary: negative Hamming distance between packed sign bits
+        return -hamming_distances(prepared, block).astype(np.float32)
+
+    def _first_pass(
+        self,
+        queries: np.ndarray,
+        subset: Optional[DocSubset]
+    ) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Score all searched rows.
+
+        Returns:
+            (rows, scores): the searched row ordinals (None for all rows)
+            and a (n_queries, n_rows) score matrix.
+        """
+        prepared = self._prepare(queries)
+        step = self.n_docs if self.quantization == "none" else BLOCK_ROWS
+
+        if subset is not None and len(subset.starts) > MAX_SUBSET_RANGES:
+            rows = np.flatnonzero(subset.mask)
+            blocks: List[Union[slice, np.ndarray]] = [
+                rows[i:i + step] for i in range(0, len(rows), step)
+            ]
+        else:
+            # Scan only the contiguous row ranges that are searched
+            ranges = [(0, self.n_docs)] if subset is None else zip(subset.starts, subset.ends)
+            blocks = [
+                slice(i, min(i + step, end))
+                for start, end in ranges
+                for i in range(start, end, step)
+            ]
+            rows = None if subset is None else np.concatenate(
+                [np.arange(start, end) for start, end in zip(subset.starts, subset.ends)]
+                or [np.zeros(0, dtype=np.int64)]
+            )
+
+        if not blocks:
+            return rows, np.zeros((len(queries), 0), dtype=np.float32)
+        return rows, np.hstack([self._score_block(prepared, block) for block in blocks])
+
+    def search(
+        self,
+        query_vectors: np.ndarray,
+        n_results: int,
+        subset: Optional[DocSubset] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Return the top-k documents for each query vector.
+
+        Args:
+            query_vectors: (n_queries, dim) query embeddings (normalized here).
+            n_results: Number of results per query.
+            subset: Optional DocSubset restricting the searched rows.
+
+        Returns:
+            One list of (document ordinal, cosine similarity) per query,
+            sorted by similarity. Similarities are always computed at full
+            precision.
+        """
+        queries = normalize_rows(np.atleast_2d(query_vectors))
+        if self.n_docs == 0 or n_results <= 0:
+            return [[] for _ in range(len(queries))]
+
+        rows, scores = self._first_pass(queries, subset)
+        n_candidates = scores.shape[1]
+        if n_candidates == 0:
+            return [[] for _ in range(len(queries))]
+
+        k = min(n_results, n_candidates)
+        shortlist = k if self.quantization == "none" else min(n_candidates, k * self.rescore_factor)
+        if shortlist < n_candidates:
+            top = np.argpartition(-scores, shortlist - 1, axis=1)[:, :shortlist]
+        else:
+            top = np.broadcast_to(np.arange(n_candidates), (len(queries), n_candidates))
+
+        batch_hits = []
+        for query, query_scores, candidates in zip(queries, scores, top):
+            docs = rows[candidates] if rows is not None else candidates
+            if self.quantization == "none":
+                similarities = query_scores[candidates]
+            else:
+                # Rescore the shortlist against full-precision rows, read in
+                # ascending order for memory-map locality
+                docs = np.sort(docs)
+                similarities = self.matrix[docs] @ query
+            best = np.argsort(-similarities, kind="stable")[:k]
+            batch_hits.append([
+                (int(docs[i]), float(similarities[i])) for i in best
+            ])
+        return batch_hits
+
+
+def save_vector_index(
+    directory: Path,
+    embeddings: np.ndarray,
+    doc_ids: Sequence[str],
+    collection_version: Optional[str],
+    quantizations: Sequence[str] = QUANTIZATIONS
+) -> None:
+    """
+    Write a vector index artifact.
+
+    The artifact is written to a temporary sibling directory and then moved
+    into place, so readers never see a half-written index.
+
+    Args:
+        directory: Target artifact directory.
+        embeddings: (n_docs, dim) embeddings in doc_ids order (normalized here).
+        doc_ids: Chunk ids, one per row.
+        collection_version: Version of the collection the embeddings came from.
+        quantizations: Quantized copies to store alongside the float32
+            matrix ("int8", "binary").
+    """
+    matrix = normalize_rows(embeddings)
+    if matrix.ndim != 2 or len(matrix) != len(doc_ids):
+        raise ValueError(
+            f"Expected one embedding row per doc id, got {matrix.shape} "
+            f"for {len(doc_ids)} doc ids"
+        )
+
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    old_dir = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    np.save(tmp_dir / EMBEDDINGS_FILE, np.ascontiguousarray(matrix))
+    if "int8" in quantizations:
+        codes, scales = quantize_int8(matrix)
+        np.save(tmp_dir / INT8_CODES_FILE, codes)
+        np.save(tmp_dir / INT8_SCALES_FILE, scales)
+    if "binary" in quantizations:
+        thresholds = matrix.mean(axis=0)
+        np.save(tmp_dir / BINARY_CODES_FILE, quantize_binary(matrix, thresholds))
+        np.save(tmp_dir / BINARY_THRESHOLDS_FILE, thresholds)
+
+    with open(tmp_dir / DOC_IDS_FILE, "w", encoding="utf-8") as f:
+        json.dump(list(doc_ids), f, ensure_ascii=False)
+
+    manifest = {
+        "format_version": VECTOR_INDEX_FORMAT_VERSION,
+        "collection_version": collection_version,
+        "n_docs": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "quantizations": ["none"] + [q for q in QUANTIZATIONS if q in quantizations and q != "none"],
+    }
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if directory.exists():
+        directory.rename(old_dir)
+    tmp_dir.rename(directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_vector_index(
+    directory: Path,
+    quantization: str = "none",
+    rescore_factor: Optional[int] = None
+) -> Optional[Tuple[VectorIndex, List[str], Dict[str, Any]]]:
+    """
+    Load a vector index artifact with a memory-mapped embedding matrix.
+
+    Quantized codes are loaded into memory; the float32 matrix stays
+    memory-mapped.
+
+    Args:
+        directory: Artifact directory written by save_vector_index.
+        quantization: "none", "int8" or "binary".
+        rescore_factor: Candidates rescored per result (quantized modes,
+            None for the mode's default).
+
+    Returns:
+        (index, doc_ids, manifest), or None if the artifact is missing,
+        was written with a different format version, or does not contain
+        the requested quantized copy.
+    """
+    directory = Path(directory)
+    manifest_path = directory / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != VECTOR_INDEX_FORMAT_VERSION:
+        return None
+    if quantization not in manifest.get("quantizations", []):
+        return None
+
+    matrix = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+    codes, scales, thresholds = None, None, None
+    if quantization == "int8":
+        codes = np.load(directory / INT8_CODES_FILE)
+        scales = np.load(directory / INT8_SCALES_FILE)
+    elif quantization == "binary":
+        codes = np.load(directory / BINARY_CODES_FILE)
+        thresholds = np.load(directory / BINARY_THRESHOLDS_FILE)
+
+    with open(directory / DOC_IDS_FILE, "r", encoding="utf-8") as f:
+        doc_ids = json.load(f)
+
+    index = VectorIndex(matrix, quantization, codes, scales, rescore_factor, thresholds)
+    return index, doc_ids, manifest
@@ -0,0 +1,360 @@
+"""
+Lightweight per-stage latency tracing for MyLaw-RAG.
+
+A trace is a tree of timed spans for one request (retrieve, ask, an ingestion
+run). Instrumented code opens spans with the span() context manager; spans
+attach to the trace active in the current context, so one retrieval records
+its embedding, Chroma, BM25 and fusion stages under a single root:
+
+    with trace("retrieve", enabled=config.tracing, exporter=exporter) as t:
+        with span("keyword_search") as s:
+            ...
+            s.set(candidates=len(hits))
+    t.to_dict()  # {"trace_id": ..., "duration_ms": ..., "timings": ..., "spans": [...]}
+
+Opening a span with no active trace returns a shared no-op span, so disabled
+tracing costs one context variable lookup per stage. The active span lives in
+a contextvars.ContextVar: asyncio tasks inherit it; work handed to a thread
+pool must be wrapped with bind().
+
+Finished root traces go to an exporter: JSON lines (one span per line) or a
+Chrome trace file, viewable in chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import RAGConfig, get_data_dir
+
+
+def get_trace_dir() -> Path:
+    """Get the directory trace files are exported to."""
+    return get_data_dir() / "traces"
+
+
+class Span:
+    """One timed stage of a trace."""
+
+    __slots__ = (
+        "trace", "name", "span_id", "parent_id", "thread_id",
+        "start_ns", "end_ns", "attributes", "_token"
+    )
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = next(trace._span_ids)
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.attributes = attributes
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self._token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _current_span.reset(self._token)
+        self.end()
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes (counts, cache hits, ...) to the span."""
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        """Close the span and record it on its trace."""
+        self.end_ns = time.perf_counter_ns()
+        self.trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        """Span duration in milliseconds (up to now if still open)."""
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span as a JSON-serializable dict; times are relative to the trace start."""
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start_ns - self.trace.start_ns) / 1e6, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "thread_id": self.thread_id,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Span returned when no trace is active; every operation is a no-op."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# Innermost open span of the current context (None = not tracing)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "mylaw_rag_current_span", default=None
+)
+
+
+class Trace:
+    """
+    The spans recorded for one request.
+
+    The root span is opened on construction; finish() closes it and hands
+    the trace to the exporter. Spans from several threads may be recorded
+    concurrently.
+    """
+
+    def __init__(self, name: str, exporter: Optional["TraceExporter"] = None, **attributes: Any):
+        self.trace_id = os.urandom(8).hex()
+        self.exporter = exporter
+        # Closed spans below the root, in the order they ended
+        self.spans: List[Span] = []
+        self._span_ids = itertools.count(1)
+        self.start_wall_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.root = Span(self, name, None, attributes)
+        self.root.start_ns = self.start_ns
+
+    @contextmanager
+    def activate(self, parent: Optional[Span] = None) -> Iterator["Trace"]:
+        """
+        Make spans opened in this context children of parent (default: root).
+
+        Use around code that must not keep the context variable set across a
+        yield, e.g. inside a generator.
+        """
+        token = _current_span.set(parent or self.root)
+        try:
+            yield self
+        finally:
+            _current_span.reset(token)
+
+    def record(self, name: str, start_ns: int, end_ns: int, **attributes: Any) -> None:
+        """Record an already timed stage (perf_counter_ns clock) under the root."""
+        recorded = Span(self, name, self.root.span_id, attributes)
+        recorded.start_ns = start_ns
+        recorded.end_ns = end_ns
+        self.spans.append(recorded)
+
+    def finish(self) -> None:
+        """Close the root span and export the trace."""
+        if self.root.end_ns is not None:
+            return
+        self.root.end_ns = time.perf_counter_ns()
+        if self.exporter is not None:
+            self.exporter.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        """Duration of the root span in milliseconds."""
+        return self.root.duration_ms
+
+    def timings(self) -> Dict[str, float]:
+        """Total milliseconds per span name (stages may repeat, e.g. per query)."""
+        totals: Dict[str, float] = {}
+        for recorded in self.spans:
+            totals[recorded.name] = totals.get(recorded.name, 0.0) + recorded.duration_ms
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Trace summary attached to responses: timings plus every span."""
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "duration_ms": round(self.duration_ms, 3),
+            "timings": self.timings(),
+            "spans": [
+                recorded.to_dict()
+                for recorded in sorted(self.spans, key=lambda s: s.start_ns)
+            ],
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace active in this context, if any."""
+    active = _current_span.get()
+    return active.trace if active is not None else None
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """
+    Time a stage as a child of the current span: ``with span("fusion") as s:``.
+
+    Without an active trace this returns a shared no-op span, so disabled
+    tracing allocates nothing. Either way set() attaches attributes.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def annotate(**attributes: Any) -> None:
+    """Attach attributes to the current span, if tracing."""
+    active = _current_span.get()
+    if active is not None:
+        active.attributes.update(attributes)
+
+
+@contextmanager
+def trace(
+    name: str,
+    enabled: bool = True,
+    exporter: Optional["TraceExporter"] = None,
+    **attributes: Any
+) -> Iterator[Optional[Trace]]:
+    """
+    Start a root trace, or a child span if a trace is already active.
+
+    Nested entry points (ask -> retrieve) thus record into one trace, the
+    outermost one. Yields the new Trace, or None when nested or disabled.
+    """
+    if _current_span.get() is not None:
+        with span(name, **attributes):
+            yield None
+        return
+    if not enabled:
+        yield None
+        return
+    new_trace = Trace(name, exporter, **attributes)
+    try:
+        with new_trace.activate():
+            yield new_trace
+    finally:
+        new_trace.finish()
+
+
+@contextmanager
+def capture(name: str = "capture") -> Iterator[Trace]:
+    """
+    Trace everything run in the block, whatever the tracing config says.
+
+    For callers that want the timings of a single call, e.g.
+    ``with capture() as t: retriever.retrieve(q)``. Nothing is exported.
+    """
+    with trace(name) as captured:
+        if captured is None:
+            captured = current_trace()
+        yield captured
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Carry the current trace into fn when it runs on another thread.
+
+    Returns fn unchanged when no trace is active.
+    """
+    if _current_span.get() is None:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+class TraceExporter(ABC):
+    """Appends finished traces to a file; safe to share between threads."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, finished: Trace) -> None:
+        """Append a finished trace to the file."""
+        lines = self.format(finished)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not self.path.exists()
+            with open(self.path, "a", encoding="utf-8") as f:
+                if new_file:
+                    f.write(self.header())
+                f.writelines(line + "\n" for line in lines)
+
+    def header(self) -> str:
+        """Text written once at the start of a new file."""
+        return ""
+
+    @abstractmethod
+    def format(self, finished: Trace) -> List[str]:
+        """Lines to append for a trace."""
+
+
+class JsonLinesExporter(TraceExporter):
+    """One JSON object per span, with the trace id and absolute start time."""
+
+    def format(self, finished: Trace) -> List[str]:
+        lines = []
+        for recorded in [finished.root] + finished.spans:
+            record = recorded.to_dict()
+            record["trace_id"] = finished.trace_id
+            record["start_time_us"] = (
+                finished.start_wall_ns + recorded.start_ns - finished.start_ns
+            ) // 1000
+            lines.append(json.dumps(record, default=str))
+        return lines
+
+
+class ChromeTraceExporter(TraceExporter):
+    """
+    Chrome trace event format ("X" complete events, one row per thread).
+
+    The file is a JSON array left open for appending, which the trace
+    viewers accept (the closing bracket is optional in the format).
+    """
+
+    def header(self) -> str:
+        return "[\n"
+
+    def format(self, finished: Trace) -> List[str]:
+        pid = os.getpid()
+        lines = []
+        for recorded in [finished.root] + finished.spans:
+            event = {
+                "name": recorded.name,
+                "cat": finished.root.name,
+                "ph": "X",
+                "ts": (finished.start_wall_ns + recorded.start_ns - finished.start_ns) / 1000,
+                "dur": (recorded.end_ns - recorded.start_ns) / 1000,
+                "pid": pid,
+                "tid": recorded.thread_id,
+                "args": dict(recorded.attributes, trace_id=finished.trace_id),
+            }
+            lines.append(json.dumps(event, default=str) + ",")
+        return lines
+
+
+def exporter_for(config: RAGConfig) -> Optional[TraceExporter]:
+    """
+    Build the exporter selected by config.trace_export_format.
+
+    Returns None when tracing is off or export is disabled (traces are
+    then only attached to responses).
+    """
+    if not config.tracing or config.trace_export_format is None:
+        return None
+    if config.trace_export_format == "jsonl":
+        return JsonLinesExporter(get_trace_dir() / "spans.jsonl")
+    if config.trace_export_format == "chrome":
+        return ChromeTraceExporter(get_trace_dir() / "trace.json")
+    raise ValueError(f"Unknown trace_export_format: {config.trace_export_format!r}")
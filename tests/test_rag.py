@@ -12,7 +12,7 @@ import json
 import os
 import sys
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -74,6 +74,171 @@ class TestTextExtractor:
         
         assert "   " not in cleaned  # Multiple spaces removed
         assert "\n\n\n" not in cleaned  # Multiple newlines normalized
+    
+    def test_parallel_extraction_matches_sequential(self, tmp_path):
+        """Test a process pool writes the same outputs and reports failures."""
+        import shutil
+        from ingestion.manifest import MANIFEST_FILE
+        from ingestion.text_extractor import get_raw_data_dir, process_all_pdfs
+        
+        raw_dir = tmp_path / "raw"
+        raw_dir.mkdir()
+        shutil.copy(get_raw_data_dir() / "Act_137_Specific Relief Act 1951_EN.pdf", raw_dir)
+        (raw_dir / "Act_999_Broken Act 2000_EN.pdf").write_bytes(b"not a pdf")
+        
+        outputs = {}
+        for workers in (1, 2):
+            output_dir = tmp_path / f"processed_{workers}"
+            output_dir.mkdir()
+            results = process_all_pdfs(workers=workers, raw_dir=raw_dir, output_dir=output_dir)
+            assert results == {
+                "Act_137_Specific Relief Act 1951_EN.pdf": True,
+                "Act_999_Broken Act 2000_EN.pdf": False,
+            }
+            outputs[workers] = {
+                path.name: path.read_bytes()
+                for path in output_dir.iterdir() if path.name != MANIFEST_FILE
+            }
+        
+        assert list(outputs[1]) == ["Act_137_Specific Relief Act 1951_EN.json"]
+        assert outputs[2] == outputs[1]
+    
+    def test_page_parallel_extraction_keeps_page_order(self, monkeypatch):
+        """Test page ranges extracted by workers reassemble into the same text and offsets."""
+        from ingestion import text_extractor
+        
+        pdf_path = text_extractor.get_raw_data_dir() / "Act_137_Specific Relief Act 1951_EN.pdf"
+        pages = text_extractor.extract_pages_from_pdf(pdf_path)
+        
+        monkeypatch.setattr(text_extractor, "PAGES_PER_RANGE", 5)
+        assert len(text_extractor.page_ranges(len(pages))) > 1
+        assert text_extractor.extract_pages_from_pdf(pdf_path, workers=2) == pages
+        
+        text, offsets = text_extractor.join_pages(pages)
+        assert len(offsets) == len(pages)
+        for number, (offset, page) in enumerate(zip(offsets, pages), start=1):
+            assert text[offset:offset + len(page)] == page
+            assert text_extractor.page_number(offsets, offset) == number
+    
+    def test_streamed_cleaning_matches_whole_text(self):
+        """Test page-by-page cleaning equals cleaning the joined text, across page joins."""
+        from ingestion import text_extractor
+        
+        pdf_path = text_extractor.get_raw_data_dir() / "Act_136_Contracts Act 1950_EN.pdf"
+        pages = text_extractor.extract_pages_from_pdf(pdf_path)
+        # Noise split over a page join, and a page too short to cut
+        pages[3] += "\nSection 9.   Stamp at the foot.\nAGC"
+        pages[4] = "Malaysia\n12\n" + pages[4]
+        pages[5:5] = ["7"]
+        
+        text = "\n".join(pages)
+        streamed = "\n".join(text_extractor.iter_clean_text(pages)).strip()
+        assert streamed == text_extractor.clean_legal_text(text)
+        assert "AGC\nMalaysia" in text and "AGC" not in streamed
+    
+    def test_process_pdf_streams_same_document(self, tmp_path):
+        """Test the streamed output file is the same JSON the whole-text pipeline wrote."""
+        from ingestion import text_extractor
+        
+        pdf_path = text_extractor.get_raw_data_dir() / "Act_137_Specific Relief Act 1951_EN.pdf"
+        pages = text_extractor.extract_pages_from_pdf(pdf_path)
+        raw_text, page_offsets = text_extractor.join_pages(pages)
+        cleaned_text = text_extractor.clean_legal_text(raw_text)
+        expected = {
+            "metadata": text_extractor.extract_act_metadata(cleaned_text, pdf_path.name),
+            "raw_text": raw_text,
+            "cleaned_text": cleaned_text,
+            "char_count_raw": len(raw_text),
+            "char_count_cleaned": len(cleaned_text),
+            "page_count": len(pages),
+            "page_offsets": page_offsets,
+        }
+        
+        document = text_extractor.process_pdf(pdf_path, tmp_path)
+        
+        output = (tmp_path / (pdf_path.stem + ".json")).read_text(encoding="utf-8")
+        assert output == json.dumps(expected, ensure_ascii=False, indent=2)
+        assert "raw_text" not in document
+        assert document["char_count_cleaned"] == len(cleaned_text)
+        assert list(tmp_path.iterdir()) == [tmp_path / (pdf_path.stem + ".json")]
+
+
+class TestCleaningRules:
+    """Tests for the cleaning rule engine."""
+    
+    def test_single_pass_matches_rule_by_rule_removal(self):
+        """Test the compiled engine removes what applying each rule in turn removed."""
+        import re
+        from ingestion.cleaning_rules import RULES, CleaningEngine, get_profile
+        from ingestion.text_extractor import extract_text_from_pdf, get_raw_data_dir
+        
+        profile = get_profile("default")
+        engine = CleaningEngine(profile)
+        for pdf_path in sorted(get_raw_data_dir().glob("*.pdf")):
+            text = extract_text_from_pdf(pdf_path)
+            expected = text
+            for rule in profile.rules:
+                expected = re.sub(rule.pattern, "", expected, flags=re.IGNORECASE | re.MULTILINE)
+            assert engine.remove(text) == expected
+        
+        # Both compiled patterns are used, and every hit is counted once
+        assert len(engine.patterns) == 2
+        engine.reset_stats()
+        text = "AGC Malaysia\nSection 1.\n12\nwww.agc.gov.my PAGE 3 of 9\nagc malaysia"
+        assert engine.remove(text) == "\nSection 1.\n\n \n"
+        stats = engine.stats()
+        assert list(stats) == [rule.name for rule in profile.rules]
+        assert stats["agc_stamp"] == 2
+        assert stats["loose_page_number"] == stats["agc_url"] == stats["page_marker_en"] == 1
+        assert stats["url"] == 0
+        assert "reprint_marker_bm" not in stats and "reprint_marker_bm" in RULES
+    
+    def test_footer_stamp_with_page_number_is_removed(self):
+        """Test a page number left alone on a line by a removal is removed too."""
+        from ingestion.cleaning_rules import CleaningEngine, get_profile
+        from ingestion.text_extractor import clean_legal_text, iter_clean_text
+        
+        engine = CleaningEngine(get_profile("default"))
+        text = "Section 1.\n12 AGC Malaysia\nSection 2.\nAGC Malaysia 13\nSection 3 AGC Malaysia"
+        assert engine.remove(text) == "Section 1.\n\nSection 2.\n\nSection 3 "
+        assert engine.stats()["agc_stamp"] == 3
+        assert engine.stats()["loose_page_number"] == 2
+        
+        pages = ["Section 1.\n12 AGC Malaysia", "Section 2.\nAGC Malaysia 13\nSection 3."]
+        assert clean_legal_text("\n".join(pages)) == "Section 1.\nSection 2.\nSection 3."
+        assert "\n".join(iter_clean_text(pages)) == "Section 1.\nSection 2.\nSection 3."
+    
+    def test_profiles_by_language_and_from_file(self, tmp_path):
+        """Test EN/BM profiles are picked by language and file profiles extend them."""
+        from ingestion.cleaning_rules import get_engine, load_profile, profile_for_language
+        from ingestion.text_extractor import clean_legal_text
+        
+        assert profile_for_language("EN") == "en"
+        assert profile_for_language("BM") == "bm"
+        assert profile_for_language(None) == "default"
+        
+        text = "Mukasurat 2 daripada 9\nSeksyen 1.\nMengandungi segala pindaan hingga 1 Januari 2006"
+        assert clean_legal_text(text, "bm") == "Seksyen 1."
+        assert "Mukasurat" in clean_legal_text(text, "en")
+        
+        profile_path = tmp_path / "en_revised.json"
+        profile_path.write_text(json.dumps({
+            "extends": "en",
+            "disable": ["reprint_marker_en"],
+            "rules": [{"name": "revision_marker", "pattern": "Revised\\s*\\d{4}"}],
+        }))
+        profile = load_profile(profile_path)
+        assert profile.name == "en_revised"
+        assert [rule.name for rule in profile.rules][-1] == "revision_marker"
+        assert "reprint_marker_en" not in [rule.name for rule in profile.rules]
+        
+        text = "Revised 1990\nIncorporating all amendments up to 1 January 2006"
+        assert clean_legal_text(text, str(profile_path)) == text.split("\n")[1]
+        assert get_engine(str(profile_path)).stats()["revision_marker"] == 1
+        
+        profile_path.write_text(json.dumps({"extends": "en", "disable": ["no_such_rule"]}))
+        with pytest.raises(ValueError):
+            load_profile(profile_path)
 
 
 class TestChunker:
@@ -110,6 +275,842 @@ This section was added later.
         assert sections[0]["section_number"] == "5A"
 
 
+class TestIngestionManifest:
+    """Tests for incremental ingestion driven by the content-hash manifest."""
+    
+    def test_extraction_skips_unchanged_pdfs(self, tmp_path, monkeypatch):
+        """Test unchanged PDFs are skipped until their output or the cleaning rules change."""
+        import shutil
+        from ingestion import text_extractor
+        
+        raw_dir = tmp_path / "raw"
+        output_dir = tmp_path / "processed"
+        raw_dir.mkdir()
+        output_dir.mkdir()
+        pdf_name = "Act_137_Specific Relief Act 1951_EN.pdf"
+        shutil.copy(text_extractor.get_raw_data_dir() / pdf_name, raw_dir)
+        output_path = output_dir / "Act_137_Specific Relief Act 1951_EN.json"
+        
+        processed = []
+        process_pdf = text_extractor.process_pdf
+        
+        def spy(pdf_path, *args, **kwargs):
+            processed.append(pdf_path.name)
+            return process_pdf(pdf_path, *args, **kwargs)
+        
+        monkeypatch.setattr(text_extractor, "process_pdf", spy)
+        
+        def run(**kwargs):
+            processed.clear()
+            results = text_extractor.process_all_pdfs(raw_dir=raw_dir, output_dir=output_dir, **kwargs)
+            assert results == {pdf_name: True}
+            return list(processed)
+        
+        assert run() == [pdf_name]
+        expected = output_path.read_bytes()
+        assert run() == []
+        
+        # A damaged output, a forced full run or other cleaning rules redo the PDF
+        output_path.write_text("{}")
+        assert run() == [pdf_name]
+        assert output_path.read_bytes() == expected
+        assert run(incremental=False) == [pdf_name]
+        assert run(profile="default") == [pdf_name]
+        assert run(profile="default") == []
+    
+    def test_chunking_skips_unchanged_documents(self, tmp_path, monkeypatch):
+        """Test only changed documents are re-chunked, with stats kept for the rest."""
+        import shutil
+        from ingestion import chunker
+        from config import get_processed_dir
+        
+        for name in ("Act_136_Contracts Act 1950_EN.json", "Act_137_Specific Relief Act 1951_EN.json"):
+            shutil.copy(get_processed_dir() / name, tmp_path)
+        monkeypatch.setattr(chunker, "get_processed_dir", lambda: tmp_path)
+        monkeypatch.setattr(chunker, "count_tokens", lambda text: len(text.split()))
+        
+        chunked = []
+        chunk_document = chunker.chunk_document
+        
+        def spy(document, *args, **kwargs):
+            chunked.append(document["metadata"]["act_number"])
+            return chunk_document(document, *args, **kwargs)
+        
+        monkeypatch.setattr(chunker, "chunk_document", spy)
+        
+        results = chunker.process_all_documents(max_tokens=1000)
+        assert sorted(chunked) == [136, 137]
+        
+        chunked.clear()
+        assert chunker.process_all_documents(max_tokens=1000) == results
+        assert chunked == []
+        
+        document_path = tmp_path / "Act_137_Specific Relief Act 1951_EN.json"
+        document = json.loads(document_path.read_text(encoding="utf-8"))
+        document["cleaned_text"] += "\nSection 99. New provision\nAdded by amendment."
+        document_path.write_text(json.dumps(document), encoding="utf-8")
+        
+        rerun = chunker.process_all_documents(max_tokens=1000)
+        assert chunked == [137]
+        assert rerun["Act_136_Contracts Act 1950_EN.json"] == results["Act_136_Contracts Act 1950_EN.json"]
+        chunks_path = tmp_path / "Act_137_Specific Relief Act 1951_EN_chunks.json"
+        assert "Added by amendment." in chunks_path.read_text(encoding="utf-8")
+        
+        chunked.clear()
+        chunker.process_all_documents(max_tokens=500)
+        assert sorted(chunked) == [136, 137]
+    
+    def test_embedding_upserts_only_changed_chunks(self, tmp_path, monkeypatch):
+        """Test unchanged chunks are never re-upserted while the collection is unchanged."""
+        from config import RAGConfig
+        from ingestion import vector_ingest
+        
+        chunks = [
+            {
+                "chunk_id": f"act_136_s{i}",
+                "act_name": "Contracts Act 1950",
+                "act_number": 136,
+                "part": "Part I",
+                "section_number": str(i),
+                "section_title": f"Section {i}",
+                "content": f"Text of section {i}.",
+                "token_count": 5,
+            }
+            for i in range(1, 5)
+        ]
+        versions = ["v1"]
+        upserted = []
+        
+        def ingest(batch, collection, config=None):
+            upserted.append([chunk["chunk_id"] for chunk in batch])
+            versions.append(f"v{len(versions) + 1}")
+            return len(batch)
+        
+        collection = MagicMock()
+        collection.name = "test_collection"
+        collection.count.return_value = len(chunks)
+        monkeypatch.setattr(vector_ingest, "get_processed_dir", lambda: tmp_path)
+        monkeypatch.setattr(vector_ingest, "load_all_chunks", lambda: chunks)
+        monkeypatch.setattr(vector_ingest, "create_chroma_collection", lambda name: collection)
+        monkeypatch.setattr(vector_ingest, "get_collection_version", lambda name: versions[-1])
+        monkeypatch.setattr(vector_ingest, "ingest_chunks_to_chroma", ingest)
+        monkeypatch.setattr(vector_ingest, "remove_stale_chunks", lambda *args: 0)
+        monkeypatch.setattr(
+            vector_ingest, "read_keyword_manifest", lambda path: {"collection_version": versions[-1]}
+        )
+        monkeypatch.setattr(vector_ingest, "_artifact_is_current", lambda *args: True)
+        monkeypatch.setattr(vector_ingest, "test_retrieval", lambda *args: [])
+        
+        def run():
+            upserted.clear()
+            stats = vector_ingest._run_ingestion(RAGConfig())
+            return upserted[0] if upserted else [], stats
+        
+        assert run()[0] == [chunk["chunk_id"] for chunk in chunks]
+        ids, stats = run()
+        assert ids == [] and stats["chunks_unchanged"] == len(chunks)
+        
+        chunks[2] = dict(chunks[2], content="Amended text of section 3.")
+        assert run()[0] == ["act_136_s3"]
+        assert run()[0] == []
+        
+        # Someone else wrote to the collection: the manifest is not trusted
+        versions.append("external")
+        assert len(run()[0]) == len(chunks)
+
+
+class TestBM25Index:
+    """Tests for the sparse BM25 keyword index."""
+
+    CORPUS = [
+        "section_10 all agreements are contracts if made by free consent",
+        "consideration means the price paid for the promise",
+        "a housing developer must hold a licence",
+        "specific performance of a contract may be enforced",
+        "the contract is void where consideration is unlawful",
+    ]
+
+    @staticmethod
+    def okapi_scores(corpus, query, k1=1.5, b=0.75, epsilon=0.25):
+        """Exhaustive BM25Okapi scores used as the reference."""
+        import math
+        from collections import Counter
+
+        n = len(corpus)
+        avgdl = sum(len(d) for d in corpus) / n
+        df = Counter(t for d in corpus for t in set(d))
+        idf = {t: math.log(n - f + 0.5) - math.log(f + 0.5) for t, f in df.items()}
+        eps = epsilon * sum(idf.values()) / len(idf)
+        idf = {t: (v if v >= 0 else eps) for t, v in idf.items()}
+
+        scores = []
+        for doc in corpus:
+            tf = Counter(doc)
+            norm = k1 * (1 - b + b * len(doc) / avgdl)
+            scores.append(sum(
+                idf.get(q, 0) * tf[q] * (k1 + 1) / (tf[q] + norm)
+                for q in query
+            ))
+        return scores
+
+    @staticmethod
+    def assert_same_hits(hits, expected):
+        """Assert two rankings return the same documents with equal scores."""
+        assert [doc for doc, _ in hits] == [doc for doc, _ in expected]
+        assert [score for _, score in hits] == pytest.approx([score for _, score in expected])
+
+    def test_search_matches_exhaustive_okapi(self):
+        """Test sparse top-k equals scoring every document."""
+        from retrieval.bm25_index import BM25Index
+
+        corpus = [doc.split() for doc in self.CORPUS]
+        index = BM25Index.build(corpus)
+        query = "the consideration of a contract".split()
+
+        expected = self.okapi_scores(corpus, query)
+        hits = index.search(query, n_results=3)
+
+        ranked = sorted(range(len(expected)), key=lambda i: expected[i], reverse=True)
+        assert [doc for doc, _ in hits] == ranked[:3]
+        for doc, score in hits:
+            assert score == pytest.approx(expected[doc])
+
+    def test_search_only_returns_matching_documents(self):
+        """Test documents without query terms are never returned."""
+        from retrieval.bm25_index import BM25Index
+
+        index = BM25Index.build(doc.split() for doc in self.CORPUS)
+
+        hits = index.search(["licence", "unknownterm"], n_results=5)
+        assert [doc for doc, _ in hits] == [2]
+        assert index.search(["unknownterm"], n_results=5) == []
+
+    def test_saved_index_is_memory_mapped(self, tmp_path):
+        """Test a persisted index loads memory-mapped and ranks identically."""
+        import numpy as np
+        from retrieval.bm25_index import (
+            BM25Index,
+            load_keyword_index,
+            save_keyword_index,
+            tokenize,
+        )
+
+        index = BM25Index.build(tokenize(doc) for doc in self.CORPUS)
+        doc_ids = [f"chunk_{i}" for i in range(len(self.CORPUS))]
+        save_keyword_index(tmp_path / "index", index, doc_ids, "v1")
+
+        loaded, loaded_ids, manifest = load_keyword_index(tmp_path / "index")
+
+        assert loaded_ids == doc_ids
+        assert manifest["collection_version"] == "v1"
+        assert isinstance(loaded.postings_docs, np.memmap)
+        query = tokenize("Section 10 consideration contract")
+        assert loaded.search(query, 3) == index.search(query, 3)
+
+    def test_analyzer_maps_queries_to_memoized_term_ids(self):
+        """Test queries become cached term-id arrays that rank like token lists."""
+        from retrieval.bm25_index import Analyzer, BM25Index, tokenize
+
+        index = BM25Index.build(tokenize(doc) for doc in self.CORPUS)
+        analyzer = Analyzer(index.vocabulary)
+        query = "Section 10 consideration, unknownterm contract"
+
+        term_ids = analyzer.term_ids(query)
+
+        assert term_ids.tolist() == [
+            index.vocabulary["section_10"],
+            index.vocabulary["consideration"],
+            index.vocabulary["contract"],
+        ]
+        assert analyzer.term_ids(query) is term_ids
+        assert analyzer.stats()["hits"] == 1
+        self.assert_same_hits(
+            index.search_ids_many([term_ids], 3)[0],
+            index.search(tokenize(query), 3)
+        )
+
+    def test_load_missing_index_returns_none(self, tmp_path):
+        """Test a missing artifact signals a rebuild."""
+        from retrieval.bm25_index import load_keyword_index
+
+        assert load_keyword_index(tmp_path / "missing") is None
+
+    @pytest.fixture
+    def segmented_index(self, tmp_path):
+        """Artifact with an upsert (one changed, one new chunk) and a delete applied."""
+        from retrieval.bm25_index import (
+            BM25Index,
+            append_keyword_segment,
+            save_keyword_index,
+            tokenize,
+        )
+
+        directory = tmp_path / "index"
+        base = BM25Index.build(tokenize(doc) for doc in self.CORPUS)
+        save_keyword_index(directory, base, [f"chunk_{i}" for i in range(5)], "v1")
+
+        upserts = {
+            "chunk_1": "consideration means the price paid for a promise or a licence",
+            "chunk_5": "a contract of guarantee is a contract to perform the promise",
+        }
+        delta = BM25Index.build(tokenize(doc) for doc in upserts.values())
+        manifest = append_keyword_segment(
+            directory, delta, list(upserts), "v2", base_version="v1",
+            deleted_ids=["chunk_3"]
+        )
+
+        live = {f"chunk_{i}": doc for i, doc in enumerate(self.CORPUS)}
+        del live["chunk_3"]
+        live.update(upserts)
+        return directory, manifest, live
+
+    def test_delta_segment_and_tombstones_match_fresh_build(self, segmented_index):
+        """Test incremental updates score like re-indexing the live documents."""
+        from retrieval.bm25_index import (
+            BM25Index,
+            append_keyword_segment,
+            load_keyword_index,
+            tokenize,
+        )
+
+        directory, manifest, live = segmented_index
+        assert len(manifest["segments"]) == 2
+        assert manifest["n_docs"] == len(live)
+
+        index, doc_ids, _ = load_keyword_index(directory)
+        fresh = BM25Index.build(tokenize(live[doc_id]) for doc_id in doc_ids)
+
+        assert sorted(doc_ids) == sorted(live)
+        assert index.avgdl == pytest.approx(fresh.avgdl)
+        # "performance" only occurred in the deleted chunk
+        assert index.term_idf("performance") == 0.0
+        for query in ["the consideration of a contract", "licence promise", "specific"]:
+            tokens = tokenize(query)
+            self.assert_same_hits(index.search(tokens, 5), fresh.search(tokens, 5))
+
+        # An update against a stale version is refused
+        assert append_keyword_segment(directory, fresh, doc_ids, "v3", "v1") is None
+
+    def test_merge_compacts_segments(self, segmented_index):
+        """Test merging leaves one memory-mapped segment with the same rankings."""
+        import numpy as np
+        from retrieval.bm25_index import (
+            load_keyword_index,
+            merge_keyword_segments,
+            read_keyword_manifest,
+            tokenize,
+        )
+
+        directory, _, _ = segmented_index
+        before, before_ids, _ = load_keyword_index(directory)
+
+        assert merge_keyword_segments(directory)
+
+        manifest = read_keyword_manifest(directory)
+        assert len(manifest["segments"]) == 1
+        assert manifest["segments"][0]["deleted"] == []
+        assert sorted(path.name for path in directory.iterdir()) == sorted(
+            [manifest["segments"][0]["name"], "manifest.json"]
+        )
+
+        after, after_ids, _ = load_keyword_index(directory)
+        assert after_ids == before_ids
+        assert isinstance(after.postings_docs, np.memmap)
+        query = tokenize("the consideration of a contract")
+        self.assert_same_hits(after.search(query, 5), before.search(query, 5))
+
+    def test_subset_search_never_scores_outside_documents(self):
+        """Test a document subset restricts scoring to its members."""
+        import numpy as np
+        from retrieval.bm25_index import BM25Index, DocSubset
+
+        index = BM25Index.build(doc.split() for doc in self.CORPUS)
+        members = np.array([False, True, False, False, True])
+        subset = DocSubset(np.packbits(members), len(self.CORPUS))
+
+        hits = index.search("the consideration of a contract".split(), 5, subset)
+
+        assert {doc for doc, _ in hits} == {1, 4}
+        full = dict(index.search("the consideration of a contract".split(), 5))
+        for doc, score in hits:
+            assert score == pytest.approx(full[doc])
+
+    def test_shards_merge_to_unsharded_results(self):
+        """Test shard slices keep global statistics so merged hits match."""
+        import numpy as np
+        from retrieval.bm25_index import BM25Index
+        from retrieval.sharded_retriever import merge_shard_hits
+
+        index = BM25Index.build(doc.split() for doc in self.CORPUS)
+        shards = [np.array([0, 2, 3]), np.array([1, 4])]
+        query = index.lookup("the consideration of a contract".split())
+
+        shard_hits = []
+        for ordinals in shards:
+            hits = index.shard(ordinals).search_ids_many([query], 5)[0]
+            shard_hits.append([(int(ordinals[doc]), score) for doc, score in hits])
+
+        self.assert_same_hits(merge_shard_hits(shard_hits, 3), index.search_ids_many([query], 3)[0])
+
+    def test_max_score_matches_exhaustive_and_scores_fewer_postings(self):
+        """Test MaxScore returns the exhaustive top-k while skipping postings."""
+        import random
+        from retrieval.bm25_index import BM25Index
+
+        rng = random.Random(7)
+        vocabulary = [f"term{i}" for i in range(200)]
+        weights = [1 / (i + 1) for i in range(200)]
+        index = BM25Index.build(
+            rng.choices(vocabulary, weights, k=rng.randint(5, 60)) for _ in range(1000)
+        )
+        queries = [rng.choices(vocabulary, weights, k=8) for _ in range(50)]
+
+        index.dynamic_pruning = False
+        expected = [index.search(query, 10) for query in queries]
+        exhaustive_postings = index.postings_scored
+
+        index.dynamic_pruning = True
+        index.postings_scored = 0
+        for query, hits in zip(queries, expected):
+            self.assert_same_hits(index.search(query, 10), hits)
+        assert index.postings_scored < exhaustive_postings
+
+    def test_prune_query_drops_common_terms(self):
+        """Test terms above the document frequency ratio are dropped."""
+        from retrieval.bm25_index import BM25Index
+
+        index = BM25Index.build(doc.split() for doc in self.CORPUS)
+
+        # "the", "a" and "contract" occur in 2 of 5 documents, "price" in 1
+        assert index.prune_query("the price of a contract".split(), 0.3) == ["price", "of"]
+        assert index.prune_query("the price of a contract".split(), 0.5) == [
+            "the", "price", "of", "a", "contract"
+        ]
+        # If every term is too common, the rarest one is kept
+        assert index.prune_query(["the", "a", "of", "the"], 0.1) == ["of"]
+        assert index.prune_query(["unknownterm"], 0.5) == []
+
+
+class TestVectorIndex:
+    """Tests for the exact (matrix product) vector index."""
+
+    @pytest.fixture
+    def embeddings(self):
+        import numpy as np
+
+        return np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+
+    def test_search_matches_brute_force(self, embeddings):
+        """Test argpartition top-k equals a full cosine-similarity sort."""
+        import numpy as np
+        from retrieval.vector_index import VectorIndex, normalize_rows
+
+        matrix = normalize_rows(embeddings)
+        queries = embeddings[:3] + 0.1
+        expected = normalize_rows(queries) @ matrix.T
+
+        for hits, scores in zip(VectorIndex(matrix).search(queries, 5), expected):
+            assert [doc for doc, _ in hits] == list(np.argsort(-scores)[:5])
+            assert [score for _, score in hits] == pytest.approx(sorted(scores, reverse=True)[:5])
+
+    def test_subset_search_and_memory_mapped_artifact(self, embeddings, tmp_path):
+        """Test a saved index loads memory-mapped and honours a subset."""
+        import numpy as np
+        from retrieval.bm25_index import DocSubset
+        from retrieval.vector_index import load_vector_index, save_vector_index
+
+        doc_ids = [f"chunk_{i}" for i in range(len(embeddings))]
+        save_vector_index(tmp_path / "vectors", embeddings, doc_ids, "v1")
+        index, loaded_ids, manifest = load_vector_index(tmp_path / "vectors")
+
+        assert isinstance(index.matrix, np.memmap)
+        assert loaded_ids == doc_ids and manifest["dim"] == 16
+
+        members = np.zeros(len(embeddings), dtype=bool)
+        members[10:20] = members[40:45] = True
+        subset = DocSubset(np.packbits(members), len(embeddings))
+        hits = index.search(embeddings[:1], 8, subset)[0]
+
+        assert len(hits) == 8
+        assert all(members[doc] for doc, _ in hits)
+        assert load_vector_index(tmp_path / "missing") is None
+
+    @pytest.mark.parametrize("quantization", ["int8", "binary"])
+    def test_quantized_search_rescores_at_full_precision(
+        self, embeddings, tmp_path, quantization
+    ):
+        """Test quantized first passes return full-precision similarities."""
+        from retrieval.vector_index import VectorIndex, load_vector_index, save_vector_index
+
+        exact = VectorIndex.from_embeddings(embeddings)
+        save_vector_index(tmp_path / "vectors", embeddings, list(map(str, range(50))), "v1")
+        quantized, _, _ = load_vector_index(
+            tmp_path / "vectors", quantization=quantization, rescore_factor=10
+        )
+
+        assert quantized.memory_bytes()["scanned"] < exact.memory_bytes()["scanned"]
+
+        # A shortlist covering every row must reproduce exact search
+        queries = embeddings[:3] + 0.1
+        for got, expected in zip(quantized.search(queries, 5), exact.search(queries, 5)):
+            assert [doc for doc, _ in got] == [doc for doc, _ in expected]
+            assert [score for _, score in got] == pytest.approx([score for _, score in expected])
+
+
+class TestDocumentStore:
+    """Tests for the columnar document store."""
+
+    def test_lookup_by_id_and_metadata_columns(self):
+        """Test O(1) id lookup and metadata round trip."""
+        from retrieval.document_store import DocumentStore
+
+        store = DocumentStore(
+            ["act_136_s2", "act_136_s10", "act_137_s11"],
+            ["Interpretation", None, "Specific performance"],
+            [
+                {"act_name": "Contracts Act 1950", "act_number": 136,
+                 "section_number": "2", "section_title": "Interpretation"},
+                {"act_name": "Contracts Act 1950", "act_number": 136,
+                 "section_number": "10", "section_title": "What agreements are contracts"},
+                None,
+            ],
+        )
+
+        assert store.ordinal("act_136_s10") == 1
+        assert store.ordinal("act_999_s1") is None
+        assert store.content(1) == ""
+        assert store.metadata(1)["section_title"] == "What agreements are contracts"
+        assert store.metadata(2)["act_number"] == 0
+        assert store.act_name.categories == ["Contracts Act 1950", ""]
+
+    def test_filter_resolves_to_bitmap_and_where_clause(self):
+        """Test act/part/section filters select the same slice on both legs."""
+        import numpy as np
+        from retrieval.document_store import DocumentStore, RetrievalFilter
+
+        rows = [
+            ("act_136_s2", 136, "Part I - PRELIMINARY", "2"),
+            ("act_136_s10", 136, "Part II - OF CONTRACTS", "10"),
+            ("act_136_s14A", 136, "Part II - OF CONTRACTS", "14A"),
+            ("act_137_s11", 137, "Part II - SPECIFIC RELIEF", "11"),
+            ("act_118_s5", 118, "", "5"),
+        ]
+        store = DocumentStore(
+            [row[0] for row in rows],
+            [""] * len(rows),
+            [
+                {"act_number": act, "part": part, "section_number": section}
+                for _, act, part, section in rows
+            ],
+        )
+
+        spec = RetrievalFilter(act_numbers=[136], parts=["Part II"], section_range=(10, 14))
+        subset = store.resolve_filter(spec)
+
+        assert [store.doc_ids[i] for i in np.flatnonzero(subset.mask)] == [
+            "act_136_s10", "act_136_s14A"
+        ]
+        assert store.resolve_filter(spec) is subset
+        assert store.resolve_filter(RetrievalFilter()) is None
+        assert store.where_clause(spec) == {"$and": [
+            {"act_number": {"$in": [136]}},
+            {"part": {"$in": ["Part II - OF CONTRACTS", "Part II - SPECIFIC RELIEF"]}},
+            {"section_number": {"$in": ["10", "14A", "11"]}},
+        ]}
+        assert len(store.resolve_filter(RetrievalFilter(act_numbers=[999]))) == 0
+
+    def test_chunk_store_serves_text_from_memory_map(self, tmp_path):
+        """Test the on-disk chunk store round-trips text and backs a document store."""
+        import numpy as np
+        from retrieval.chunk_store import load_chunk_store, save_chunk_store
+        from retrieval.document_store import DocumentStore
+
+        doc_ids = ["act_136_s2", "act_136_s10", "act_137_s11"]
+        texts = ["“Promise” means…", None, "Specific performance of contracts"]
+        save_chunk_store(tmp_path / "store", doc_ids, texts, "v1")
+
+        chunk_texts, stored_ids, manifest = load_chunk_store(tmp_path / "store")
+        assert stored_ids == doc_ids
+        assert manifest["collection_version"] == "v1"
+        assert isinstance(chunk_texts.texts, np.memmap)
+        assert list(chunk_texts) == ["“Promise” means…", "", "Specific performance of contracts"]
+
+        store = DocumentStore(doc_ids, chunk_texts, [None] * 3)
+        assert store.documents is chunk_texts
+        assert store.content(2) == "Specific performance of contracts"
+        assert load_chunk_store(tmp_path / "missing") is None
+
+
+class TestCitationIndex:
+    """Tests for the section citation index."""
+
+    @pytest.fixture
+    def index(self):
+        from retrieval.citation_index import CitationIndex
+
+        chunks = [
+            ("act_136_s10", 136, "Contracts Act 1950", "10"),
+            ("act_136_s74_2", 136, "Contracts Act 1950", "74"),
+            ("act_136_s74_1", 136, "Contracts Act 1950", "74"),
+            ("act_136_s74_dup1", 136, "Contracts Act 1950", "74"),
+            ("act_136_preamble", 136, "Contracts Act 1950", "Preamble"),
+            ("act_137_s10", 137, "Specific Relief Act 1951", "10"),
+            ("act_137_s24", 137, "Specific Relief Act 1951", "24"),
+        ]
+        return CitationIndex.build(
+            [chunk_id for chunk_id, *_ in chunks],
+            [
+                {"act_number": act, "act_name": name, "section_number": section}
+                for _, act, name, section in chunks
+            ],
+        )
+
+    def test_section_parts_in_order_without_duplicates(self, index):
+        """Test a cited section maps to its parts, skipping _dupN chunks."""
+        match = index.match("What does section 74 of the Contracts Act say?")
+
+        assert match.unambiguous
+        assert match.doc_ids == ["act_136_s74_1", "act_136_s74_2"]
+        assert index.match("s24").doc_ids == ["act_137_s24"]
+        assert index.match("consideration for a promise") is None
+
+    def test_act_resolves_ambiguous_section(self, index):
+        """Test the cited act (or a filter) disambiguates a section number."""
+        assert not index.match("Section 10 free consent").unambiguous
+        assert index.match("s. 10 Specific Relief Act").doc_ids == ["act_137_s10"]
+        assert index.match("section 10 of Act 136").doc_ids == ["act_136_s10"]
+        assert index.match("Section 10", act_numbers=[136]).doc_ids == ["act_136_s10"]
+        assert index.match("Section 24 Act 137", act_numbers=[136]) is None
+
+    def test_body_occurrence_preferred_over_arrangement_entry(self):
+        """Test a section listed in the arrangement of sections maps to its body text."""
+        from retrieval.citation_index import CitationIndex
+
+        chunks = [
+            ("act_136_preamble", "Preamble", 0),
+            ("act_136_s28", "28", 1960),  # arrangement entry
+            ("act_136_s74_1", "74", 4620),  # arrangement entry, split
+            ("act_136_s74_2", "74", 4620),
+            ("act_136_s1", "1", 14243),
+            ("act_136_s28_dup1", "28", 38874),
+            ("act_136_s74_1_dup1", "74", 70012),
+            ("act_136_s74_2_dup1", "74", 70012),
+            ("act_136_s1_dup1", "1", 156000),  # amending act
+        ]
+        index = CitationIndex.build(
+            [chunk_id for chunk_id, *_ in chunks],
+            [
+                {
+                    "act_number": 136,
+                    "act_name": "Contracts Act 1950",
+                    "section_number": section,
+                    "start_position": position,
+                }
+                for _, section, position in chunks
+            ],
+        )
+
+        assert index.match("Section 28 Contracts Act").doc_ids == ["act_136_s28_dup1"]
+        assert index.match("s. 74").doc_ids == ["act_136_s74_1_dup1", "act_136_s74_2_dup1"]
+        assert index.match("section 1").doc_ids == ["act_136_s1"]
+
+
+class TestQueryEmbedder:
+    """Tests for the cached query embedder."""
+
+    def test_repeated_queries_hit_cache(self):
+        """Test normalized repeats are embedded once."""
+        from retrieval.query_embedder import QueryEmbedder
+
+        calls = []
+
+        def embedding_function(texts):
+            calls.append(list(texts))
+            return [[float(len(t)), 1.0] for t in texts]
+
+        embedder = QueryEmbedder(embedding_function, cache_size=8)
+
+        first = embedder.embed(["What is consideration?", "what is  CONSIDERATION?"])
+        second = embedder.embed(["What is consideration?"])
+
+        assert calls == [["what is consideration?"]]
+        assert (first[0] == first[1]).all() and (second[0] == first[0]).all()
+        assert embedder.stats()["hits"] == 1
+
+    def test_concurrent_misses_are_batched(self):
+        """Test queries arriving together share one model call."""
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from retrieval.query_embedder import QueryEmbedder
+
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def embedding_function(texts):
+            calls.append(list(texts))
+            time.sleep(0.05)
+            return [[float(len(t)), 1.0] for t in texts]
+
+        embedder = QueryEmbedder(
+            embedding_function, cache_size=0, batch_max_wait_ms=200, batch_max_size=8
+        )
+        queries = [f"question{'x' * i}" for i in range(8)]
+
+        def embed(query):
+            barrier.wait()
+            return embedder.embed([query])[0]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            vectors = list(pool.map(embed, queries))
+
+        assert len(calls) < len(queries)
+        assert [vector[0] for vector in vectors] == [float(len(q)) for q in queries]
+        batching = embedder.stats()["batching"]
+        assert batching["requests"] == 8
+        assert sum(size * n for size, n in batching["batch_size_histogram"].items()) == 8
+
+    def test_batcher_propagates_model_errors(self):
+        """Test every caller in a failed batch sees the error."""
+        from retrieval.query_embedder import EmbeddingBatcher
+
+        def embedding_function(texts):
+            raise RuntimeError("model unavailable")
+
+        batcher = EmbeddingBatcher(embedding_function, max_wait_ms=1)
+
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            batcher(["what is consideration?"])
+        assert batcher([]) == []
+
+    def test_lone_query_is_not_held_for_a_batch(self):
+        """Test a query with no other query pending skips the batch wait."""
+        import time
+        from retrieval.query_embedder import EmbeddingBatcher
+
+        batcher = EmbeddingBatcher(lambda texts: [[1.0] for _ in texts], max_wait_ms=2000)
+
+        start = time.perf_counter()
+        batcher(["what is consideration?"])
+        batcher(["what is a void agreement?"])
+
+        assert time.perf_counter() - start < 1.0
+        assert batcher.stats()["batch_size_histogram"] == {1: 2}
+
+    def test_cache_is_bounded(self):
+        """Test the least recently used entry is evicted."""
+        from retrieval.cache import LRUCache
+
+        cache = LRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+
+class TestResultCache:
+    """Tests for the two-tier retrieval result cache."""
+
+    def test_disk_tier_is_shared_between_instances(self, tmp_path):
+        """Test a second process-local cache reads the shared SQLite tier."""
+        from retrieval.cache import ResultCache
+
+        path = tmp_path / "results.sqlite3"
+        writer = ResultCache(8, lambda: "v1", disk_path=path)
+        reader = ResultCache(8, lambda: "v1", disk_path=path)
+
+        writer.put(("what is consideration", "hybrid", 5), [{"chunk_id": "act_136_s2"}])
+
+        assert reader.get(("what is consideration", "hybrid", 5)) == [{"chunk_id": "act_136_s2"}]
+        assert reader.stats()["disk"]["hits"] == 1
+
+    def test_version_change_invalidates_cache(self, tmp_path):
+        """Test a new collection version drops entries from both tiers."""
+        from retrieval.cache import ResultCache
+
+        version = {"current": "v1"}
+        cache = ResultCache(
+            8, lambda: version["current"], disk_path=tmp_path / "results.sqlite3"
+        )
+        cache.put("query", [1, 2, 3])
+        assert cache.get("query") == [1, 2, 3]
+
+        version["current"] = "v2"
+
+        assert cache.get("query") is None
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestTracing:
+    """Tests for per-stage latency tracing."""
+
+    def test_spans_are_noops_without_a_trace(self):
+        """Test spans outside a trace record nothing and share one no-op span."""
+        import tracing
+
+        with tracing.span("stage") as first, tracing.span("other") as second:
+            first.set(candidates=3)
+        assert first is second
+        assert tracing.current_trace() is None
+
+    def test_nested_spans_and_thread_propagation(self):
+        """Test spans nest under the active span, also on pool threads via bind()."""
+        import tracing
+        from concurrent.futures import ThreadPoolExecutor
+
+        def leg():
+            with tracing.span("leg") as span:
+                span.set(candidates=5)
+
+        with tracing.trace("request") as trace:
+            with tracing.span("stage"):
+                with ThreadPoolExecutor(max_workers=1) as pool:
+                    pool.submit(tracing.bind(leg)).result()
+                    pool.submit(leg).result()  # unbound: not traced
+            tracing.annotate(results=2)
+
+        spans = {span["name"]: span for span in trace.to_dict()["spans"]}
+        assert spans.keys() == {"stage", "leg"}
+        assert spans["leg"]["parent_id"] == spans["stage"]["span_id"]
+        assert spans["leg"]["attributes"] == {"candidates": 5}
+        assert spans["leg"]["thread_id"] != spans["stage"]["thread_id"]
+        assert trace.root.attributes == {"results": 2}
+        assert tracing.current_trace() is None
+
+    def test_exporters_write_json_lines_and_chrome_trace(self, tmp_path):
+        """Test finished traces are exported as JSON lines and Chrome trace events."""
+        import tracing
+
+        jsonl = tracing.JsonLinesExporter(tmp_path / "spans.jsonl")
+        chrome = tracing.ChromeTraceExporter(tmp_path / "trace.json")
+        for exporter in (jsonl, chrome, chrome):
+            with tracing.trace("retrieve", exporter=exporter, method="hybrid"):
+                with tracing.span("fusion"):
+                    pass
+
+        records = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+        assert [r["name"] for r in records] == ["retrieve", "fusion"]
+        assert records[0]["attributes"] == {"method": "hybrid"}
+        assert records[1]["trace_id"] == records[0]["trace_id"]
+
+        # The array is left open for appending; viewers accept that
+        events = json.loads((tmp_path / "trace.json").read_text().rstrip().rstrip(",") + "]")
+        assert [e["name"] for e in events] == ["retrieve", "fusion"] * 2
+        assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+        assert events[0]["ts"] <= events[1]["ts"]
+
+        # An exporter that does not implement format() cannot be created
+        class NoFormatExporter(tracing.TraceExporter):
+            pass
+
+        with pytest.raises(TypeError):
+            NoFormatExporter(tmp_path / "none.jsonl")
+
+
 class TestHybridRetriever:
     """Tests for the hybrid retriever."""
     
@@ -121,8 +1122,8 @@ class TestHybridRetriever:
     
     def test_retriever_initialization(self, retriever):
         """Test that retriever initializes with documents."""
-        assert retriever._documents is not None
-        assert len(retriever._documents) > 0
+        assert retriever.generation.store is not None
+        assert len(retriever.generation.store) > 0
     
     def test_semantic_search_returns_results(self, retriever):
         """Test semantic search returns results."""
@@ -141,6 +1142,32 @@ class TestHybridRetriever:
         )
         assert len(results) > 0
     
+    def test_keyword_pruning_evaluation_leaves_settings_alone(self, retriever, monkeypatch):
+        """Test the pruning evaluation passes its modes per search instead of mutating shared settings."""
+        from evaluation.evaluate_rag import evaluate_keyword_pruning
+        
+        bm25 = retriever.generation.bm25
+        seen = []
+        search_ids_many = bm25.search_ids_many
+        
+        def spy(*args, **kwargs):
+            seen.append((retriever.config.bm25_max_df_ratio, bm25.dynamic_pruning))
+            return search_ids_many(*args, **kwargs)
+        
+        monkeypatch.setattr(bm25, "search_ids_many", spy)
+        questions = [
+            {"question": "What is free consent?", "expected_act": "Contracts Act 1950", "expected_section": "14"},
+            {"question": "When is a contract void?", "expected_act": "Contracts Act 1950", "expected_section": "24"},
+        ]
+        report = evaluate_keyword_pruning(retriever, questions, k=5, max_df_ratio=0.3)
+        
+        assert set(seen) == {(None, True)}
+        modes = report["modes"]
+        assert modes["maxscore"]["mrr"] == modes["exhaustive"]["mrr"]
+        assert modes["maxscore"]["postings_scored_per_query"] <= (
+            modes["exhaustive"]["postings_scored_per_query"]
+        )
+    
     def test_hybrid_search_combines_methods(self, retriever):
         """Test hybrid search returns combined results."""
         results = retriever.retrieve(
@@ -188,6 +1215,298 @@ class TestHybridRetriever:
         relief_results = [r for r in results if "Specific Relief" in r.act_name]
         assert len(relief_results) > 0
 
+    def test_slow_semantic_leg_degrades_to_keyword(self, retriever):
+        """Test a leg that misses its deadline is dropped from fusion."""
+        import time
+
+        def slow_semantic_search(query, n_results, filters=None, generation=None):
+            time.sleep(0.5)
+            return [("act_136_s2", 1.0)]
+
+        retriever.config.semantic_deadline_ms = 50
+        retriever._semantic_search = slow_semantic_search
+
+        results = retriever.retrieve("Section 10 free consent", n_results=3, method="hybrid")
+
+        assert len(results) > 0
+        assert all(r.degraded == "keyword_only" for r in results)
+        assert retriever.cache_stats()["results"]["memory"]["size"] == 0
+
+    def test_retrieve_many_matches_single_queries(self, retriever):
+        """Test batched retrieval returns the same results as one-by-one."""
+        queries = [
+            "What is the definition of consideration?",
+            "housing developer license requirements",
+        ]
+        
+        batch = retriever.retrieve_many(queries, n_results=3, method="hybrid")
+        
+        assert len(batch) == len(queries)
+        for query, results in zip(queries, batch):
+            single = retriever.retrieve(query, n_results=3, method="hybrid")
+            assert [r.chunk_id for r in results] == [r.chunk_id for r in single]
+
+
+    def test_filtered_retrieval_stays_within_act(self, retriever):
+        """Test filtered hybrid retrieval only returns the selected act."""
+        from retrieval.document_store import RetrievalFilter
+
+        results = retriever.retrieve(
+            "contract consideration specific performance",
+            n_results=5,
+            method="hybrid",
+            filters=RetrievalFilter(act_numbers=[137])
+        )
+
+        assert len(results) > 0
+        assert all("Specific Relief" in r.act_name for r in results)
+
+
+    def test_unambiguous_citation_skips_embedding(self, retriever):
+        """Test a cited section is returned first without embedding the query."""
+        calls = []
+        embed = retriever._embedder.embed
+        retriever._embedder.embed = lambda queries: calls.append(queries) or embed(queries)
+
+        results = retriever.retrieve("s. 24 Specific Relief Act", n_results=3)
+
+        assert calls == []
+        assert results[0].chunk_id == "act_137_s24"
+        assert results[0].retrieval_method == "citation"
+
+
+    def test_exact_backend_agrees_with_chroma(self, retriever):
+        """Test exact vector search finds the same neighbours as HNSW."""
+        from config import RAGConfig
+        from retrieval.hybrid_retriever import HybridRetriever
+
+        exact = HybridRetriever(RAGConfig(semantic_backend="exact"))
+        assert exact.generation.vectors is not None
+
+        query = "When can a court grant specific performance?"
+        chroma_ids = [doc_id for doc_id, _ in retriever._semantic_search(query, 10)]
+        exact_ids = [doc_id for doc_id, _ in exact._semantic_search(query, 10)]
+
+        assert len(set(chroma_ids) & set(exact_ids)) >= 8
+
+    def test_sharded_retriever_matches_unsharded(self):
+        """Test per-act shard processes return the unsharded results."""
+        from config import RAGConfig
+        from retrieval.document_store import RetrievalFilter
+        from retrieval.hybrid_retriever import HybridRetriever
+        from retrieval.sharded_retriever import ShardedRetriever
+
+        config = RAGConfig(semantic_backend="exact", result_cache_size=0)
+        unsharded = HybridRetriever(config)
+        sharded = ShardedRetriever(config)
+        try:
+            assert len(sharded.shard_stats()) == 3
+
+            queries = [
+                "When can a court grant specific performance?",
+                "What is free consent?",
+            ]
+            for n_results, filters in [(10, None), (5, RetrievalFilter(act_numbers=[136]))]:
+                expected = unsharded.retrieve_many(queries, n_results, filters=filters)
+                results = sharded.retrieve_many(queries, n_results, filters=filters)
+                assert [[r.chunk_id for r in batch] for batch in results] == [
+                    [r.chunk_id for r in batch] for batch in expected
+                ]
+        finally:
+            sharded.close()
+
+    def test_reload_swaps_generation_under_in_flight_query(self, retriever):
+        """Test a reload swaps indexes while a running query finishes on the old ones."""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        old = retriever.generation
+        assert retriever.reload_if_stale() is None
+
+        started, release = threading.Event(), threading.Event()
+        keyword_search = retriever._keyword_search
+
+        def blocking_keyword_search(query, n_results, subset=None, generation=None):
+            started.set()
+            release.wait(5)
+            return keyword_search(query, n_results, subset, generation)
+
+        retriever._keyword_search = blocking_keyword_search
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(retriever.retrieve, "free consent", 3, "keyword")
+            assert started.wait(5)
+
+            assert retriever.reload(wait=True).result()
+            assert retriever.generation is not old
+            release.set()
+            results = pending.result()
+
+        assert results
+        assert all(old.store.ordinal(r.chunk_id) is not None for r in results)
+
+    def test_aretrieve_matches_retrieve(self, retriever):
+        """Test concurrent aretrieve() calls match retrieve()."""
+        import asyncio
+
+        queries = ["free consent", "specific performance of a contract", "housing developer licence"]
+
+        async def retrieve_all():
+            return await asyncio.gather(
+                *(retriever.aretrieve(q, 3, "keyword") for q in queries)
+            )
+
+        results = asyncio.run(retrieve_all())
+        assert [[r.chunk_id for r in batch] for batch in results] == [
+            [r.chunk_id for r in retriever.retrieve(q, 3, "keyword")] for q in queries
+        ]
+
+    def test_results_read_content_lazily(self, retriever):
+        """Test results hold no text until content is read, also when cached."""
+        from retrieval.chunk_store import ChunkTextStore
+        from retrieval.hybrid_retriever import RetrievalResult
+
+        assert isinstance(retriever.generation.store.documents, ChunkTextStore)
+        assert not hasattr(RetrievalResult("id", "", "", 0, "", "", 0.0, "hybrid"), "__dict__")
+
+        query = "rescission of a voidable contract"
+        results = retriever.retrieve(query, 3)
+        assert results and all(r._content is None for r in results)
+        assert all(
+            r.content == retriever.generation.store.content(retriever.generation.store.ordinal(r.chunk_id))
+            for r in results
+        )
+
+        cached = retriever.retrieve(query, 3)
+        assert cached == results
+        assert all(r._content is None for r in cached)
+
+    def test_retrieve_records_stage_spans(self, retriever):
+        """Test a captured retrieve() traces both legs and fusion, then the cache hit."""
+        import tracing
+
+        query = "remedies for breach of a contract of sale"
+        with tracing.capture() as trace:
+            results = retriever.retrieve(query, 3)
+        spans = {span["name"]: span for span in trace.to_dict()["spans"]}
+        assert {"retrieve", "semantic_search", "embed_query", "keyword_search",
+                "analyze_query", "bm25_score", "fusion"} <= spans.keys()
+        assert spans["retrieve"]["attributes"]["result_cache_hit"] is False
+        assert spans["retrieve"]["attributes"]["results"] == len(results)
+        assert spans["bm25_score"]["attributes"]["candidates"] > 0
+        assert spans["keyword_search"]["parent_id"] == spans["retrieve"]["span_id"]
+
+        with tracing.capture() as trace:
+            retriever.retrieve(query, 3)
+        names = [span["name"] for span in trace.to_dict()["spans"]]
+        assert names == ["retrieve"]
+        assert trace.spans[0].attributes["result_cache_hit"] is True
+
+
+class TestLegalRAGChain:
+    """Tests for the RAG chain's async API, with a stub retriever and LLM."""
+
+    @pytest.fixture
+    def chain(self):
+        """Create a chain whose retriever returns one canned result."""
+        from generation.rag_chain import LegalRAGChain
+        from retrieval.hybrid_retriever import RetrievalResult
+
+        source = RetrievalResult(
+            chunk_id="act_136_s10", content="All agreements are contracts...",
+            act_name="Contracts Act 1950", act_number="136", section_number="10",
+            section_title="What agreements are contracts", score=0.9,
+            retrieval_method="hybrid"
+        )
+        retriever = MagicMock()
+        retriever.retrieve.return_value = [source]
+        retriever.aretrieve = AsyncMock(return_value=[source])
+        retriever.format_context.return_value = "[Source 1: Contracts Act 1950, Section 10]"
+
+        with patch("generation.rag_chain.create_retriever", return_value=retriever), \
+                patch.dict(os.environ, {"GOOGLE_API_KEY": ""}):
+            return LegalRAGChain()
+
+    def test_aask_without_llm_returns_sources(self, chain):
+        """Test aask() falls back to the retrieved sections when no LLM is configured."""
+        import asyncio
+
+        result = asyncio.run(chain.aask("When is an agreement a contract?"))
+        assert "LLM generation is disabled" in result["answer"]
+        assert [s.chunk_id for s in result["sources"]] == ["act_136_s10"]
+        chain._retriever.aretrieve.assert_awaited_once()
+        chain._retriever.retrieve.assert_not_called()
+
+    def test_aask_and_aask_stream_use_async_chain(self, chain):
+        """Test aask() and aask_stream() generate through the async LLM interfaces."""
+        import asyncio
+        from langchain_core.language_models import FakeListChatModel
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+
+        answer = "Under Section 10, an agreement is a contract if made by free consent."
+        prompt = ChatPromptTemplate.from_messages([("human", "{context}\n{question}")])
+        chain._chain = prompt | FakeListChatModel(responses=[answer]) | StrOutputParser()
+
+        async def stream():
+            return [chunk async for chunk in chain.aask_stream("When is an agreement a contract?")]
+
+        result = asyncio.run(chain.aask("When is an agreement a contract?"))
+        assert result["answer"] == answer
+        assert result["sources"][0]["chunk_id"] == "act_136_s10"
+
+        chunks = asyncio.run(stream())
+        assert len(chunks) > 1
+        assert "".join(chunks) == answer
+
+    def test_cancelling_aask_cancels_generation(self, chain):
+        """Test cancelling aask() promptly cancels the in-flight LLM call."""
+        import asyncio
+        from langchain_core.runnables import RunnableLambda
+
+        cancelled = []
+
+        async def slow_llm(inputs):
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        chain._chain = RunnableLambda(slow_llm)
+
+        async def ask_and_cancel():
+            task = asyncio.create_task(chain.aask("When is an agreement a contract?"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(task, timeout=5)
+
+        asyncio.run(ask_and_cancel())
+        assert cancelled == [True]
+
+    def test_ask_attaches_stage_timings(self, chain):
+        """Test ask() and aask_stream() trace the LLM stages when tracing is on."""
+        import asyncio
+        from config import RAGConfig
+        from langchain_core.language_models import FakeListChatModel
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+
+        chain.config = RAGConfig(tracing=True, trace_export_format=None)
+        prompt = ChatPromptTemplate.from_messages([("human", "{context}\n{question}")])
+        chain._chain = prompt | FakeListChatModel(responses=["Yes.", "Yes."]) | StrOutputParser()
+
+        result = chain.ask("When is an agreement a contract?")
+        assert result["trace"]["name"] == "ask"
+        assert {"format_context", "llm"} <= result["trace"]["timings"].keys()
+
+        traces = []
+        with patch("tracing.Trace.finish", autospec=True, side_effect=traces.append):
+            async def stream():
+                return [chunk async for chunk in chain.aask_stream("When is an agreement a contract?")]
+            asyncio.run(stream())
+        assert {"format_context", "llm_first_token", "llm_stream"} <= traces[0].timings().keys()
+
 
 class TestGoldenDataset:
     """Tests using the golden dataset."""